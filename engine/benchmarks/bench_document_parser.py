@@ -0,0 +1,125 @@
+"""Micro-benchmarks for each DocumentParser conversion and LLMService._parse_response.
+
+Every conversion runs on a synthetic timesheet (see ``benchmarks.samples``) written
+to a temporary directory; outputs are removed between runs. Times are best-of-N,
+the least noisy estimate for CPU-bound work. Conversions whose optional
+dependency is missing (e.g. reportlab for the PDF converters) are reported as
+skipped rather than failing the run.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_document_parser [--employees 50] [--repeat 5]
+        [--json out.json] [--baseline previous.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("LOG_FILE", "")
+
+from loguru import logger
+
+logger.remove()
+
+from benchmarks.fake_bedrock import FakeBedrockRuntime, canned_reply, install  # noqa: E402
+from benchmarks.results import report_regressions, write_results  # noqa: E402
+from benchmarks.samples import build_document  # noqa: E402
+
+install(FakeBedrockRuntime())
+
+from services.document_parser import DocumentParser  # noqa: E402
+from services.llm_service import LLMService  # noqa: E402
+
+
+def conversions(parser: DocumentParser) -> Dict[str, tuple]:
+    """name -> (input file type, coroutine function taking the input path)"""
+    return {
+        "serialize_tables_csv": ("csv", lambda path: parser._serialize_tables(path, "csv")),
+        "serialize_tables_xlsx": ("xlsx", lambda path: parser._serialize_tables(path, "xlsx")),
+        "serialize_tables_docx": ("docx", lambda path: parser._serialize_tables(path, "docx")),
+        "serialize_tables_html": ("html", lambda path: parser._serialize_tables(path, "html")),
+        "convert_word_to_pdf": ("docx", parser._convert_word_to_pdf),
+        "convert_excel_to_pdf": ("xlsx", parser._convert_excel_to_pdf),
+        "convert_text_to_pdf": ("txt", lambda path: parser._convert_text_to_pdf(path, "txt")),
+        "convert_pdf_to_png": ("pdf", lambda path: parser._convert_pdf_to_png(path, apply_policy=False)),
+        "convert_pdf_to_image_policy": ("pdf", lambda path: parser._convert_pdf_to_png(path, apply_policy=True)),
+        "apply_image_policy": ("png", parser._apply_image_policy),
+    }
+
+
+async def time_conversion(convert: Callable[[str], Awaitable[str]], source: Path, repeat: int) -> Dict:
+    samples: List[float] = []
+    output_bytes = 0
+    for _ in range(repeat):
+        before = set(source.parent.iterdir())
+        started = time.perf_counter()
+        output = await convert(str(source))
+        samples.append(time.perf_counter() - started)
+        output_bytes = Path(output).stat().st_size
+        for path in set(source.parent.iterdir()) - before:
+            path.unlink()
+    return {"ms": round(min(samples) * 1000, 3), "input_bytes": source.stat().st_size, "output_bytes": output_bytes}
+
+
+def time_parse_response(service: LLMService, employees: int, repeat: int) -> Dict:
+    text = f"Here is the extracted data:\n```json\n{canned_reply(employees)}\n```"
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parsed = service._parse_response(text)
+        samples.append(time.perf_counter() - started)
+    return {"ms": round(min(samples) * 1000, 3), "input_bytes": len(text), "parsed": len(parsed)}
+
+
+async def run(args) -> Dict[str, Dict]:
+    parser = DocumentParser()
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_parser_") as directory:
+        for name, (file_type, convert) in conversions(parser).items():
+            if args.only and name not in args.only:
+                continue
+            source = Path(directory, name, f"timesheet.{file_type}")
+            source.parent.mkdir()
+            source.write_bytes(build_document(file_type, args.employees))
+            try:
+                results[name] = await time_conversion(convert, source, args.repeat)
+            except Exception as e:
+                results[name] = {"skipped": f"{type(e).__name__}: {e}"}
+    if not args.only or "parse_response" in args.only:
+        results["parse_response"] = time_parse_response(LLMService(), args.employees, args.repeat)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=50, help="Rows per synthetic document")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs the baseline (fraction)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    metrics = {}
+    for name, row in results.items():
+        if "skipped" in row:
+            print(f"{name:<30} skipped ({row['skipped'][:80]})")
+            continue
+        metrics[f"{name}.ms"] = row["ms"]
+        print(f"{name:<30} {row['ms']:>10.3f} ms  {row['input_bytes']:>10,} B in"
+              + (f"  {row['output_bytes']:>10,} B out" if "output_bytes" in row else f"  {row['parsed']:>5} parsed"))
+
+    if args.json:
+        write_results(args.json, "document_parser", vars(args), metrics, results)
+    return 0 if report_regressions(metrics, args.baseline, args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Load benchmark for /extract and /extract-batch against a local Bedrock stand-in.
+
+Runs the real application in process (``httpx`` over ASGI, lifespan included) with
+``FakeBedrockRuntime`` in place of ``bedrock-runtime``, so results measure the
+service's own overhead and scheduling (admission control, invoker, limiter,
+payload preparation, parsing) under a reproducible model latency. Every upload is
+unique, so the extraction cache and request coalescing do not short-circuit calls.
+
+Reports throughput and p50/p95/p99 latency per file type for ``/extract``, and per
+batch for ``/extract-batch``. Other settings (admission limits, concurrency, fast
+paths) come from the environment as usual.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_load [--types csv pdf png] [--requests 40] [--concurrency 8]
+        [--batch-requests 5 --batch-size 4] [--latency 0.5 --throttle-rate 0.05 --quota 0]
+        [--json out.json] [--baseline previous.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Benchmark defaults; anything already set in the environment wins
+os.environ.setdefault("EXTRACTION_CACHE_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FILE", "")
+os.environ.setdefault("BEDROCK_WARMUP_CONNECTIONS", "0")
+
+import httpx  # noqa: E402
+
+from benchmarks.fake_bedrock import FakeBedrockRuntime, install  # noqa: E402
+from benchmarks.results import latency_summary, report_regressions, write_results  # noqa: E402
+from benchmarks.samples import CONTENT_TYPES, FILE_TYPES, build_document  # noqa: E402
+
+API = "/api/v1/timesheet"
+
+
+async def run_requests(client: httpx.AsyncClient, jobs: List[Tuple], concurrency: int) -> Tuple[List[Dict], float]:
+    """Send ``jobs`` (endpoint, label, files) with at most ``concurrency`` in flight"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    samples: List[Dict] = []
+
+    async def worker():
+        while not queue.empty():
+            endpoint, label, files = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{API}/{endpoint}", files=files)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            samples.append({"label": label, "status": status, "ms": (time.perf_counter() - started) * 1000})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: List[Dict], wall_seconds: float) -> Dict:
+    by_label: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, int] = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample["status"])] += 1
+        if sample["status"] == 200:
+            by_label[sample["label"]].append(sample["ms"])
+    ok = sum(len(values) for values in by_label.values())
+    return {
+        "requests": len(samples),
+        "ok": ok,
+        "errors": len(samples) - ok,
+        "statuses": dict(statuses),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(ok / wall_seconds, 3) if wall_seconds else 0.0,
+        "latency": {label: latency_summary(values) for label, values in sorted(by_label.items())},
+    }
+
+
+def print_summary(title: str, summary: Dict) -> None:
+    print(f"\n{title}: {summary['ok']}/{summary['requests']} ok in {summary['wall_seconds']:.2f}s "
+          f"({summary['throughput_rps']:.2f} req/s), statuses {summary['statuses']}")
+    print(f"  {'label':<10} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for label, stats in summary["latency"].items():
+        print(f"  {label:<10} {stats['count']:>6} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} {stats['p99_ms']:>10.1f}")
+
+
+def flatten(prefix: str, summary: Dict) -> Dict[str, float]:
+    metrics = {f"{prefix}.throughput_rps": summary["throughput_rps"], f"{prefix}.errors": summary["errors"]}
+    for label, stats in summary["latency"].items():
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            metrics[f"{prefix}.{label}.{key}"] = stats[key]
+    return metrics
+
+
+async def run(args) -> Tuple[Dict, Dict[str, float]]:
+    import main
+    transport = httpx.ASGITransport(app=main.app)
+    documents = {
+        file_type: [build_document(file_type, args.employees, f"#{i}") for i in range(args.requests)]
+        for file_type in args.types
+    }
+
+    def upload(file_type: str, index: int, data: bytes, field: str = "file"):
+        return (field, (f"timesheet_{index}.{file_type}", data, CONTENT_TYPES[file_type]))
+
+    # Interleave file types so every type sees the same load
+    extract_jobs = [
+        ("extract", file_type, [upload(file_type, i, documents[file_type][i])])
+        for i in range(args.requests)
+        for file_type in args.types
+    ]
+    batch_jobs = []
+    for b in range(args.batch_requests):
+        files = []
+        for slot in range(args.batch_size):
+            file_type = args.types[(b * args.batch_size + slot) % len(args.types)]
+            files.append(upload(file_type, slot, build_document(file_type, args.employees, f"batch {b}/{slot}"), "files"))
+        batch_jobs.append(("extract-batch", "batch", files))
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            samples, wall = await run_requests(client, extract_jobs, args.concurrency)
+            results["extract"] = summarize(samples, wall)
+            if batch_jobs:
+                samples, wall = await run_requests(client, batch_jobs, args.batch_concurrency)
+                results["extract_batch"] = summarize(samples, wall)
+                results["extract_batch"]["files_per_sec"] = round(
+                    results["extract_batch"]["ok"] * args.batch_size / wall, 3
+                ) if wall else 0.0
+
+    metrics = flatten("extract", results["extract"])
+    if "extract_batch" in results:
+        metrics.update(flatten("extract_batch", results["extract_batch"]))
+        metrics["extract_batch.files_per_sec"] = results["extract_batch"]["files_per_sec"]
+    return results, metrics
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--types", nargs="+", default=["csv", "xlsx", "docx", "pdf", "png"], choices=FILE_TYPES)
+    parser.add_argument("--requests", type=int, default=20, help="/extract requests per file type")
+    parser.add_argument("--concurrency", type=int, default=8, help="/extract requests in flight")
+    parser.add_argument("--batch-requests", type=int, default=4, help="/extract-batch requests (0 to skip)")
+    parser.add_argument("--batch-size", type=int, default=4, help="Files per batch")
+    parser.add_argument("--batch-concurrency", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=20, help="Rows per document and employees per canned reply")
+    parser.add_argument("--latency", type=float, default=0.5, help="Model latency per call (seconds)")
+    parser.add_argument("--latency-per-kb", type=float, default=0.0, help="Extra model latency per KiB of document")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of model calls throttled")
+    parser.add_argument("--quota", type=int, default=0, help="Concurrent model calls before throttling (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs the baseline (fraction)")
+    args = parser.parse_args()
+
+    fake = install(FakeBedrockRuntime(
+        latency=args.latency,
+        latency_per_kb=args.latency_per_kb,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+        quota=args.quota,
+        employees=args.employees,
+        seed=args.seed,
+    ))
+    results, metrics = asyncio.run(run(args))
+    results["bedrock"] = fake.stats()
+
+    print_summary("/extract", results["extract"])
+    if "extract_batch" in results:
+        print_summary("/extract-batch", results["extract_batch"])
+        print(f"  {results['extract_batch']['files_per_sec']:.2f} files/s")
+    print(f"\nBedrock stand-in: {results['bedrock']}")
+
+    if args.json:
+        write_results(args.json, "load", vars(args), metrics, results)
+    return 0 if report_regressions(metrics, args.baseline, args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
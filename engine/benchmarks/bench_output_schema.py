@@ -0,0 +1,140 @@
+"""Benchmark the compact model output schema against the verbose one.
+
+For rosters of several sizes, runs extractions through ``LLMService`` against the
+local Bedrock stand-in with ``output_schema`` set to ``verbose`` and to ``compact``,
+and reports per schema:
+
+* output tokens of the reply (estimated by the stand-in at ~4 characters/token) and
+  whether it hit ``maxTokens`` (``EXTRACTION_MAX_TOKENS``)
+* end-to-end extraction latency, with model time modelled as ``--latency`` plus
+  ``--token-latency`` seconds per generated token (generation dominates real calls)
+* ``_parse_response`` time for the reply
+
+It also checks that both schemas decode to identical ``EmployeeTimesheet`` lists
+when neither reply was truncated, and exits non-zero if they differ.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_output_schema [--employees 10 50 100] [--runs 3]
+        [--latency 0.2 --token-latency 0.002] [--json out.json] [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("EXTRACTION_CACHE_ENABLED", "false")
+os.environ.setdefault("ENABLE_SPREADSHEET_FAST_PATH", "false")
+os.environ.setdefault("ENABLE_CHUNKED_EXTRACTION", "false")
+os.environ.setdefault("LOG_FILE", "")
+
+from loguru import logger
+
+logger.remove()
+
+from benchmarks.fake_bedrock import FakeBedrockRuntime, canned_reply, install  # noqa: E402
+from benchmarks.results import report_regressions, write_results  # noqa: E402
+from benchmarks.samples import build_document  # noqa: E402
+
+fake = install(FakeBedrockRuntime(jitter=0.0))
+
+from services.llm_service import LLMService  # noqa: E402
+from utils.output_schema import OUTPUT_SCHEMAS  # noqa: E402
+
+
+def best_of(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+
+async def measure(service: LLMService, employees: int, schema: str, args) -> Dict:
+    fake.default_replies = {name: canned_reply(employees, name) for name in OUTPUT_SCHEMAS}
+    fake.usages.clear()
+    latencies: List[float] = []
+    timesheets = []
+    for run in range(args.runs):
+        document = build_document("csv", employees, f"{schema} #{run}")
+        started = time.perf_counter()
+        timesheets = await service.extract_timesheet_from_bytes(document, "csv", output_schema=schema)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    output_tokens = fake.usages[-1]["outputTokens"]
+    reply = fake.default_replies[schema]
+    parse_seconds = best_of(lambda: service._parse_response(reply), args.repeat)
+    return {
+        "employees": employees,
+        "schema": schema,
+        "output_tokens": output_tokens,
+        "truncated": output_tokens >= service.settings.EXTRACTION_MAX_TOKENS,
+        "parsed": len(timesheets),
+        "e2e_ms": round(statistics.median(latencies), 1),
+        "parse_ms": round(parse_seconds * 1000, 3),
+        "timesheets": [t.model_dump() for t in timesheets],
+    }
+
+
+async def run(args) -> List[Dict]:
+    fake.latency = args.latency
+    fake.output_token_latency = args.token_latency
+    service = LLMService()
+    rows = []
+    for employees in args.employees:
+        for schema in OUTPUT_SCHEMAS:
+            rows.append(await measure(service, employees, schema, args))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, nargs="+", default=[10, 50, 100], help="Roster sizes")
+    parser.add_argument("--runs", type=int, default=3, help="Extractions per size and schema (median reported)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions for the parse timing (best reported)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fixed model latency per call (seconds)")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Model latency per output token (seconds)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs the baseline (fraction)")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    mismatches = 0
+    metrics: Dict[str, float] = {}
+    print(f"{'employees':>9} {'schema':<8} {'out tokens':>10} {'parsed':>7} {'e2e ms':>10} {'parse ms':>9}")
+    for row in rows:
+        print(f"{row['employees']:>9} {row['schema']:<8} {row['output_tokens']:>10,} {row['parsed']:>7} "
+              f"{row['e2e_ms']:>10.1f} {row['parse_ms']:>9.3f}" + ("  (hit maxTokens)" if row["truncated"] else ""))
+        for key in ("output_tokens", "e2e_ms", "parse_ms"):
+            metrics[f"{row['schema']}.{row['employees']}.{key}"] = row[key]
+
+    for employees in args.employees:
+        verbose, compact = (next(r for r in rows if r["employees"] == employees and r["schema"] == s) for s in OUTPUT_SCHEMAS)
+        # Per parsed employee, so a verbose reply cut off at maxTokens is still compared fairly
+        verbose_rate = verbose["output_tokens"] / max(1, verbose["parsed"])
+        compact_rate = compact["output_tokens"] / max(1, compact["parsed"])
+        print(f"  {employees} employees: {verbose_rate:.0f} -> {compact_rate:.0f} output tokens/employee "
+              f"({1 - compact_rate / max(verbose_rate, 1e-9):.0%} fewer), "
+              f"e2e {verbose['e2e_ms']:.0f} -> {compact['e2e_ms']:.0f} ms, "
+              f"{verbose['parsed']} -> {compact['parsed']} employees")
+        if not verbose["truncated"] and not compact["truncated"] and verbose["timesheets"] != compact["timesheets"]:
+            mismatches += 1
+            print(f"  ❌ {employees} employees: compact and verbose replies decode differently")
+    metrics["decode_mismatch_errors"] = mismatches
+
+    if args.json:
+        results = [{k: v for k, v in row.items() if k != "timesheets"} for row in rows]
+        write_results(args.json, "output_schema", vars(args), metrics, results)
+    regressions_ok = report_regressions(metrics, args.baseline, args.tolerance)
+    return 0 if regressions_ok and not mismatches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Micro-benchmark for LLMService._parse_response.
+
+Times parsing of synthetic model replies with 50..1600 employees in several shapes
+(clean JSON, prose-wrapped, truncated by maxTokens, and an adversarial reply with
+thousands of unclosed ``{`` before the payload) and checks that time per character
+stays flat as the reply grows, i.e. parsing is linear.
+
+The adversarial case is also run through the previous parser (whole-text
+``json.loads``, then ``scan_balanced`` and ``json.loads`` on each candidate). That
+scan resumes after each candidate, so it is linear too, but an unclosed ``{`` makes
+it consume the rest of the reply: it never reaches the payload and returns nothing.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_parse_response [--repeat 5] [--json out.json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from loguru import logger
+
+logger.remove()
+
+from services.llm_service import LLMService  # noqa: E402
+
+SIZES = [50, 100, 200, 400, 800, 1600]
+# Largest/smallest time-per-character ratio tolerated before calling it superlinear
+LINEARITY_TOLERANCE = 3.0
+
+
+def employee(i: int) -> dict:
+    return {
+        "client_id": f"EMP{i:04d}",
+        "client_name": f"Employee {i}",
+        "employee_name": None,
+        "period": None,
+        "week_start": "2025-10-20",
+        "week_end": "2025-10-26",
+        "week_hours": [{"day": d, "hours": 8.0} for d in ("Mon", "Tue", "Wed", "Thu", "Fri")]
+        + [{"day": "Sat", "hours": 0.0}, {"day": "Sun", "hours": 0.0}],
+        "total_hours": 40.0,
+    }
+
+
+def build_response(n: int, variant: str) -> str:
+    clean = json.dumps({"employees": [employee(i) for i in range(n)]})
+    if variant == "clean":
+        return clean
+    if variant == "prose":
+        return f"Here is the extracted data [as requested]:\n\n{clean}\n\nLet me know if {{anything}} is missing."
+    if variant == "truncated":
+        return clean[: int(len(clean) * 0.9)]
+    if variant == "adversarial":
+        # Stray opening braces, as in prose or a broken preamble, ahead of the real payload
+        return "{ " * (len(clean) // 10) + clean
+    raise ValueError(variant)
+
+
+def legacy_scan_balanced(src: str):
+    """The bracket scan _parse_response used before locate_json"""
+    results = []
+    n = len(src)
+    i = 0
+    while i < n:
+        if src[i] in '{[':
+            stack = [src[i]]
+            in_str = False
+            esc = False
+            j = i + 1
+            while j < n:
+                ch = src[j]
+                if in_str:
+                    if esc:
+                        esc = False
+                    elif ch == '\\':
+                        esc = True
+                    elif ch == '"':
+                        in_str = False
+                else:
+                    if ch == '"':
+                        in_str = True
+                    elif ch in '{[':
+                        stack.append(ch)
+                    elif ch in '}]':
+                        if not stack:
+                            break
+                        top = stack[-1]
+                        if (top == '{' and ch == '}') or (top == '[' and ch == ']'):
+                            stack.pop()
+                            if not stack:
+                                results.append(src[i:j + 1])
+                                break
+                        else:
+                            break
+                j += 1
+            i = j
+        i += 1
+    return results
+
+
+def legacy_parse(text: str):
+    """The previous _parse_response lookup: whole text, then every balanced candidate"""
+    for candidate in [text] + legacy_scan_balanced(text):
+        try:
+            return json.loads(candidate)
+        except Exception:
+            continue
+    return None
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    # Best of N: the least noisy estimate for a CPU-bound micro-benchmark
+    return min(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    service = LLMService()
+    results = []
+    failed = False
+
+    for variant in ("clean", "prose", "truncated", "adversarial"):
+        per_char = []
+        for n in SIZES:
+            text = build_response(n, variant)
+            seconds = timed(lambda: service._parse_response(text), args.repeat)
+            parsed = len(service._parse_response(text))
+            row = {
+                "variant": variant,
+                "employees": n,
+                "chars": len(text),
+                "parsed": parsed,
+                "ms": round(seconds * 1000, 3),
+                "ns_per_char": round(seconds * 1e9 / len(text), 2),
+            }
+            if variant == "adversarial":
+                legacy = timed(lambda: legacy_parse(text), args.repeat)
+                data = legacy_parse(text)
+                row["legacy_ms"] = round(legacy * 1000, 3)
+                row["legacy_found_payload"] = isinstance(data, dict) and isinstance(data.get("employees"), list)
+            per_char.append(row["ns_per_char"])
+            results.append(row)
+            print(
+                f"{variant:<12} n={n:<5} chars={len(text):<9} parsed={parsed:<5} "
+                f"{row['ms']:>10.3f} ms  {row['ns_per_char']:>8.2f} ns/char"
+                + (f"  (legacy {row['legacy_ms']:.1f} ms, payload {'found' if row['legacy_found_payload'] else 'missed'})"
+                   if "legacy_ms" in row else "")
+            )
+        ratio = max(per_char[-3:]) / max(min(per_char[:3]), 1e-9)
+        linear = ratio <= LINEARITY_TOLERANCE
+        failed = failed or not linear
+        print(f"  -> ns/char growth {ratio:.2f}x ({'linear' if linear else 'SUPERLINEAR'})\n")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"benchmark": "parse_response", "results": results}, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Benchmark for DocumentParser._convert_pdf_to_png: pdf2image vs in-process PyMuPDF.
+
+Builds synthetic timesheet PDFs with 1..50 pages and converts the first page with:
+
+* ``pdf2image``: the previous path, ``convert_from_path(dpi=300)`` (poppler renders
+  every page), keep ``images[0]``, 2x Lanczos upscale, PNG encode.
+* ``pymupdf``: the current path, render only page 0 in process at the DPI its content
+  needs, then apply the image policy.
+
+Each measurement runs in a fresh subprocess so peak memory (including poppler child
+processes) is attributable to one conversion. ``pdf2image`` rows are skipped when
+pdf2image or poppler is not installed.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_pdf_render [--pages 1 10 50] [--repeat 3] [--json out.json]
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ENGINE_DIR))
+
+LEGACY_DPI = 300
+LEGACY_SCALE_FACTOR = 2.0
+
+
+def build_pdf(path: str, pages: int) -> None:
+    import fitz
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"Weekly timesheet - page {page_number + 1}", fontsize=14)
+        for row in range(40):
+            y = 90 + row * 17
+            page.insert_text(
+                (72, y),
+                f"EMP{row:04d}  Employee {row:<3}  8.0  7.5  8.0  8.0  6.0  0.0  0.0   37.5",
+                fontsize=9,
+            )
+            page.draw_line((72, y + 4), (540, y + 4), width=0.3)
+    doc.save(path)
+    doc.close()
+
+
+def prepare_pdf2image():
+    from pdf2image import convert_from_path
+    from PIL import Image
+
+    def convert(pdf_path: str) -> dict:
+        images = convert_from_path(pdf_path, dpi=LEGACY_DPI, fmt="png")
+        img = images[0]
+        img = img.resize((int(img.width * LEGACY_SCALE_FACTOR), int(img.height * LEGACY_SCALE_FACTOR)), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+        return {"width": img.width, "height": img.height, "bytes": len(buffer.getvalue())}
+    return convert
+
+
+def prepare_pymupdf():
+    from loguru import logger
+    logger.remove()
+    from config import get_settings
+    from services.document_parser import _render_pdf_page_fitted
+    from utils.image_policy import ImagePolicy
+    policy = ImagePolicy.from_settings()
+    max_dpi = get_settings().PDF_TO_PNG_DPI
+
+    def convert(pdf_path: str) -> dict:
+        img, dpi = _render_pdf_page_fitted(pdf_path, 0, policy, max_dpi)
+        content, _, report = policy.apply_to_image(img)
+        width, height = report["output_size"]
+        return {"width": width, "height": height, "bytes": len(content), "dpi": dpi}
+    return convert
+
+
+VARIANTS = {"pdf2image": prepare_pdf2image, "pymupdf": prepare_pymupdf}
+
+
+def current_rss_kb() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def legacy_available() -> bool:
+    try:
+        import pdf2image  # noqa: F401
+    except ImportError:
+        return False
+    from shutil import which
+    return which("pdftoppm") is not None
+
+
+def run_child(variant: str, pdf_path: str) -> int:
+    """Convert once and print wall time and memory as JSON (runs in a subprocess).
+
+    Memory is the peak RSS growth over the post-import baseline, plus the peak RSS
+    of child processes (poppler), so import overhead does not skew the comparison.
+    """
+    convert = VARIANTS[variant]()
+    baseline = current_rss_kb()
+    started = time.perf_counter()
+    result = convert(pdf_path)
+    result["wall_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    # ru_maxrss is KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    result["peak_rss_mb"] = round((max(own, 0) + children) / 1024, 1)
+    print(json.dumps(result))
+    return 0
+
+
+def measure(variant: str, pdf_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pdf_render", "--child", variant, pdf_path],
+        cwd=ENGINE_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--child", nargs=2, metavar=("VARIANT", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(*args.child)
+
+    variants = ["pymupdf"]
+    if legacy_available():
+        variants.insert(0, "pdf2image")
+    else:
+        print("pdf2image/poppler not installed: skipping the pdf2image baseline\n")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp, f"timesheet-{pages}p.pdf")
+            build_pdf(pdf_path, pages)
+            for variant in variants:
+                runs = [measure(variant, pdf_path) for _ in range(args.repeat)]
+                best = min(runs, key=lambda r: r["wall_ms"])
+                row = {
+                    "variant": variant,
+                    "pages": pages,
+                    "wall_ms": best["wall_ms"],
+                    "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+                    "output": f"{best['width']}x{best['height']}",
+                    "output_bytes": best["bytes"],
+                }
+                results.append(row)
+                print(
+                    f"{variant:<10} pages={pages:<4} {row['wall_ms']:>9.1f} ms  "
+                    f"peak mem {row['peak_rss_mb']:>7.1f} MB  {row['output']:>11}  {row['output_bytes']:>10,} bytes"
+                )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"benchmark": "pdf_render", "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
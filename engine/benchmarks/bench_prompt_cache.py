@@ -0,0 +1,125 @@
+"""Check and measure Bedrock prompt caching of the static extraction prompt.
+
+Runs ``--calls`` extractions of distinct documents through ``LLMService`` against the
+local Bedrock stand-in, once with ``BEDROCK_PROMPT_CACHING`` on and once off, and:
+
+* verifies the request shape: the instructions are a ``system`` text block followed
+  by a ``cachePoint``, the system prefix is byte-identical on every call, the user
+  message carries only the document and a short instruction, and every request
+  passes the stand-in's Bedrock validation
+* reports input tokens billed per call and the cache read/write counts from ``usage``
+
+Exits non-zero when a shape check fails. ``--cache-min-tokens`` emulates the model's
+minimum cacheable prefix (e.g. 1024 for Claude Sonnet); below it nothing is cached.
+``--model-id`` must belong to a family with prompt caching, or no cache point is sent.
+The same request-shape checks run as unit tests in ``tests/test_prompt_cache.py``.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_prompt_cache [--calls 10] [--cache-min-tokens 0]
+        [--output-schema verbose|compact] [--model-id ID] [--json out.json] [--baseline previous.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("EXTRACTION_CACHE_ENABLED", "false")
+os.environ.setdefault("ENABLE_SPREADSHEET_FAST_PATH", "false")
+os.environ.setdefault("LOG_FILE", "")
+
+from loguru import logger
+
+logger.remove()
+
+from benchmarks.fake_bedrock import FakeBedrockRuntime, install, validate_request  # noqa: E402
+from benchmarks.results import report_regressions, write_results  # noqa: E402
+from benchmarks.samples import build_document  # noqa: E402
+
+fake = install(FakeBedrockRuntime(latency=0.0, jitter=0.0))
+
+from services.llm_service import CACHE_POINT, EXTRACTION_USER_PROMPT, SYSTEM_PROMPTS, LLMService  # noqa: E402
+
+
+def check_shape(requests: List[Dict], caching: bool, output_schema: str) -> List[str]:
+    problems = []
+    expected_system = [{"text": SYSTEM_PROMPTS[output_schema]}] + ([CACHE_POINT] if caching else [])
+    for index, request in enumerate(requests):
+        problems += [f"call {index}: {problem}" for problem in validate_request(request)]
+        if request.get("system") != expected_system:
+            problems.append(f"call {index}: system blocks are not the static prompt{' + cachePoint' if caching else ''}")
+        texts = [block["text"] for block in request["messages"][0]["content"] if "text" in block]
+        if texts != [EXTRACTION_USER_PROMPT]:
+            problems.append(f"call {index}: user message should carry only the short instruction")
+    return problems
+
+
+async def run_pass(service: LLMService, caching: bool, args) -> Dict:
+    service.settings.BEDROCK_PROMPT_CACHING = caching
+    fake.requests.clear()
+    fake.usages.clear()
+    for index in range(args.calls):
+        document = build_document(args.file_type, args.employees, f"caching={caching} #{index}")
+        await service.extract_timesheet_from_bytes(document, args.file_type, output_schema=args.output_schema)
+
+    usages = fake.usages
+    return {
+        "calls": len(usages),
+        "problems": check_shape(fake.requests, caching, args.output_schema),
+        "input_tokens_per_call": round(sum(u["inputTokens"] for u in usages) / max(1, len(usages)), 1),
+        "cache_read_tokens": sum(u["cacheReadInputTokens"] for u in usages),
+        "cache_write_tokens": sum(u["cacheWriteInputTokens"] for u in usages),
+        "cache_reads": sum(1 for u in usages if u["cacheReadInputTokens"]),
+        "cache_writes": sum(1 for u in usages if u["cacheWriteInputTokens"]),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--file-type", default="csv", choices=["csv", "txt", "html"])
+    parser.add_argument("--employees", type=int, default=20)
+    parser.add_argument("--cache-min-tokens", type=int, default=0)
+    parser.add_argument("--output-schema", default="verbose", choices=["verbose", "compact"])
+    parser.add_argument("--model-id", default="us.anthropic.claude-sonnet-4-20250514-v1:0", help="Bedrock model id to request")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs the baseline (fraction)")
+    args = parser.parse_args()
+
+    fake.cache_min_tokens = args.cache_min_tokens
+    service = LLMService()
+    service.settings.CLAUDE_MODEL_ID = args.model_id
+    results = {}
+    for caching in (True, False):
+        results["cached" if caching else "uncached"] = asyncio.run(run_pass(service, caching, args))
+
+    system_prompt = SYSTEM_PROMPTS[args.output_schema]
+    print(f"System prompt ({args.output_schema}): {len(system_prompt):,} chars (~{len(system_prompt) // 4} tokens), "
+          f"version {LLMService.PROMPT_VERSIONS[args.output_schema]}")
+    for name, row in results.items():
+        print(f"{name:<9} {row['calls']:>3} calls  {row['input_tokens_per_call']:>9.1f} input tokens/call  "
+              f"cache reads {row['cache_reads']} ({row['cache_read_tokens']:,} tokens), "
+              f"writes {row['cache_writes']} ({row['cache_write_tokens']:,} tokens)")
+    problems = results["cached"]["problems"] + results["uncached"]["problems"]
+    for problem in problems[:20]:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Request shape OK: static system prompt + cachePoint, short user instruction")
+
+    metrics = {
+        "cached.input_tokens_per_call": results["cached"]["input_tokens_per_call"],
+        "uncached.input_tokens_per_call": results["uncached"]["input_tokens_per_call"],
+        "shape_errors": len(problems),
+    }
+    if args.json:
+        write_results(args.json, "prompt_cache", vars(args), metrics, results)
+    regressions_ok = report_regressions(metrics, args.baseline, args.tolerance)
+    return 0 if regressions_ok and not problems else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
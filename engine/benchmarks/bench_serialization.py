@@ -0,0 +1,166 @@
+"""Benchmark validation and JSON serialization of large extraction responses.
+
+Builds a response with ``--employees`` employee rows (seven ``DailyHours`` each) and
+times, best-of-N:
+
+* validating the decoded rows: one ``EmployeeTimesheet(**row)`` per entry against a
+  single call of the cached list ``TypeAdapter`` (``get_employee_list_adapter``)
+* rendering through FastAPI, in process over ASGI, for ``/extract`` (one
+  ``TimesheetResponse``), ``/extract-batch`` (``--batch`` responses sharing the rows)
+  and ``GET /jobs/{id}`` (stored result dicts):
+
+  - ``legacy``: an app with ``default_response_class=JSONResponse``, which makes
+    FastAPI dump the model to a dict and then run ``json.dumps``; job status is
+    rebuilt as a ``JobStatusResponse`` on every poll
+  - ``current``: FastAPI's default response class, which serializes models straight
+    to bytes with pydantic-core; job status is rendered as stored by
+    ``FastJSONResponse`` (orjson when installed)
+
+Both variants must return identical JSON; the run exits non-zero if they differ.
+
+Usage (from the engine directory):
+    python -m benchmarks.bench_serialization [--employees 1000] [--batch 10] [--repeat 20]
+        [--json out.json] [--baseline previous.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from benchmarks.results import report_regressions, write_results  # noqa: E402
+from models import EmployeeTimesheet, JobStatusResponse, TimesheetResponse, get_employee_list_adapter  # noqa: E402
+from utils.output_schema import DAYS  # noqa: E402
+from utils.responses import ORJSON_AVAILABLE, FastJSONResponse  # noqa: E402
+
+
+def employee_rows(employees: int) -> List[Dict]:
+    return [
+        {
+            "client_id": f"EMP{index:05d}",
+            "client_name": f"Employee {index}",
+            "employee_name": None,
+            "week_hours": [{"day": day, "hours": 8.0 if day not in ("Sat", "Sun") else 0.0} for day in DAYS],
+            "total_hours": 40.0,
+            "period": "2025-10-06 to 2025-10-12",
+            "week_start": "2025-10-06",
+            "week_end": "2025-10-12",
+        }
+        for index in range(employees)
+    ]
+
+
+def build_response(timesheets: List[EmployeeTimesheet]) -> TimesheetResponse:
+    return TimesheetResponse(
+        message=f"Successfully extracted {len(timesheets)} employee timesheet(s)",
+        data=timesheets,
+        metadata={"filename": "timesheet.csv", "file_type": "csv", "employees_count": len(timesheets)},
+    )
+
+
+def build_apps(response: TimesheetResponse, batch: int) -> Dict[str, FastAPI]:
+    """One app per variant, serving the same prebuilt content"""
+    responses = [response] * batch
+    now = datetime.now(timezone.utc)
+    job = {
+        "job_id": "bench",
+        "status": "completed",
+        "files_count": batch,
+        "completed_count": batch,
+        "created_at": now,
+        "started_at": now,
+        "finished_at": now,
+        "results": [response.model_dump(mode="json")] * batch,
+    }
+
+    legacy = FastAPI(default_response_class=JSONResponse)
+    current = FastAPI()
+    for app in (legacy, current):
+        app.get("/extract", response_model=TimesheetResponse)(lambda: response)
+        app.get("/extract-batch", response_model=List[TimesheetResponse])(lambda: responses)
+    legacy.get("/job", response_model=JobStatusResponse)(lambda: JobStatusResponse(**job))
+    current.get("/job", response_model=JobStatusResponse)(lambda: FastJSONResponse(job))
+    return {"legacy": legacy, "current": current}
+
+
+def best_of(fn: Callable, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+
+async def time_requests(app: FastAPI, path: str, repeat: int) -> Dict:
+    samples = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        body = b""
+        for _ in range(repeat):
+            started = time.perf_counter()
+            reply = await client.get(path)
+            samples.append(time.perf_counter() - started)
+            reply.raise_for_status()
+            body = reply.content
+    return {"ms": round(min(samples) * 1000, 3), "bytes": len(body), "body": json.loads(body)}
+
+
+async def run(args) -> Dict[str, Dict]:
+    rows = employee_rows(args.employees)
+    adapter = get_employee_list_adapter()
+    results: Dict[str, Dict] = {
+        "validate.per_entry": {"ms": round(best_of(lambda: [EmployeeTimesheet(**row) for row in rows], args.repeat) * 1000, 3)},
+        "validate.type_adapter": {"ms": round(best_of(lambda: adapter.validate_python(rows), args.repeat) * 1000, 3)},
+    }
+
+    apps = build_apps(build_response(adapter.validate_python(rows)), args.batch)
+    for route in ("extract", "extract-batch", "job"):
+        for variant, app in apps.items():
+            results[f"{route}.{variant}"] = await time_requests(app, f"/{route}", args.repeat)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=1000, help="Employee rows per response")
+    parser.add_argument("--batch", type=int, default=10, help="Responses per batch and results per job")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions per measurement (best reported)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs the baseline (fraction)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{args.employees} employees per response, batch/job of {args.batch}, orjson {'on' if ORJSON_AVAILABLE else 'off'}")
+    metrics: Dict[str, float] = {}
+    for name, row in results.items():
+        metrics[f"{name}.ms"] = row["ms"]
+        print(f"{name:<28} {row['ms']:>10.3f} ms" + (f"  {row['bytes']:>12,} B" if "bytes" in row else ""))
+
+    mismatches = 0
+    for route in ("validate", "extract", "extract-batch", "job"):
+        before, after = (results[name] for name in results if name.startswith(f"{route}."))
+        print(f"  {route}: {before['ms']:.1f} -> {after['ms']:.1f} ms ({before['ms'] / max(after['ms'], 1e-9):.1f}x)")
+        if "body" in before and before["body"] != after["body"]:
+            mismatches += 1
+            print(f"  ❌ {route}: legacy and current responses differ")
+    metrics["response_mismatch_errors"] = mismatches
+
+    if args.json:
+        stored = {name: {k: v for k, v in row.items() if k != "body"} for name, row in results.items()}
+        write_results(args.json, "serialization", vars(args), metrics, stored)
+    regressions_ok = report_regressions(metrics, args.baseline, args.tolerance)
+    return 0 if regressions_ok and not mismatches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
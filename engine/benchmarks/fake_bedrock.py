@@ -0,0 +1,321 @@
+"""Local stand-in for the ``bedrock-runtime`` client used by the benchmarks.
+
+``FakeBedrockRuntime`` implements ``converse`` and ``converse_stream`` with the same
+request/response shapes as boto3, so the whole pipeline (invoker, limiter, payload
+preparation, parsing) runs unchanged while the model itself costs a configurable,
+reproducible amount of time:
+
+* latency: ``latency`` seconds per call plus ``latency_per_kb`` per KiB of document
+  and ``output_token_latency`` per generated token, with +/- ``jitter`` (fraction)
+  drawn from a seeded RNG
+* throttling: a ``ThrottlingException`` ClientError for a ``throttle_rate`` fraction of
+  calls, and for every call beyond ``quota`` concurrent calls (0 = unlimited)
+* canned responses: a JSON reply with ``employees`` employees in the output schema the
+  system prompt asks for, or ``responses`` keyed by document/image format (a string, or
+  a callable receiving the request kwargs). Replies longer than ``maxTokens`` are cut
+  off with ``stopReason: max_tokens``, as the model would
+* prompt caching: the ``system`` prefix up to a ``cachePoint`` is "cached" on first
+  use, so ``usage`` reports ``cacheWriteInputTokens`` and then ``cacheReadInputTokens``.
+  With ``prompt_caching=False`` a ``cachePoint`` is rejected with a
+  ``ValidationException``, like a model without prompt caching
+* request validation: malformed requests (see ``validate_request``) raise a
+  ``ValidationException`` ClientError, as Bedrock would
+
+Install it with ``install()`` before importing ``main`` so every service shares it.
+"""
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+from botocore.exceptions import ClientError
+
+DOCUMENT_FORMATS = {"pdf", "csv", "doc", "docx", "xls", "xlsx", "html", "txt", "md"}
+IMAGE_FORMATS = {"png", "jpeg", "gif", "webp"}
+CONTENT_BLOCK_TYPES = {"text", "image", "document", "cachePoint"}
+INFERENCE_CONFIG_KEYS = {"maxTokens", "temperature", "topP", "stopSequences"}
+
+Response = Union[str, Callable[[Dict[str, Any]], str]]
+
+
+def canned_reply(employees: int = 3, output_schema: str = "verbose") -> str:
+    """A model reply in the shape the extraction prompt for ``output_schema`` asks for"""
+    days = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+    hours = [8.0, 8.0, 8.0, 8.0, 8.0, 0.0, 0.0]
+    if output_schema == "compact":
+        # Positional hours, no nulls, no indentation
+        return json.dumps({
+            "employees": [
+                {"id": f"EMP{i:04d}", "name": f"Employee {i}", "start": "2025-10-20", "end": "2025-10-26", "h": hours, "total": 40.0}
+                for i in range(employees)
+            ]
+        }, separators=(",", ":"))
+    # The verbose prompt shows an indented example, which the model mirrors
+    return json.dumps({
+        "employees": [
+            {
+                "client_id": f"EMP{i:04d}",
+                "client_name": f"Employee {i}",
+                "employee_name": None,
+                "period": None,
+                "week_start": "2025-10-20",
+                "week_end": "2025-10-26",
+                "week_hours": [{"day": day, "hours": h} for day, h in zip(days, hours)],
+                "total_hours": 40.0,
+            }
+            for i in range(employees)
+        ]
+    }, indent=2)
+
+
+def _client_error(operation: str, code: str, message: str, status: int) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}, "ResponseMetadata": {"HTTPStatusCode": status}}, operation)
+
+
+def validate_request(kwargs: Dict[str, Any]) -> List[str]:
+    """
+    Check a converse request against the rules Bedrock enforces
+
+    Returns:
+        One message per problem; empty when the request is well formed
+    """
+    problems = []
+    if not kwargs.get("modelId"):
+        problems.append("modelId is required")
+    messages = kwargs.get("messages") or []
+    if not messages or messages[0].get("role") != "user":
+        problems.append("messages must start with a user message")
+    for index, message in enumerate(messages):
+        if index and message.get("role") == messages[index - 1].get("role"):
+            problems.append(f"messages[{index}]: roles must alternate")
+        content = message.get("content") or []
+        if not content:
+            problems.append(f"messages[{index}]: content is empty")
+        for block in content:
+            if len(block) != 1 or not set(block) <= CONTENT_BLOCK_TYPES:
+                problems.append(f"messages[{index}]: invalid content block {sorted(block)}")
+            elif "document" in block:
+                document = block["document"]
+                if document.get("format") not in DOCUMENT_FORMATS or not document.get("name"):
+                    problems.append(f"messages[{index}]: document needs a supported format and a name")
+                if not any("text" in other for other in content):
+                    problems.append(f"messages[{index}]: a document block must be accompanied by a text block")
+            elif "image" in block and block["image"].get("format") not in IMAGE_FORMATS:
+                problems.append(f"messages[{index}]: unsupported image format {block['image'].get('format')}")
+    system = kwargs.get("system") or []
+    for index, block in enumerate(system):
+        if set(block) not in ({"text"}, {"cachePoint"}):
+            problems.append(f"system[{index}]: must be a text or cachePoint block")
+        elif "cachePoint" in block and (index == 0 or "text" not in system[index - 1]):
+            problems.append(f"system[{index}]: a cachePoint must follow a text block")
+        elif "cachePoint" in block and block["cachePoint"] != {"type": "default"}:
+            problems.append(f"system[{index}]: cachePoint type must be 'default'")
+    unknown = set(kwargs.get("inferenceConfig") or {}) - INFERENCE_CONFIG_KEYS
+    if unknown:
+        problems.append(f"inferenceConfig: unknown keys {sorted(unknown)}")
+    return problems
+
+
+class FakeBedrockRuntime:
+    """Thread-safe ``bedrock-runtime`` double with latency, throttling and canned replies"""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        latency_per_kb: float = 0.0,
+        output_token_latency: float = 0.0,
+        jitter: float = 0.2,
+        throttle_rate: float = 0.0,
+        quota: int = 0,
+        employees: int = 3,
+        responses: Optional[Dict[str, Response]] = None,
+        stream_chunk_chars: int = 64,
+        cache_min_tokens: int = 0,
+        prompt_caching: bool = True,
+        validate: bool = True,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.latency_per_kb = latency_per_kb
+        self.output_token_latency = output_token_latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.quota = quota
+        self.default_replies = {schema: canned_reply(employees, schema) for schema in ("verbose", "compact")}
+        self.responses = responses or {}
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.cache_min_tokens = cache_min_tokens
+        self.prompt_caching = prompt_caching
+        self.validate = validate
+        self._prompt_cache = set()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+        self.peak_concurrency = 0
+        self.calls = 0
+        self.throttled = 0
+        self.cache_reads = 0
+        self.cache_writes = 0
+        self.requests: List[Dict[str, Any]] = []
+        self.usages: List[Dict[str, int]] = []
+
+    # -- boto3 surface -------------------------------------------------------
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        text, latency, usage, stop_reason = self._begin("Converse", kwargs)
+        try:
+            time.sleep(latency)
+        finally:
+            self._end()
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": stop_reason,
+            "usage": usage,
+            "metrics": {"latencyMs": int(latency * 1000)},
+        }
+
+    def converse_stream(self, **kwargs) -> Dict[str, Any]:
+        text, latency, usage, stop_reason = self._begin("ConverseStream", kwargs)
+        chunks = [text[i:i + self.stream_chunk_chars] for i in range(0, len(text), self.stream_chunk_chars)] or [""]
+
+        def events():
+            try:
+                yield {"messageStart": {"role": "assistant"}}
+                for chunk in chunks:
+                    time.sleep(latency / len(chunks))
+                    yield {"contentBlockDelta": {"delta": {"text": chunk}, "contentBlockIndex": 0}}
+                yield {"contentBlockStop": {"contentBlockIndex": 0}}
+                yield {"messageStop": {"stopReason": stop_reason}}
+                yield {"metadata": {"usage": usage, "metrics": {"latencyMs": int(latency * 1000)}}}
+            finally:
+                self._end()
+
+        return {"stream": events()}
+
+    # -- helpers -------------------------------------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "peak_concurrency": self.peak_concurrency,
+                "cache_reads": self.cache_reads,
+                "cache_writes": self.cache_writes,
+            }
+
+    def _begin(self, operation: str, kwargs: Dict[str, Any]):
+        problems = validate_request(kwargs) if self.validate else []
+        if not self.prompt_caching and any("cachePoint" in block for block in kwargs.get("system") or []):
+            problems.append("This model doesn't support prompt caching")
+        if problems:
+            raise _client_error(operation, "ValidationException", "; ".join(problems), 400)
+        with self._lock:
+            self.calls += 1
+            self.requests.append(kwargs)
+            throttle = (self.quota and self._active >= self.quota) or (
+                self.throttle_rate and self._random.random() < self.throttle_rate
+            )
+            if throttle:
+                self.throttled += 1
+                raise _client_error(operation, "ThrottlingException", "Too many requests, please wait before trying again.", 429)
+            self._active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+            spread = self._random.uniform(-self.jitter, self.jitter)
+            cached_tokens, cache_hit = self._use_prompt_cache(kwargs)
+        text, stop_reason = self._reply(kwargs)
+        usage = self._usage(kwargs, text, cached_tokens, cache_hit)
+        size_kb = _content_bytes(kwargs) / 1024
+        latency = self.latency + self.latency_per_kb * size_kb + self.output_token_latency * usage["outputTokens"]
+        latency = max(0.0, latency * (1 + spread))
+        with self._lock:
+            self.usages.append(usage)
+        return text, latency, usage, stop_reason
+
+    def _use_prompt_cache(self, kwargs: Dict[str, Any]):
+        """Tokens of the system prefix up to its last cachePoint, and whether it was already cached"""
+        system = kwargs.get("system") or []
+        points = [index for index, block in enumerate(system) if "cachePoint" in block]
+        if not points:
+            return 0, False
+        prefix = [block for block in system[:points[-1]] if "text" in block]
+        tokens = sum(len(block["text"]) for block in prefix) // 4
+        if tokens < self.cache_min_tokens:
+            return 0, False
+        key = (kwargs.get("modelId"), json.dumps(prefix, sort_keys=True))
+        hit = key in self._prompt_cache
+        self._prompt_cache.add(key)
+        if hit:
+            self.cache_reads += 1
+        else:
+            self.cache_writes += 1
+        return tokens, hit
+
+    def _end(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def _reply(self, kwargs: Dict[str, Any]):
+        """The reply text and stop reason, cut off at ``maxTokens``"""
+        response = self.responses.get(_content_format(kwargs))
+        if response is None:
+            text = self.default_replies[_requested_schema(kwargs)]
+        else:
+            text = response(kwargs) if callable(response) else response
+        max_tokens = (kwargs.get("inferenceConfig") or {}).get("maxTokens")
+        if max_tokens and len(text) // 4 > max_tokens:
+            return text[:max_tokens * 4], "max_tokens"
+        return text, "end_turn"
+
+    @staticmethod
+    def _usage(kwargs: Dict[str, Any], text: str, cached_tokens: int = 0, cache_hit: bool = False) -> Dict[str, int]:
+        # Roughly four characters (or bytes) per token; cached prefix tokens are not billed as input
+        input_tokens = max(0, (_content_bytes(kwargs) + _text_chars(kwargs)) // 4 - cached_tokens)
+        output_tokens = len(text) // 4
+        return {
+            "inputTokens": input_tokens,
+            "outputTokens": output_tokens,
+            "totalTokens": input_tokens + output_tokens + cached_tokens,
+            "cacheReadInputTokens": cached_tokens if cache_hit else 0,
+            "cacheWriteInputTokens": 0 if cache_hit else cached_tokens,
+        }
+
+
+def _content_blocks(kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [block for message in kwargs.get("messages", []) for block in message.get("content", [])]
+
+
+def _content_format(kwargs: Dict[str, Any]) -> str:
+    for block in _content_blocks(kwargs):
+        for kind in ("document", "image"):
+            if kind in block:
+                return block[kind].get("format", "")
+    return ""
+
+
+def _requested_schema(kwargs: Dict[str, Any]) -> str:
+    """``compact`` when the system prompt asks for the positional ``h`` hours array"""
+    system = "".join(block.get("text", "") for block in kwargs.get("system") or [])
+    return "compact" if '"h":[' in system else "verbose"
+
+
+def _content_bytes(kwargs: Dict[str, Any]) -> int:
+    total = 0
+    for block in _content_blocks(kwargs):
+        for kind in ("document", "image"):
+            if kind in block:
+                total += len(block[kind].get("source", {}).get("bytes", b""))
+    return total
+
+
+def _text_chars(kwargs: Dict[str, Any]) -> int:
+    system = sum(len(block.get("text", "")) for block in kwargs.get("system", []))
+    return system + sum(len(block.get("text", "")) for block in _content_blocks(kwargs))
+
+
+def install(fake: FakeBedrockRuntime) -> FakeBedrockRuntime:
+    """Make ``get_bedrock_client()`` return ``fake``; call before importing ``main``"""
+    from services import bedrock_client
+    bedrock_client.build_bedrock_client = lambda settings=None: fake
+    bedrock_client.get_bedrock_client.cache_clear()
+    return fake
@@ -0,0 +1,102 @@
+"""Shared result handling for the benchmarks: percentiles, JSON output and regression checks.
+
+Each benchmark reports a flat ``metrics`` dict (``name -> value``). A metric whose
+name ends in ``_rps`` or ``_per_sec`` is higher-is-better; everything else
+(latencies, sizes) is lower-is-better. ``check_regressions`` compares a run with a
+previous results file and flags every metric that got worse by more than the
+tolerance, so a change to the pipeline can be judged offline::
+
+    python -m benchmarks.bench_load --json before.json
+    # ... change the code ...
+    python -m benchmarks.bench_load --json after.json --baseline before.json
+"""
+import json
+import math
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+HIGHER_IS_BETTER_SUFFIXES = ("_rps", "_per_sec")
+# Latencies below this are too noisy to compare by ratio
+MIN_COMPARABLE_MS = 1.0
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(samples_ms: Sequence[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3) if samples_ms else 0.0,
+    }
+
+
+def higher_is_better(name: str) -> bool:
+    return name.endswith(HIGHER_IS_BETTER_SUFFIXES)
+
+
+def check_regressions(metrics: Dict[str, float], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Compare ``metrics`` with the metrics stored in a previous results file
+
+    Returns:
+        One message per metric that regressed by more than ``tolerance`` (a fraction)
+    """
+    baseline = json.loads(Path(baseline_path).read_text()).get("metrics", {})
+    regressions = []
+    for name, value in metrics.items():
+        before = baseline.get(name)
+        if not isinstance(before, (int, float)) or not isinstance(value, (int, float)):
+            continue
+        if before <= 0:
+            # Ratios are meaningless from zero; only new errors count as a regression
+            if name.endswith("errors") and value > 0:
+                regressions.append(f"{name}: {before:g} -> {value:g}")
+            continue
+        if higher_is_better(name):
+            worse = value < before * (1 - tolerance)
+        else:
+            if name.endswith("_ms") and max(before, value) < MIN_COMPARABLE_MS:
+                continue
+            worse = value > before * (1 + tolerance)
+        if worse:
+            regressions.append(f"{name}: {before:g} -> {value:g} ({(value - before) / before:+.0%})")
+    return regressions
+
+
+def write_results(path: str, benchmark: str, config: Dict[str, Any], metrics: Dict[str, float], results: Any) -> None:
+    document = {
+        "benchmark": benchmark,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": config,
+        "metrics": metrics,
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(document, indent=2))
+
+
+def report_regressions(metrics: Dict[str, float], baseline: Optional[str], tolerance: float) -> bool:
+    """Print the comparison with ``baseline`` (if given); True when nothing regressed"""
+    if not baseline:
+        return True
+    regressions = check_regressions(metrics, baseline, tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {tolerance:.0%} vs {baseline}:")
+        for message in regressions:
+            print(f"   {message}")
+        return False
+    print(f"\n✅ No metric regressed by more than {tolerance:.0%} vs {baseline}")
+    return True
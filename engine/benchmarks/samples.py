@@ -0,0 +1,122 @@
+"""Synthetic timesheet documents for the benchmarks.
+
+``build_document(file_type, employees, tag)`` returns the bytes of a weekly
+timesheet with ``employees`` rows. ``tag`` is written into the document so each
+upload can be made unique (and so miss the extraction cache and request
+coalescing) without changing its size meaningfully.
+"""
+import io
+from typing import List
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+FILE_TYPES = ["csv", "xlsx", "docx", "html", "txt", "pdf", "png"]
+
+
+def rows(employees: int) -> List[List[str]]:
+    header = ["Employee ID", "Name", *DAYS, "Total"]
+    body = [
+        [f"EMP{i:04d}", f"Employee {i}", "8", "7.5", "8", "8", "6", "0", "0", "37.5"]
+        for i in range(employees)
+    ]
+    return [header, *body]
+
+
+def _title(tag: str) -> str:
+    return f"Weekly timesheet 2025-10-20 to 2025-10-26 {tag}".strip()
+
+
+def _text_lines(employees: int, tag: str) -> List[str]:
+    return [_title(tag), ""] + ["  ".join(f"{cell:<12}" for cell in row).rstrip() for row in rows(employees)]
+
+
+def build_csv(employees: int, tag: str = "") -> bytes:
+    lines = [f"# {_title(tag)}"] + [",".join(row) for row in rows(employees)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def build_xlsx(employees: int, tag: str = "") -> bytes:
+    import openpyxl
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append([_title(tag)])
+    for row in rows(employees):
+        sheet.append([float(cell) if cell.replace(".", "", 1).isdigit() else cell for cell in row])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def build_docx(employees: int, tag: str = "") -> bytes:
+    from docx import Document
+    document = Document()
+    document.add_paragraph(_title(tag))
+    data = rows(employees)
+    table = document.add_table(rows=len(data), cols=len(data[0]))
+    for r, row in enumerate(data):
+        for c, cell in enumerate(row):
+            table.cell(r, c).text = cell
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def build_html(employees: int, tag: str = "") -> bytes:
+    data = rows(employees)
+    head = "".join(f"<th>{cell}</th>" for cell in data[0])
+    body = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in data[1:])
+    return f"<html><body><h1>{_title(tag)}</h1><table><tr>{head}</tr>{body}</table></body></html>".encode("utf-8")
+
+
+def build_txt(employees: int, tag: str = "") -> bytes:
+    return ("\n".join(_text_lines(employees, tag)) + "\n").encode("utf-8")
+
+
+def build_pdf(employees: int, tag: str = "") -> bytes:
+    import fitz
+    document = fitz.open()
+    lines = _text_lines(employees, tag)
+    per_page = 45
+    for start in range(0, len(lines), per_page):
+        page = document.new_page()
+        for offset, line in enumerate(lines[start:start + per_page]):
+            page.insert_text((40, 50 + offset * 16), line, fontsize=8)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def build_png(employees: int, tag: str = "") -> bytes:
+    from PIL import Image, ImageDraw
+    lines = _text_lines(employees, tag)
+    image = Image.new("RGB", (1700, 80 + 26 * len(lines)), "white")
+    draw = ImageDraw.Draw(image)
+    for offset, line in enumerate(lines):
+        draw.text((40, 40 + offset * 26), line, fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+BUILDERS = {
+    "csv": build_csv,
+    "xlsx": build_xlsx,
+    "docx": build_docx,
+    "html": build_html,
+    "txt": build_txt,
+    "pdf": build_pdf,
+    "png": build_png,
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "html": "text/html",
+    "txt": "text/plain",
+    "pdf": "application/pdf",
+    "png": "image/png",
+}
+
+
+def build_document(file_type: str, employees: int, tag: str = "") -> bytes:
+    return BUILDERS[file_type](employees, tag)
@@ -23,23 +23,78 @@ class Settings(BaseSettings):
     
     # File Upload
     MAX_FILE_SIZE_MB: int = 10
+    UPLOAD_CHUNK_SIZE_KB: int = 256  # Uploads are streamed to disk in chunks of this size
+    IN_MEMORY_UPLOAD_MAX_MB: int = 5  # Uploads up to this size skip the temp file entirely
     ALLOWED_EXTENSIONS: str = "png,jpg,jpeg,pdf,csv,docx,xlsx,xls,doc,html,htm,txt,md,gif,webp"
     
+    # Convert recognised CSV/XLSX/XLS exports directly, without a model call
+    ENABLE_SPREADSHEET_FAST_PATH: bool = True
+    
+    # Send xlsx/xls/docx/html as compact TSV or markdown text instead of rasterising them
+    TABLE_SERIALIZATION_ENABLED: bool = True
+    TABLE_SERIALIZATION_FORMAT: str = "tsv"  # Options: tsv, markdown
+    
+    # Chunked extraction: oversized documents are split and extracted in parallel (0 disables a split)
+    ENABLE_CHUNKED_EXTRACTION: bool = True
+    CHUNK_MAX_ROWS: int = 30  # Table rows per chunk (about one employee per row in rosters)
+    CHUNK_MAX_PAGES: int = 4  # PDF pages per chunk
+    CHUNK_CONCURRENCY: int = 4  # Chunks of one document extracted at once
+    EXTRACTION_MAX_TOKENS: int = 4096  # maxTokens per extraction call
+    BEDROCK_PROMPT_CACHING: bool = False  # Cache the static system prompt (cachePoint) on model families that support it
+    EXTRACTION_OUTPUT_SCHEMA: str = "verbose"  # Default model output schema: verbose or compact (positional hours, no nulls)
+    ENABLE_REQUEST_COALESCING: bool = True  # Concurrent uploads of the same bytes share one extraction
+    
+    # Batch extraction
+    BATCH_MAX_FILES: int = 50
+    BATCH_CONCURRENCY_PER_REQUEST: int = 4  # Files of one batch processed in parallel
+    BATCH_GLOBAL_CONCURRENCY: int = 16  # Batch files processed in parallel across all requests
+    
+    # Asynchronous extraction jobs (empty JOBS_DB_PATH keeps jobs in memory only)
+    JOBS_WORKER_COUNT: int = 4
+    JOBS_DB_PATH: str = ""
+    JOBS_RETENTION_SECONDS: int = 24 * 3600
+    
     # Image Processing and Upscaling
     ENABLE_IMAGE_UPSCALING: bool = True
     UPSCALING_METHOD: str = "lanczos"  # Options: lanczos, cubic, linear, bicubic, bilinear
-    UPSCALING_SCALE_FACTOR: float = 2.0
+    UPSCALING_SCALE_FACTOR: float = 2.0  # Maximum upscale applied to small images
     PDF_TO_PNG_DPI: int = 300
+    # Adaptive image policy: resize towards the model's optimal input size and fit a byte budget
+    IMAGE_POLICY_ENABLED: bool = True
+    IMAGE_TARGET_LONG_EDGE: int = 1568  # Larger images are downscaled
+    IMAGE_MAX_MEGAPIXELS: float = 1.15
+    IMAGE_MIN_LONG_EDGE: int = 1000  # Smaller images are upscaled (if ENABLE_IMAGE_UPSCALING)
+    IMAGE_GRAYSCALE: bool = False
+    IMAGE_MAX_KB: int = 1024  # Images are re-encoded (PNG, then JPEG) to fit this size
+    PDF_RENDER_WORKERS: int = 0  # Processes for parallel PDF page rendering (0 = min(4, CPU count))
+    PAGE_ANALYSIS_CONCURRENCY: int = 4  # PDF pages analyzed by the model at once
     
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:8000"
     
     # Logging
     LOG_LEVEL: str = "INFO"
-    LOG_FILE: str = "app.log"
+    LOG_FILE: str = "app.log"  # Empty disables the file sink
+    LOG_FORMAT: str = "text"  # Options: text, json (one JSON object per record)
+    LOG_ENQUEUE: bool = True  # Write logs from a background thread instead of the request path
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.0  # Fraction of model responses logged at INFO (otherwise DEBUG only)
+    LOG_PAYLOAD_MAX_CHARS: int = 2000  # Logged payloads are truncated to this length (0 = no limit)
     
-    # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 30
+    # Prometheus metrics at /metrics (requires prometheus_client)
+    METRICS_ENABLED: bool = True
+    
+    # Request tracing: export OTLP/JSON spans to a JSON-lines file and/or an OTLP HTTP collector
+    TRACE_EXPORT_FILE: str = ""  # e.g. traces.jsonl
+    TRACE_EXPORT_ENDPOINT: str = ""  # e.g. http://localhost:4318/v1/traces
+    TRACE_SERVICE_NAME: str = "timesheet-engine"
+    
+    # Rate Limiting and admission control for extraction requests (0 disables a limit)
+    RATE_LIMIT_PER_MINUTE: int = 30  # Per-client token bucket refill rate
+    RATE_LIMIT_BURST: int = 0  # Bucket size (0 = RATE_LIMIT_PER_MINUTE)
+    RATE_LIMIT_CLIENT_HEADER: str = ""  # Header identifying the client (e.g. X-Tenant-Id); empty = client IP
+    MAX_CONCURRENT_EXTRACTIONS: int = 16  # Extraction requests processed at once
+    ADMISSION_QUEUE_SIZE: int = 32  # Requests allowed to wait for a slot
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 15.0  # Longest wait for a slot before a 429
     
     # AWS Bedrock / Claude (optional)
     # BEDROCK_CLAUDE_API_KEY should be set to credentials or an API key used by your Bedrock setup
@@ -54,6 +109,33 @@ class Settings(BaseSettings):
     AWS_REGION: str = "us-east-1"
     # Specific Claude model id for boto3 converse usage
     CLAUDE_MODEL_ID: str | None = None
+    # Maximum number of Bedrock calls in flight per process (size of the invoker thread pool)
+    BEDROCK_MAX_CONCURRENCY: int = 32
+    # Shared bedrock-runtime client (connection pool, timeouts, retries, warm-up)
+    BEDROCK_MAX_POOL_CONNECTIONS: int = 0  # 0 = BEDROCK_MAX_CONCURRENCY
+    BEDROCK_CONNECT_TIMEOUT: float = 5.0
+    BEDROCK_READ_TIMEOUT: float = 120.0
+    BEDROCK_TCP_KEEPALIVE: bool = True
+    BEDROCK_RETRY_MODE: str = "adaptive"  # Options: adaptive, standard, legacy (botocore retries only)
+    BEDROCK_MAX_ATTEMPTS: int = 4
+    # AIMD concurrency limit on Bedrock calls; throttles are retried by the invoker with jittered backoff
+    BEDROCK_ADAPTIVE_CONCURRENCY: bool = True
+    BEDROCK_MIN_CONCURRENCY: int = 1
+    BEDROCK_INITIAL_CONCURRENCY: int = 0  # 0 = BEDROCK_MAX_CONCURRENCY
+    BEDROCK_CONCURRENCY_DECREASE: float = 0.5  # Limit multiplier applied on throttling
+    BEDROCK_BACKOFF_BASE_SECONDS: float = 0.5
+    BEDROCK_BACKOFF_MAX_SECONDS: float = 20.0
+    BEDROCK_WARMUP_CONNECTIONS: int = 4  # Connections opened at startup (0 disables warm-up)
+    
+    # Extraction result cache (in-memory LRU + optional SQLite tier; empty path disables disk)
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_MAX_ENTRIES: int = 512
+    EXTRACTION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    EXTRACTION_CACHE_DB_PATH: str = "extraction_cache.db"
+    EXTRACTION_CACHE_DB_MAX_ENTRIES: int = 10000
+    
+    # Admin API (disabled unless a key is set; send it in the X-Admin-Key header)
+    ADMIN_API_KEY: str | None = None
     
     # LLM API (for direct HTTP calls to a runtime/proxy)
     API_KEY: str | None = None
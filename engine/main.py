@@ -1,32 +1,26 @@
 from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from loguru import logger
-import sys
 from pathlib import Path
 
 from config import get_settings
 from models import HealthResponse, ErrorResponse
-from routers import timesheet
+from routers import timesheet, admin
+from services.admission_control import AdmissionMiddleware, get_admission_controller
+from services.bedrock_client import get_bedrock_client, warm_up_bedrock_client
+from services.bedrock_invoker import get_bedrock_invoker
+from utils import metrics
+from utils.log_config import configure_logging
+from utils.render_pool import shutdown_render_pool
+from utils.responses import FastJSONResponse
 
 # Configure logging
 settings = get_settings()
-
-logger.remove()
-logger.add(
-    sys.stdout,
-    colorize=True,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
-    level=settings.LOG_LEVEL
-)
-logger.add(
-    settings.LOG_FILE,
-    rotation="10 MB",
-    retention="7 days",
-    level=settings.LOG_LEVEL
-)
+configure_logging(settings)
 
 
 @asynccontextmanager
@@ -34,8 +28,26 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
+    invoker = get_bedrock_invoker()
+    # The router's service outlives a lifespan; hand it this run's invoker
+    timesheet.llm_service.invoker = invoker
+    if settings.METRICS_ENABLED:
+        # Bound to this run's invoker: calling the factory from a scrape after shutdown
+        # would build a new invoker (and thread pool) that nothing shuts down
+        metrics.BEDROCK_IN_FLIGHT.set_function(lambda: invoker.in_flight)
+        metrics.BEDROCK_CONCURRENCY_LIMIT.set_function(lambda: invoker.concurrency_limit)
+    # Open pooled TLS connections now so the first requests after a deploy are not slow
+    await warm_up_bedrock_client(get_bedrock_client(), settings.BEDROCK_WARMUP_CONNECTIONS)
+    await timesheet.job_manager.start()
     yield
     logger.info(f"Shutting down {settings.APP_NAME}")
+    await timesheet.job_manager.stop()
+    invoker.shutdown()
+    # A restarted lifespan (tests, embedded servers) gets a fresh invoker, not the shut-down one
+    get_bedrock_invoker.cache_clear()
+    shutdown_render_pool()
+    # Flush records still queued for the background log writer
+    await logger.complete()
 
 
 # Create FastAPI app
@@ -45,10 +57,15 @@ app = FastAPI(
     description="Production-level API for extracting structured timesheet data from various document formats",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=lifespan,
-    default_response_class=JSONResponse
+    # No default_response_class: with FastAPI's default, response_model routes are
+    # serialized straight to JSON bytes by pydantic-core instead of dict + json.dumps
+    lifespan=lifespan
 )
 
+# Per-client rate limit and global cap on concurrent extractions (429 + Retry-After).
+# Added before CORS so rejections still carry CORS headers.
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -58,8 +75,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    # Outermost, so latency includes admission waits and rejections
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.ADMISSION_IN_FLIGHT.set_function(lambda: get_admission_controller().in_flight)
+    metrics.ADMISSION_WAITING.set_function(lambda: get_admission_controller().waiting)
+
 # Include routers
 app.include_router(timesheet.router)
+app.include_router(admin.router)
 
 # Serve static files for frontend
 frontend_dir = Path(__file__).parent / "frontend"
@@ -77,6 +101,17 @@ async def health_check():
     )
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics: per-stage latency histograms, payload sizes, token counters and in-flight gauges"""
+    if not settings.METRICS_ENABLED or not metrics.METRICS_AVAILABLE:
+        return JSONResponse(
+            status_code=503,
+            content=jsonable_encoder(ErrorResponse(error="Metrics unavailable", detail="Install prometheus_client and set METRICS_ENABLED")),
+        )
+    return Response(content=metrics.render_metrics(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
 @app.get("/api/v1/example-response", tags=["Documentation"])
 async def example_response():
     """
@@ -139,12 +174,12 @@ async def example_response():
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Internal server error",
             detail=str(exc) if settings.DEBUG else "An unexpected error occurred"
-        ).dict()
+        ).model_dump(mode="json")
     )
 
 
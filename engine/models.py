@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field, validator
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationInfo, field_validator
 from typing import List, Optional, Dict
 from datetime import datetime
 
@@ -26,11 +27,14 @@ class EmployeeTimesheet(BaseModel):
     week_start: Optional[str] = Field(None, description="Week start date if available (YYYY-MM-DD)")
     week_end: Optional[str] = Field(None, description="Week end date if available (YYYY-MM-DD)")
     
-    @validator('total_hours')
-    def validate_total_hours(cls, v, values):
+    @field_validator('total_hours')
+    @classmethod
+    def validate_total_hours(cls, v: float, info: ValidationInfo) -> float:
         """Validate that total hours match sum of daily hours"""
-        if 'week_hours' in values and values['week_hours']:
-            calculated_total = sum(day.hours for day in values['week_hours'])
+        # week_hours is declared first, so it has already been validated here
+        week_hours = info.data.get('week_hours')
+        if week_hours:
+            calculated_total = sum(day.hours for day in week_hours)
             if abs(calculated_total - v) > 0.1:  # Allow small floating point differences
                 return calculated_total
         return v
@@ -44,11 +48,9 @@ class TimesheetResponse(BaseModel):
     metadata: Optional[Dict] = Field(default_factory=dict, description="Additional metadata")
     processed_at: datetime = Field(default_factory=datetime.utcnow)
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-        json_schema_extra = {
+    # Datetimes serialize to ISO 8601 by default, so no custom encoders are needed
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "success": True,
                 "message": "Successfully extracted 1 employee timesheet(s)",
@@ -80,6 +82,30 @@ class TimesheetResponse(BaseModel):
                 "processed_at": "2025-10-22T10:30:00Z"
             }
         }
+    )
+
+
+class JobSubmitResponse(BaseModel):
+    """Response returned when an extraction job is queued"""
+    job_id: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    files_count: int
+    status_url: str = Field(..., description="URL to poll for job status and results")
+
+
+class JobStatusResponse(BaseModel):
+    """Status and results of an extraction job"""
+    job_id: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    files_count: int
+    completed_count: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    results: List[Optional[TimesheetResponse]] = Field(
+        default_factory=list,
+        description="One entry per uploaded file, in upload order (null while pending)"
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -96,3 +122,9 @@ class HealthResponse(BaseModel):
     app_name: str
     version: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+@lru_cache()
+def get_employee_list_adapter() -> TypeAdapter:
+    """Cached validator for a whole list of employee entries in one call"""
+    return TypeAdapter(List[EmployeeTimesheet])
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+
+from config import get_settings, Settings
+from models import ErrorResponse
+from services.admission_control import get_admission_controller
+from services.bedrock_invoker import get_bedrock_invoker
+from services.extraction_cache import get_extraction_cache
+
+
+def require_admin(
+    x_admin_key: Optional[str] = Header(None, description="Admin API key"),
+    settings: Settings = Depends(get_settings)
+) -> None:
+    """Allow the request only if it carries the configured admin key"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (ADMIN_API_KEY not set)")
+    if x_admin_key != settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+    responses={401: {"model": ErrorResponse}, 403: {"model": ErrorResponse}}
+)
+
+
+@router.get("/cache", summary="Extraction cache statistics")
+async def cache_stats():
+    """Return entry counts and hit/miss counters for the extraction cache"""
+    return await get_extraction_cache().stats()
+
+
+@router.delete("/cache", summary="Invalidate the whole extraction cache")
+async def invalidate_cache():
+    """Remove every cached extraction result from memory and disk"""
+    removed = await get_extraction_cache().invalidate()
+    return {"success": True, "invalidated": removed}
+
+
+@router.delete("/cache/{content_hash}", summary="Invalidate cached results for one document")
+async def invalidate_cache_entry(content_hash: str):
+    """Remove cached results for a document, identified by its SHA-256 content hash
+    (reported as ``metadata.content_hash`` in extraction responses)"""
+    removed = await get_extraction_cache().invalidate(content_hash.lower())
+    return {"success": True, "invalidated": removed}
+
+
+@router.get("/admission", summary="Admission control state")
+async def admission_stats():
+    """Return in-flight and queued extraction counts and rejection counters"""
+    return get_admission_controller().stats()
+
+
+@router.get("/bedrock", summary="Bedrock concurrency state")
+async def bedrock_stats():
+    """Return the current adaptive concurrency limit, in-flight calls and throttle/retry counters"""
+    return get_bedrock_invoker().stats()
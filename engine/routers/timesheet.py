@@ -1,14 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import json
+import math
 import os
+import time
 from pathlib import Path
 from loguru import logger
 
 from config import get_settings, Settings
-from models import TimesheetResponse, ErrorResponse
+from models import TimesheetResponse, ErrorResponse, JobSubmitResponse, JobStatusResponse
+from services.admission_control import charge_files, get_admission_controller
+from services.concurrency_limiter import BedrockThrottledError
 from services.llm_service import LLMService
+from services.job_queue import ExtractionJobManager
 from utils.file_handler import FileHandler
+from utils.metrics import REQUEST_BYTES, observe_stage
+from utils.responses import FastJSONResponse
+from utils.tracing import activate, finish_trace, request_trace, start_trace
 from utils.validators import validate_file
 
 
@@ -18,45 +29,135 @@ router = APIRouter(prefix="/api/v1/timesheet", tags=["Timesheet"])
 llm_service = LLMService()
 file_handler = FileHandler()
 
+# Shared across all batch requests so concurrent batches cannot oversubscribe the worker
+batch_slots = asyncio.Semaphore(get_settings().BATCH_GLOBAL_CONCURRENCY)
+
+
+async def _process_job_file(job_file: Dict) -> Dict:
+    """Extract one saved upload on behalf of the job worker pool"""
+    extraction_info = {}
+    # Job files count against the global extraction cap like interactive requests
+    controller = get_admission_controller()
+    await controller.acquire(block=True)
+    started = time.monotonic()
+    try:
+        # Jobs are polled later, so their timings are always kept
+        with request_trace("job-file", filename=job_file["filename"]) as trace:
+            timesheets = await llm_service.extract_timesheet_from_document(
+                job_file["path"], job_file["extension"], metadata=extraction_info, content_hash=job_file["content_hash"],
+                output_schema=job_file.get("output_schema")
+            )
+    finally:
+        controller.release(time.monotonic() - started)
+    extraction_info["timings"] = trace.timings()
+    if not timesheets:
+        raise HTTPException(status_code=400, detail="No timesheet data found in document")
+    response = TimesheetResponse(
+        success=True,
+        message=f"Successfully extracted {len(timesheets)} employee timesheet(s)",
+        data=timesheets,
+        metadata={
+            "filename": job_file["sanitized_name"],
+            "file_type": job_file["extension"],
+            "employees_count": len(timesheets),
+            **extraction_info
+        }
+    )
+    return response.model_dump(mode="json")
+
+
+job_manager = ExtractionJobManager(
+    processor=_process_job_file,
+    worker_count=get_settings().JOBS_WORKER_COUNT,
+    db_path=get_settings().JOBS_DB_PATH,
+    retention_seconds=get_settings().JOBS_RETENTION_SECONDS,
+)
+
+
+OUTPUT_SCHEMA_QUERY = Query(
+    None,
+    pattern="^(verbose|compact)$",
+    description="Schema the model answers in: verbose, or compact (fewer output tokens); the response is the same",
+)
+
+
+def _use_in_memory_path(file: UploadFile, file_extension: str, settings: Settings) -> bool:
+    """Decide whether an upload can skip the temp file and be extracted from memory"""
+    file_size = getattr(file, "size", None)
+    return (
+        file_size is not None
+        and file_size <= settings.IN_MEMORY_UPLOAD_MAX_MB * 1024 * 1024
+        and llm_service.can_extract_from_bytes(file_extension)
+    )
+
 
 @router.post(
     "/extract",
     response_model=TimesheetResponse,
-    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
     summary="Extract timesheet data from document",
     description="Upload a timesheet document (PNG, PDF, CSV, DOCX) and extract structured data",
     response_model_exclude_none=False
 )
 async def extract_timesheet(
     file: UploadFile = File(..., description="Timesheet document to process"),
+    timings: bool = Query(False, description="Include per-stage durations in metadata.timings"),
+    output_schema: Optional[str] = OUTPUT_SCHEMA_QUERY,
     settings: Settings = Depends(get_settings)
 ):
     """
     Extract timesheet data from uploaded document
     
     - **file**: The timesheet document (PNG, JPG, PDF, CSV, DOCX, XLSX)
+    - **timings**: Add per-stage durations (upload, preprocessing, model call, parsing) to ``metadata.timings``
+    - **output_schema**: ``compact`` asks the model for a shorter reply (defaults to ``EXTRACTION_OUTPUT_SCHEMA``)
     
     Returns structured JSON with employee names, daily hours, and totals
     """
+    with request_trace("extract", enabled=timings, filename=file.filename) as trace:
+        response = await _extract_timesheet(file, settings, output_schema)
+    if timings and trace is not None:
+        response.metadata["timings"] = trace.timings()
+    return response
+
+
+async def _extract_timesheet(file: UploadFile, settings: Settings, output_schema: Optional[str] = None) -> TimesheetResponse:
+    """Validate, store and extract one upload (the body of ``/extract``)"""
     temp_file_path = None
     
     try:
-        logger.info(f"📥 Received file: {file.filename}")
+        logger.info("📥 Received file: {}", file.filename)
         
-        # Validate file
-        await validate_file(file, settings)
-        
-        # Save file temporarily (returns path and sanitized filename)
-        temp_file_path, sanitized_name = await file_handler.save_temp_file(file)
+        # Validate file (unlabelled: the extension is untrusted until validated)
+        with observe_stage("validate_file"):
+            await validate_file(file, settings)
         
         # Get file extension
         file_extension = Path(file.filename).suffix.lower().replace('.', '')
         
-        logger.info(f"🚀 Processing with UNIFIED pipeline (single model call)")
+        logger.debug("🚀 Processing with UNIFIED pipeline (single model call)")
         
         # UNIFIED PIPELINE: One call does everything!
         # No more separate IDP + LLM steps - much faster!
-        timesheets = await llm_service.extract_timesheet_from_document(temp_file_path, file_extension)
+        extraction_info = {}
+        if _use_in_memory_path(file, file_extension, settings):
+            # Small uploads go from the socket straight into the model payload
+            with observe_stage("read_upload", file_extension):
+                content, sanitized_name, content_hash = await file_handler.read_upload(file)
+            REQUEST_BYTES.labels(file_extension).observe(len(content))
+            timesheets = await llm_service.extract_timesheet_from_bytes(
+                content, file_extension, metadata=extraction_info, content_hash=content_hash,
+                output_schema=output_schema
+            )
+        else:
+            # Save file temporarily (returns path, sanitized filename and content hash)
+            with observe_stage("save_temp_file", file_extension):
+                temp_file_path, sanitized_name, content_hash = await file_handler.save_temp_file(file)
+            REQUEST_BYTES.labels(file_extension).observe(os.path.getsize(temp_file_path))
+            timesheets = await llm_service.extract_timesheet_from_document(
+                temp_file_path, file_extension, metadata=extraction_info, content_hash=content_hash,
+                output_schema=output_schema
+            )
         
         if not timesheets:
             raise HTTPException(
@@ -72,15 +173,23 @@ async def extract_timesheet(
             metadata={
                 "filename": sanitized_name,
                 "file_type": file_extension,
-                "employees_count": len(timesheets)
+                "employees_count": len(timesheets),
+                **extraction_info
             }
         )
         
-        logger.info(f"✅ Successfully processed timesheet with {len(timesheets)} employees")
+        logger.info("✅ Successfully processed timesheet with {} employees", len(timesheets))
         return response
         
     except HTTPException:
         raise
+    except BedrockThrottledError as e:
+        logger.warning(f"🚦 Bedrock throttled, returning 503: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Model capacity temporarily exhausted, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
     except Exception as e:
         logger.error(f"Error processing timesheet: {str(e)}")
         raise HTTPException(
@@ -92,11 +201,85 @@ async def extract_timesheet(
         if temp_file_path and os.path.exists(temp_file_path):
             try:
                 os.remove(temp_file_path)
-                logger.info(f"Cleaned up temporary file: {temp_file_path}")
+                logger.debug("Cleaned up temporary file: {}", temp_file_path)
             except Exception as e:
                 logger.warning(f"Could not remove temp file: {str(e)}")
 
 
+@router.post(
+    "/extract-stream",
+    responses={
+        200: {"content": {"application/x-ndjson": {}, "text/event-stream": {}}},
+        400: {"model": ErrorResponse}
+    },
+    summary="Stream extracted employee timesheets as they are generated",
+    description="Upload a timesheet document; each employee is emitted as NDJSON (or SSE) as soon as the model finishes it"
+)
+async def extract_timesheet_stream(
+    file: UploadFile = File(..., description="Timesheet document to process"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse"),
+    timings: bool = Query(False, description="Include per-stage durations in the done event's metadata.timings"),
+    output_schema: Optional[str] = OUTPUT_SCHEMA_QUERY,
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Stream timesheet data from an uploaded document
+    
+    Emits one ``{"type": "employee", "index": n, "data": {...}}`` event per employee,
+    then a final ``{"type": "done", ...}`` event with the response metadata, or a
+    ``{"type": "error", "detail": ...}`` event if extraction fails mid-stream.
+    """
+    logger.info("📥 Received file for streaming: {}", file.filename)
+    
+    trace = start_trace("extract-stream", enabled=timings, filename=file.filename)
+    # Validation and upload errors are reported as regular HTTP errors before streaming starts
+    try:
+        with activate(trace):
+            with observe_stage("validate_file"):
+                await validate_file(file, settings)
+            file_extension = Path(file.filename).suffix.lower().replace('.', '')
+            with observe_stage("read_upload", file_extension):
+                content, sanitized_name, content_hash = await file_handler.read_upload(file)
+    except Exception as e:
+        finish_trace(trace, e)
+        raise
+    REQUEST_BYTES.labels(file_extension).observe(len(content))
+    
+    def encode(event: Dict) -> str:
+        payload = json.dumps(event, default=str)
+        return f"data: {payload}\n\n" if format == "sse" else payload + "\n"
+    
+    async def events():
+        extraction_info = {}
+        count = 0
+        error = None
+        try:
+            with activate(trace):
+                async for timesheet in llm_service.stream_timesheet_from_bytes(
+                    content, file_extension, metadata=extraction_info, content_hash=content_hash,
+                    output_schema=output_schema
+                ):
+                    yield encode({"type": "employee", "index": count, "data": timesheet.model_dump(mode="json")})
+                    count += 1
+            if timings and trace is not None:
+                extraction_info["timings"] = trace.timings()
+            yield encode({
+                "type": "done",
+                "success": count > 0,
+                "employees_count": count,
+                "metadata": {"filename": sanitized_name, "file_type": file_extension, **extraction_info}
+            })
+        except Exception as e:
+            error = e
+            logger.error(f"Error streaming timesheet: {str(e)}")
+            yield encode({"type": "error", "detail": f"Error processing timesheet: {str(e)}"})
+        finally:
+            finish_trace(trace, error)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
 @router.post(
     "/extract-batch",
     response_model=List[TimesheetResponse],
@@ -104,31 +287,133 @@ async def extract_timesheet(
     description="Upload multiple timesheet documents and extract structured data from all"
 )
 async def extract_timesheet_batch(
+    request: Request,
     files: List[UploadFile] = File(..., description="Multiple timesheet documents"),
+    timings: bool = Query(False, description="Include per-stage durations in each result's metadata.timings"),
+    output_schema: Optional[str] = OUTPUT_SCHEMA_QUERY,
     settings: Settings = Depends(get_settings)
 ):
-    """Extract timesheet data from multiple documents"""
+    """Extract timesheet data from multiple documents
     
-    if len(files) > 10:
+    Files are processed concurrently, bounded both per request and across all batch
+    requests. Each file costs one rate-limit token and holds one admission slot while
+    it is extracted. Responses are returned in the same order as the uploaded files,
+    and a failure on one file does not affect the others.
+    """
+    
+    if len(files) > settings.BATCH_MAX_FILES:
         raise HTTPException(
             status_code=400,
-            detail="Maximum 10 files allowed per batch request"
+            detail=f"Maximum {settings.BATCH_MAX_FILES} files allowed per batch request"
         )
+    controller = charge_files(request, len(files))
     
-    responses = []
+    request_slots = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY_PER_REQUEST))
     
-    for file in files:
-        try:
-            response = await extract_timesheet(file, settings)
-            responses.append(response)
-        except Exception as e:
-            logger.error(f"Error processing file {file.filename}: {str(e)}")
-            # Continue processing other files
-            responses.append(TimesheetResponse(
-                success=False,
-                message=f"Error: {str(e)}",
-                data=[],
-                metadata={"filename": file.filename, "error": str(e)}
-            ))
-    
-    return responses
+    def failed(file: UploadFile, error: str) -> TimesheetResponse:
+        # Isolate the failure to this file
+        return TimesheetResponse(
+            success=False,
+            message=f"Error: {error}",
+            data=[],
+            metadata={"filename": file.filename, "error": error}
+        )
+    
+    async def process(file: UploadFile) -> TimesheetResponse:
+        async with request_slots, batch_slots:
+            if controller is not None and await controller.acquire() is not None:
+                return failed(file, "Server busy, retry later")
+            started = time.monotonic()
+            try:
+                return await extract_timesheet(file, timings=timings, output_schema=output_schema, settings=settings)
+            except Exception as e:
+                logger.error(f"Error processing file {file.filename}: {str(e)}")
+                return failed(file, str(e))
+            finally:
+                if controller is not None:
+                    controller.release(time.monotonic() - started)
+    
+    logger.info(f"📦 Processing batch of {len(files)} file(s)")
+    
+    # gather() preserves input order regardless of completion order
+    return await asyncio.gather(*(process(file) for file in files))
+
+
+@router.post(
+    "/jobs",
+    response_model=JobSubmitResponse,
+    status_code=202,
+    responses={400: {"model": ErrorResponse}},
+    summary="Queue an asynchronous extraction job",
+    description="Upload one or more timesheet documents and get a job id immediately; poll GET /jobs/{job_id} for results"
+)
+async def create_extraction_job(
+    request: Request,
+    files: List[UploadFile] = File(..., description="Timesheet documents to process"),
+    output_schema: Optional[str] = OUTPUT_SCHEMA_QUERY,
+    settings: Settings = Depends(get_settings)
+):
+    """Queue documents for extraction by the worker pool; each file costs one rate-limit token"""
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.BATCH_MAX_FILES} files allowed per job"
+        )
+    charge_files(request, len(files))
+    
+    saved: List[Dict] = []
+    try:
+        for file in files:
+            await validate_file(file, settings)
+            temp_file_path, sanitized_name, content_hash = await file_handler.save_temp_file(file)
+            saved.append({
+                "path": temp_file_path,
+                "filename": file.filename,
+                "sanitized_name": sanitized_name,
+                "extension": Path(file.filename).suffix.lower().replace('.', ''),
+                "content_hash": content_hash,
+                "output_schema": output_schema,
+            })
+    except Exception:
+        # Reject the whole job; nothing has been queued yet
+        for job_file in saved:
+            file_handler.cleanup_temp_file(job_file["path"])
+        raise
+    
+    job = await job_manager.submit(saved)
+    return JobSubmitResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        files_count=len(saved),
+        status_url=str(request.url_for("get_extraction_job", job_id=job["job_id"]))
+    )
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value else None
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    responses={404: {"model": ErrorResponse}},
+    summary="Get extraction job status and results"
+)
+async def get_extraction_job(job_id: str):
+    """Return job status; results are filled in per file as workers finish them"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    # Results were validated and dumped to JSON-ready dicts when each file finished;
+    # render them as stored rather than rebuilding a JobStatusResponse on every poll
+    return FastJSONResponse({
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "files_count": len(job["files"]),
+        "completed_count": sum(1 for r in job["results"] if r is not None),
+        "created_at": _timestamp(job["created_at"]),
+        "started_at": _timestamp(job["started_at"]),
+        "finished_at": _timestamp(job["finished_at"]),
+        "results": job["results"],
+    })
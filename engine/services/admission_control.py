@@ -0,0 +1,297 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Deque, Dict, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from loguru import logger
+from config import get_settings
+from models import ErrorResponse
+
+
+# Weight of the latest request in the moving average used for Retry-After estimates
+SERVICE_TIME_SMOOTHING = 0.2
+# Per-client buckets kept in memory; the least recently seen clients are dropped first
+MAX_TRACKED_CLIENTS = 10000
+# Multi-file routes are charged per file by the route itself (see ``charge_files``)
+PER_FILE_ROUTES = ("/extract-batch", "/jobs")
+
+
+class AdmissionController:
+    """Inbound admission control for extraction requests.
+
+    Two independent checks run before a request reaches the router:
+
+    * a per-client token bucket that refills at ``rate_per_minute`` and holds at most
+      ``burst`` tokens, so one tenant's burst cannot exhaust shared Bedrock capacity;
+    * a global cap of ``max_in_flight`` concurrent extractions. Requests over the cap
+      wait in a FIFO queue of at most ``queue_size`` entries for up to
+      ``queue_timeout`` seconds.
+
+    Requests that fail either check are rejected at once with a ``Retry-After`` hint
+    instead of piling up, which keeps latency predictable for the admitted ones.
+    A limit of 0 disables that check.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: int = 0,
+        burst: int = 0,
+        max_in_flight: int = 0,
+        queue_size: int = 0,
+        queue_timeout: float = 0.0,
+    ):
+        self.rate_per_second = max(0, rate_per_minute) / 60.0
+        self.burst = max(1, burst or rate_per_minute)
+        self.max_in_flight = max(0, int(max_in_flight))
+        self.queue_size = max(0, int(queue_size))
+        self.queue_timeout = max(0.0, float(queue_timeout))
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # client -> (tokens, updated)
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_time = 1.0
+        self._admitted = 0
+        self._rejected_rate = 0
+        self._rejected_capacity = 0
+
+    @classmethod
+    def from_settings(cls, settings=None) -> "AdmissionController":
+        settings = settings or get_settings()
+        return cls(
+            rate_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            burst=settings.RATE_LIMIT_BURST,
+            max_in_flight=settings.MAX_CONCURRENT_EXTRACTIONS,
+            queue_size=settings.ADMISSION_QUEUE_SIZE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def take_token(self, client: str, count: int = 1) -> Optional[float]:
+        """Take ``count`` tokens from the client's bucket.
+
+        A request for more tokens than the burst is admitted once the bucket is full and
+        leaves it in debt, so large batches are possible but still paid for at the
+        configured rate. Returns None when the request may proceed, else the seconds
+        until enough tokens are available.
+        """
+        if not self.rate_per_second:
+            return None
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate_per_second)
+        needed = min(float(max(1, count)), float(self.burst))
+        if tokens >= needed:
+            tokens -= max(1, count)
+            retry_after = None
+        else:
+            retry_after = (needed - tokens) / self.rate_per_second
+            self._rejected_rate += 1
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > MAX_TRACKED_CLIENTS:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def refund_token(self, client: str) -> None:
+        """Give back a token taken by a request that was then rejected for capacity"""
+        if client in self._buckets:
+            tokens, updated = self._buckets[client]
+            self._buckets[client] = (min(float(self.burst), tokens + 1.0), updated)
+
+    async def acquire(self, block: bool = False) -> Optional[float]:
+        """Wait for an extraction slot.
+
+        Returns None once a slot is held (pair with ``release``), else a Retry-After
+        estimate in seconds when the queue is full or the wait deadline passes. With
+        ``block`` the caller waits as long as it takes, even past the queue bound; job
+        workers use it, as no client is waiting on them.
+        """
+        if not self.max_in_flight:
+            self._in_flight += 1
+            return None
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return None
+        if not block and len(self._waiters) >= self.queue_size:
+            self._rejected_capacity += 1
+            return self._retry_after()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # asyncio.wait does not cancel the future, so a slot handed over at the
+            # deadline is never lost
+            await asyncio.wait({waiter}, timeout=None if block else self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if waiter.done():
+            return None
+        self._abandon(waiter)
+        self._rejected_capacity += 1
+        return self._retry_after()
+
+    def release(self, duration: float) -> None:
+        """Free a slot, handing it straight to the oldest waiter if there is one"""
+        self._admitted += 1
+        self._service_time += SERVICE_TIME_SMOOTHING * (duration - self._service_time)
+        self._hand_over()
+
+    def _hand_over(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        """Withdraw from the queue; give the slot back if it was handed over meanwhile"""
+        if waiter.done() and not waiter.cancelled():
+            self._hand_over()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _retry_after(self) -> float:
+        """Rough time until the queue ahead of a new request drains"""
+        slots = self.max_in_flight or 1
+        return self._service_time * (len(self._waiters) + 1) / slots
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "queue_size": self.queue_size,
+            "queue_timeout_seconds": self.queue_timeout,
+            "rate_limit_per_minute": round(self.rate_per_second * 60),
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "avg_service_seconds": round(self._service_time, 3),
+            "admitted": self._admitted,
+            "rejected_rate_limited": self._rejected_rate,
+            "rejected_overloaded": self._rejected_capacity,
+        }
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller"""
+    return AdmissionController.from_settings()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying ``AdmissionController`` to extraction requests.
+
+    Only ``POST`` requests under ``path_prefix`` are admission-controlled; health
+    checks, job polling, docs and admin endpoints always pass. The slot is held until
+    the response body has been sent, so streaming extractions count for their whole
+    duration.
+
+    Multi-file routes (``PER_FILE_ROUTES``) pass through with the controller and client
+    key stored in the request state: the route charges one token per file with
+    ``charge_files`` and takes one slot per file while extracting it.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None, path_prefix: str = "/api/v1/timesheet"):
+        self.app = app
+        self.controller = controller or get_admission_controller()
+        self.path_prefix = path_prefix
+        self.per_file_paths = tuple(path_prefix + route for route in PER_FILE_ROUTES)
+        self.client_header = (get_settings().RATE_LIMIT_CLIENT_HEADER or "").lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = self._client_key(scope)
+        if scope["path"] in self.per_file_paths:
+            scope.setdefault("state", {})["admission"] = (self.controller, client)
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.controller.take_token(client)
+        if retry_after is not None:
+            logger.warning(f"🚦 Rate limit exceeded for client {client} ({scope['path']})")
+            await self._reject(scope, receive, send, retry_after, "Rate limit exceeded",
+                               f"Limit is {self.controller.rate_per_second * 60:.0f} requests per minute")
+            return
+
+        retry_after = await self.controller.acquire()
+        if retry_after is not None:
+            self.controller.refund_token(client)
+            logger.warning(
+                f"🚦 Server busy, rejected {scope['path']} from {client} "
+                f"(in flight: {self.controller.in_flight}, waiting: {self.controller.waiting})"
+            )
+            await self._reject(scope, receive, send, retry_after, "Server busy",
+                               "Too many extractions in progress, retry later")
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(time.monotonic() - started)
+
+    def _client_key(self, scope) -> str:
+        """Client identity: the configured header (set by a trusted gateway), else the peer address"""
+        if self.client_header:
+            for name, value in scope.get("headers", ()):
+                if name == self.client_header and value:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _reject(scope, receive, send, retry_after: float, error: str, detail: str) -> None:
+        response = JSONResponse(
+            status_code=429,
+            content=jsonable_encoder(ErrorResponse(error=error, detail=detail)),
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
+
+
+def charge_files(request: Request, count: int) -> Optional[AdmissionController]:
+    """
+    Charge a multi-file request one rate-limit token per file
+
+    Returns:
+        The controller each file should take an extraction slot from, or None when the
+        request did not pass through ``AdmissionMiddleware``
+
+    Raises:
+        HTTPException: 429 with ``Retry-After`` when the client's budget cannot cover the files
+    """
+    admission = getattr(request.state, "admission", None)
+    if admission is None:
+        return None
+    controller, client = admission
+    retry_after = controller.take_token(client, count)
+    if retry_after is not None:
+        logger.warning("🚦 Rate limit exceeded for client {} ({} file(s) on {})", client, count, request.url.path)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: limit is {controller.rate_per_second * 60:.0f} files per minute",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return controller
@@ -0,0 +1,99 @@
+import asyncio
+from functools import lru_cache
+from typing import Any, Optional
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from loguru import logger
+from config import get_settings
+
+
+def build_bedrock_client(settings=None) -> Any:
+    """
+    Create a bedrock-runtime client with pooled, kept-alive connections
+
+    The connection pool is sized to the invoker's concurrency (botocore's default of
+    10 would otherwise queue calls beyond the tenth), timeouts are explicit and
+    throttling is retried with botocore's adaptive mode. With
+    ``BEDROCK_ADAPTIVE_CONCURRENCY`` the invoker retries instead, so botocore makes a
+    single attempt and every throttle reaches the concurrency limiter.
+    """
+    settings = settings or get_settings()
+    if settings.BEDROCK_ADAPTIVE_CONCURRENCY:
+        retries = {"mode": "standard", "total_max_attempts": 1}
+    else:
+        retries = {"mode": settings.BEDROCK_RETRY_MODE, "total_max_attempts": settings.BEDROCK_MAX_ATTEMPTS}
+    config = Config(
+        region_name=settings.AWS_REGION,
+        max_pool_connections=settings.BEDROCK_MAX_POOL_CONNECTIONS or settings.BEDROCK_MAX_CONCURRENCY,
+        connect_timeout=settings.BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=settings.BEDROCK_READ_TIMEOUT,
+        tcp_keepalive=settings.BEDROCK_TCP_KEEPALIVE,
+        retries=retries,
+    )
+    credentials = {}
+    # If explicit AWS credentials provided in settings, pass them; otherwise rely on default chain
+    if settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY:
+        credentials = {
+            "aws_access_key_id": settings.AWS_ACCESS_KEY_ID,
+            "aws_secret_access_key": settings.AWS_SECRET_ACCESS_KEY,
+        }
+    return boto3.client(service_name='bedrock-runtime', config=config, **credentials)
+
+
+@lru_cache()
+def get_bedrock_client() -> Optional[Any]:
+    """Get the process-wide bedrock-runtime client, or None if it cannot be created"""
+    try:
+        client = build_bedrock_client()
+        settings = get_settings()
+        retries = "invoker" if settings.BEDROCK_ADAPTIVE_CONCURRENCY else settings.BEDROCK_RETRY_MODE
+        logger.info(
+            f"✅ Initialized shared Bedrock runtime client "
+            f"(pool: {settings.BEDROCK_MAX_POOL_CONNECTIONS or settings.BEDROCK_MAX_CONCURRENCY}, "
+            f"retries: {retries} x{settings.BEDROCK_MAX_ATTEMPTS})"
+        )
+        return client
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to initialize Bedrock client: {e}")
+        return None
+
+
+def _open_connection(client: Any) -> Optional[str]:
+    """Make one cheap call so a pooled connection completes its TCP/TLS handshake.
+
+    Returns None on success, else the error message.
+    """
+    try:
+        client.list_async_invokes(maxResults=1)
+    except ClientError:
+        # Access denied and similar still mean the connection is established
+        pass
+    except BotoCoreError as e:
+        return str(e)
+    return None
+
+
+async def warm_up_bedrock_client(client: Optional[Any], connections: int, timeout: float = 10.0) -> int:
+    """
+    Open ``connections`` pooled connections in parallel before traffic arrives
+
+    Returns:
+        Number of connections that completed their handshake
+    """
+    if client is None or connections <= 0 or not hasattr(client, "list_async_invokes"):
+        return 0
+    try:
+        errors = await asyncio.wait_for(
+            asyncio.gather(*(asyncio.to_thread(_open_connection, client) for _ in range(connections))),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ Bedrock warm-up did not finish within {timeout:.0f}s")
+        return 0
+    warmed = sum(1 for error in errors if error is None)
+    failures = [error for error in errors if error is not None]
+    if failures:
+        logger.warning(f"⚠️ Bedrock warm-up: {len(failures)} connection(s) failed: {failures[0]}")
+    logger.info(f"🔥 Warmed up {warmed}/{connections} Bedrock connection(s)")
+    return warmed
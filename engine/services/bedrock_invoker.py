@@ -0,0 +1,234 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, Dict, Optional
+from loguru import logger
+from config import get_settings
+from services.concurrency_limiter import (
+    AIMDLimiter,
+    BedrockThrottledError,
+    backoff_delay,
+    is_retryable_error,
+    is_throttling_error,
+)
+
+
+class BedrockInvoker:
+    """Async facade over the blocking boto3 Bedrock runtime calls.
+
+    boto3 has no native asyncio support, so every ``converse`` call is dispatched to a
+    dedicated, bounded thread pool. The event loop stays free to serve other requests
+    while a model call is in flight, and the pool size caps how many Bedrock calls a
+    single process runs at once.
+
+    With a ``limiter``, calls also wait for an ``AIMDLimiter`` slot, so concurrency
+    adapts to Bedrock throttling below the pool size. The slot is held until the pool
+    thread is done with the call, even when the awaiting task is cancelled first, so
+    the limit bounds the calls Bedrock actually sees. Throttled, 5xx and dropped
+    calls are retried up to ``max_attempts`` times with jittered exponential backoff;
+    if Bedrock is still throttling after that, ``BedrockThrottledError`` is raised.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        limiter: Optional[AIMDLimiter] = None,
+        max_attempts: int = 1,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+    ):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="bedrock-invoke",
+        )
+        self.limiter = limiter
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = max(0.0, float(backoff_base))
+        self.backoff_max = max(self.backoff_base, float(backoff_max))
+        self._in_flight = 0
+        self._retries = 0
+        adaptive = f", adaptive limit {limiter.limit:.0f}, {self.max_attempts} attempt(s)" if limiter else ""
+        logger.info(f"Bedrock invoker ready (max concurrency: {self.max_concurrency}{adaptive})")
+
+    @property
+    def in_flight(self) -> int:
+        """Number of Bedrock calls currently submitted to the pool"""
+        return self._in_flight
+
+    @property
+    def concurrency_limit(self) -> float:
+        """Current adaptive limit, or the pool size when concurrency is not adaptive"""
+        return self.limiter.limit if self.limiter else float(self.max_concurrency)
+
+    async def converse(self, client: Any, **kwargs) -> Dict:
+        """Run ``client.converse(**kwargs)`` without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_attempts):
+            started = await self._acquire()
+            call = self._submit(loop, partial(client.converse, **kwargs))
+            try:
+                # A cancelled caller stops waiting; the call finishes on its thread and frees the slot then
+                response = await asyncio.shield(call)
+            except Exception as e:
+                self._raise_unless_retryable(e, started, attempt)
+            else:
+                self._on_success()
+                return response
+            await self._backoff(attempt)
+
+    async def converse_stream(self, client: Any, **kwargs) -> AsyncIterator[Dict]:
+        """Run ``client.converse_stream(**kwargs)`` on the pool and yield its events.
+
+        The blocking event-stream iteration happens on a pool thread, which hands each
+        event to the event loop as it arrives. If the consumer stops early the stream
+        is closed and the thread returns at the next event. A call is only retried if
+        it failed before its first event.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_attempts):
+            started = await self._acquire()
+            queue: asyncio.Queue = asyncio.Queue()
+            finished = object()
+            stopped = threading.Event()
+            self._submit(loop, partial(self._pump_stream, loop, queue, finished, stopped, client, kwargs))
+            yielded = False
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is finished:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yielded = True
+                    yield item
+            except Exception as e:
+                if yielded:
+                    self._on_failure(e, started)
+                    raise
+                self._raise_unless_retryable(e, started, attempt)
+            else:
+                self._on_success()
+                return
+            finally:
+                # The pump thread returns at its next event and frees the slot then
+                stopped.set()
+            await self._backoff(attempt)
+
+    @staticmethod
+    def _pump_stream(loop, queue: asyncio.Queue, finished: object, stopped: threading.Event, client: Any, kwargs: Dict) -> None:
+        """Iterate a converse stream on a pool thread, handing events to the event loop"""
+        def emit(item) -> None:
+            if stopped.is_set():
+                return
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # Event loop already closed; nobody is listening any more
+                stopped.set()
+
+        try:
+            stream = client.converse_stream(**kwargs)["stream"]
+            try:
+                for event in stream:
+                    if stopped.is_set():
+                        break
+                    emit(event)
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+            emit(finished)
+        except Exception as e:
+            emit(e)
+
+    async def _acquire(self) -> float:
+        return await self.limiter.acquire() if self.limiter else 0.0
+
+    def _submit(self, loop, call) -> asyncio.Future:
+        """Run ``call`` on the pool; the acquired slot is released when the thread finishes it"""
+        self._in_flight += 1
+        try:
+            future = loop.run_in_executor(self._executor, call)
+        except BaseException:
+            self._call_finished(None)
+            raise
+        future.add_done_callback(self._call_finished)
+        return future
+
+    def _call_finished(self, future: Optional[asyncio.Future]) -> None:
+        self._in_flight -= 1
+        self._release()
+        if future is not None and not future.cancelled():
+            # Mark the exception as retrieved in case the caller was cancelled
+            future.exception()
+
+    def _release(self) -> None:
+        if self.limiter:
+            self.limiter.release()
+
+    def _on_success(self) -> None:
+        if self.limiter:
+            self.limiter.on_success()
+
+    def _on_failure(self, error: Exception, started: float) -> None:
+        if self.limiter and is_throttling_error(error):
+            self.limiter.on_throttle(started)
+
+    def _raise_unless_retryable(self, error: Exception, started: float, attempt: int) -> None:
+        """Record a failed attempt and re-raise it unless another attempt is allowed"""
+        self._on_failure(error, started)
+        if is_retryable_error(error) and attempt + 1 < self.max_attempts:
+            logger.warning(f"⚠️ Bedrock call failed (attempt {attempt + 1}/{self.max_attempts}), retrying: {error}")
+            return
+        if is_throttling_error(error):
+            retry_after = min(self.backoff_max, self.backoff_base * (2 ** self.max_attempts))
+            raise BedrockThrottledError(
+                f"Bedrock is throttling requests (gave up after {attempt + 1} attempt(s)): {error}",
+                retry_after=retry_after,
+            ) from error
+        raise error
+
+    async def _backoff(self, attempt: int) -> None:
+        self._retries += 1
+        await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+    def stats(self) -> Dict:
+        """Current concurrency limit and call counters"""
+        stats = {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "max_attempts": self.max_attempts,
+            "retries": self._retries,
+            "adaptive": self.limiter is not None,
+        }
+        if self.limiter:
+            stats.update(self.limiter.stats())
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release pool threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache()
+def get_bedrock_invoker() -> BedrockInvoker:
+    """Get the process-wide Bedrock invoker"""
+    settings = get_settings()
+    if not settings.BEDROCK_ADAPTIVE_CONCURRENCY:
+        # Retries stay with botocore (see build_bedrock_client)
+        return BedrockInvoker(settings.BEDROCK_MAX_CONCURRENCY)
+    limiter = AIMDLimiter(
+        max_limit=settings.BEDROCK_MAX_CONCURRENCY,
+        min_limit=settings.BEDROCK_MIN_CONCURRENCY,
+        initial_limit=settings.BEDROCK_INITIAL_CONCURRENCY,
+        decrease=settings.BEDROCK_CONCURRENCY_DECREASE,
+    )
+    return BedrockInvoker(
+        settings.BEDROCK_MAX_CONCURRENCY,
+        limiter=limiter,
+        max_attempts=settings.BEDROCK_MAX_ATTEMPTS,
+        backoff_base=settings.BEDROCK_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.BEDROCK_BACKOFF_MAX_SECONDS,
+    )
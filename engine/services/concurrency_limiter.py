@@ -0,0 +1,143 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from botocore.exceptions import ClientError, ConnectionClosedError, ConnectionError as BotoConnectionError
+
+
+# Bedrock error codes that mean "slow down" (event-stream errors use camelCase, hence lower())
+THROTTLING_ERROR_CODES = {
+    "throttlingexception",
+    "toomanyrequestsexception",
+    "servicequotaexceededexception",
+    "serviceunavailableexception",
+    "modelnotreadyexception",
+    "internalserverexception",
+}
+
+
+class BedrockThrottledError(RuntimeError):
+    """Bedrock kept throttling after every retry; the caller should try again later"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """True for throttling and 5xx responses, which signal the account is over capacity"""
+    if not isinstance(error, ClientError):
+        return False
+    code = str(error.response.get("Error", {}).get("Code", "")).lower()
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+    return code in THROTTLING_ERROR_CODES or status == 429 or status >= 500
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Throttling, 5xx and dropped connections are worth retrying; anything else is not"""
+    return is_throttling_error(error) or isinstance(error, (BotoConnectionError, ConnectionClosedError))
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease limit on concurrent Bedrock calls.
+
+    Every success raises the limit by ``increase / limit`` (about ``increase`` per
+    full window of calls); a throttle or 5xx multiplies it by ``decrease``. Calls that
+    started before the last decrease cannot trigger another one, so a burst of
+    throttles from a single overloaded window halves the limit once rather than
+    collapsing it to the minimum. Sustained concurrency settles just under the
+    account's real quota instead of alternating between errors and idle.
+
+    Callers over the limit wait in FIFO order.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        decrease: float = 0.5,
+        increase: float = 1.0,
+    ):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        initial = initial_limit or self.max_limit
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.decrease = min(max(float(decrease), 0.1), 0.95)
+        self.increase = max(float(increase), 0.0)
+        self._in_use = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._throttles = 0
+        self._decreases = 0
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the time it was granted (pass it to ``on_throttle``)"""
+        if self._in_use < int(self.limit) and not self._waiters:
+            self._in_use += 1
+            return time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we were cancelled: pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        return time.monotonic()
+
+    def release(self) -> None:
+        self._in_use -= 1
+        self._wake()
+
+    def on_success(self) -> None:
+        if self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + self.increase / self.limit)
+            self._wake()
+
+    def on_throttle(self, started: float) -> None:
+        """Cut the limit, unless the throttled call predates the last cut"""
+        self._throttles += 1
+        if started < self._last_decrease:
+            return
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+        self._last_decrease = time.monotonic()
+        self._decreases += 1
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_use < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_use += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_use": self._in_use,
+            "waiting": len(self._waiters),
+            "throttles": self._throttles,
+            "decreases": self._decreases,
+        }
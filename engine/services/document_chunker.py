@@ -0,0 +1,213 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from models import EmployeeTimesheet
+from services.table_serializer import TableSerializer
+try:
+    import fitz  # PyMuPDF
+except Exception:
+    fitz = None
+
+
+# Formats the chunker reads through the table serializer
+TABLE_FORMATS = ("xlsx", "xls", "docx", "html", "csv")
+# Formats sent to the model as the original file unless they need splitting
+NATIVE_FORMATS = ("csv",)
+# Rows scanned at the top of a table when looking for its header row
+HEADER_SCAN_ROWS = 10
+
+
+def timesheet_key(timesheet: EmployeeTimesheet) -> Optional[Tuple]:
+    """Deduplication key: employee name plus period and week, or None when the entry has no name"""
+    name = (timesheet.employee_name or timesheet.client_name or "").strip().casefold()
+    if not name:
+        return None
+    period = " ".join((timesheet.period or "").casefold().split())
+    return (" ".join(name.split()), period, timesheet.week_start, timesheet.week_end)
+
+
+def hours_signature(timesheet: EmployeeTimesheet) -> Tuple:
+    """The hours an entry reports, to tell a repeated entry from another part of the same week"""
+    return timesheet.total_hours, tuple((day.day, day.hours) for day in timesheet.week_hours or ())
+
+
+def combine_timesheets(first: EmployeeTimesheet, second: EmployeeTimesheet) -> EmployeeTimesheet:
+    """One entry with the day-by-day sum of two partial entries for the same employee and week"""
+    days: Dict[str, float] = {}
+    for day in (first.week_hours or []) + (second.week_hours or []):
+        days[day.day] = days.get(day.day, 0.0) + day.hours
+    fields = first.model_dump()
+    for name, value in second.model_dump().items():
+        if fields.get(name) is None:
+            fields[name] = value
+    fields["week_hours"] = [{"day": day, "hours": round(hours, 2)} for day, hours in days.items()] or None
+    fields["total_hours"] = round(first.total_hours + second.total_hours, 2)
+    return EmployeeTimesheet(**fields)
+
+
+def merge_timesheets(results: Iterable[List[EmployeeTimesheet]]) -> List[EmployeeTimesheet]:
+    """
+    Concatenate per-chunk results in chunk order, merging employees split across chunks
+
+    When a later chunk returns an entry whose key an earlier chunk already had, the two
+    are parts of one employee's week (their rows fell on both sides of a split) and
+    their days are summed into the earlier entry. A part identical to one already
+    merged is a repeat and is dropped, so it is not counted twice. Entries that share
+    a key within one chunk are kept as the model returned them.
+    """
+    merged: List[EmployeeTimesheet] = []
+    positions: Dict[Tuple, int] = {}  # key -> index in merged, for keys of earlier chunks
+    parts: Dict[Tuple, set] = {}  # key -> hours signatures already merged
+    for timesheets in results:
+        new_positions: Dict[Tuple, int] = {}
+        for timesheet in timesheets:
+            key = timesheet_key(timesheet)
+            if key is None or key not in positions:
+                if key is not None:
+                    new_positions.setdefault(key, len(merged))
+                    parts.setdefault(key, set()).add(hours_signature(timesheet))
+                merged.append(timesheet)
+                continue
+            signature = hours_signature(timesheet)
+            if signature in parts[key]:
+                continue
+            parts[key].add(signature)
+            merged[positions[key]] = combine_timesheets(merged[positions[key]], timesheet)
+        for key, position in new_positions.items():
+            positions.setdefault(key, position)
+    return merged
+
+
+class DocumentChunker:
+    """Prepare a document for the model, splitting oversized ones into parts.
+
+    Each part is extracted by its own model call, so the output of any single call
+    stays well inside ``maxTokens`` and large rosters are processed in parallel.
+
+    * PDFs with more than ``max_pages`` pages are split into page ranges.
+    * Spreadsheets, CSV, DOCX and HTML are read as tables (via ``TableSerializer``)
+      and split by sheet and row range into parts of at most ``max_rows`` rows. Every
+      part repeats the sheet heading, any title lines and the table's header row.
+
+    A limit of 0 disables splitting for that kind of document. Without a serializer,
+    table formats are sent as the original file.
+    """
+
+    def __init__(self, serializer: Optional[TableSerializer] = None, max_rows: int = 0, max_pages: int = 0):
+        self.serializer = serializer
+        self.max_rows = max(0, int(max_rows))
+        self.max_pages = max(0, int(max_pages))
+
+    def chunk(self, content: bytes, doc_format: str) -> List[Dict]:
+        """
+        Split a document into model-ready parts
+
+        Args:
+            content: Document bytes
+            doc_format: Bedrock document format (pdf, xlsx, csv, ...)
+
+        Returns:
+            List of ``{"content", "format", "label"}`` dicts; a single entry when the
+            document is sent whole
+        """
+        whole = [{"content": content, "format": doc_format, "label": "document"}]
+        if doc_format == "pdf":
+            return self._pdf_chunks(content) or whole
+        if self.serializer is None or doc_format not in TABLE_FORMATS:
+            return whole
+
+        texts = self._table_chunks(self.serializer.blocks(content, doc_format))
+        if not texts or (doc_format in NATIVE_FORMATS and len(texts) == 1):
+            return whole
+        if len(texts) > 1:
+            logger.info("✂️ Split {} into {} chunk(s) of up to {} rows", doc_format, len(texts), self.max_rows)
+        return [
+            {"content": text.encode("utf-8"), "format": "txt", "label": label}
+            for label, text in texts
+        ]
+
+    def _pdf_chunks(self, content: bytes) -> List[Dict]:
+        if not self.max_pages or fitz is None:
+            return []
+        doc = fitz.open(stream=content, filetype="pdf")
+        try:
+            page_count = len(doc)
+            if page_count <= self.max_pages:
+                return []
+            chunks = []
+            for start in range(0, page_count, self.max_pages):
+                end = min(page_count, start + self.max_pages) - 1
+                part = fitz.open()
+                try:
+                    part.insert_pdf(doc, from_page=start, to_page=end)
+                    chunks.append({
+                        "content": part.tobytes(garbage=2, deflate=True),
+                        "format": "pdf",
+                        "label": f"pages {start + 1}-{end + 1}",
+                    })
+                finally:
+                    part.close()
+        finally:
+            doc.close()
+        logger.info("✂️ Split {}-page PDF into {} chunk(s) of up to {} pages", page_count, len(chunks), self.max_pages)
+        return chunks
+
+    def _table_chunks(self, blocks: List) -> List[Tuple[str, str]]:
+        """Pack blocks into (label, text) parts of at most ``max_rows`` table rows"""
+        chunks: List[Tuple[str, str]] = []
+        parts: List[str] = []
+        rows_in_chunk = 0
+        heading = None
+        label = "document"
+
+        def flush() -> None:
+            nonlocal parts, rows_in_chunk
+            if rows_in_chunk:
+                chunks.append((label, "\n\n".join(parts)))
+            elif parts and chunks:
+                # Trailing text only: attach it to the last chunk
+                last_label, last_text = chunks[-1]
+                chunks[-1] = (last_label, last_text + "\n\n" + "\n\n".join(parts))
+            elif parts:
+                chunks.append((label, "\n\n".join(parts)))
+            parts, rows_in_chunk = [], 0
+
+        for block in blocks:
+            if isinstance(block, str):
+                if block.startswith("## Sheet:"):
+                    heading = block
+                parts.append(block)
+                continue
+
+            rows = self.serializer.clean_rows(block)
+            if not rows:
+                continue
+            header_index = self._header_index(rows)
+            preamble, header, body = rows[:header_index], rows[header_index], rows[header_index + 1:]
+            sheet = heading[len("## Sheet:"):].strip() if heading else None
+
+            if not self.max_rows or len(body) <= self.max_rows - rows_in_chunk:
+                parts.append(self.serializer.render_block(rows))
+                rows_in_chunk += len(body)
+                label = f"sheet {sheet}" if sheet else label
+                continue
+
+            for start in range(0, len(body), self.max_rows):
+                if rows_in_chunk:
+                    flush()
+                piece = body[start:start + self.max_rows]
+                label = (f"sheet {sheet} " if sheet else "") + f"rows {start + 1}-{start + len(piece)}"
+                if heading and heading not in parts:
+                    parts.append(heading)
+                parts.append(self.serializer.render_block(preamble + [header] + piece))
+                rows_in_chunk += len(piece)
+            if rows_in_chunk >= self.max_rows:
+                flush()
+        flush()
+        return chunks
+
+    @staticmethod
+    def _header_index(rows: List[List[str]]) -> int:
+        """Treat the widest of the first rows as the header; shorter rows above it are titles"""
+        candidates = rows[:HEADER_SCAN_ROWS]
+        widest = max(len([c for c in row if c]) for row in candidates)
+        return next(i for i, row in enumerate(candidates) if len([c for c in row if c]) == widest)
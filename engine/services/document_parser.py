@@ -30,18 +30,23 @@ except Exception:
                     break
             return chunks
 from typing import List, Dict
+import asyncio
 import os
-import tempfile
+import time
 from pathlib import Path
 from loguru import logger
 import pandas as pd
 from PIL import Image
 import numpy as np
-import cv2
-import boto3
 from botocore.exceptions import ClientError
 import json
 from config import get_settings
+from services.bedrock_client import get_bedrock_client
+from services.bedrock_invoker import get_bedrock_invoker
+from services.table_serializer import TableSerializer
+from utils.image_policy import ImagePolicy
+from utils.render_pool import get_render_pool, render_pool_size
+from utils.tracing import span
 import io
 try:
     import fitz  # PyMuPDF
@@ -61,6 +66,72 @@ except Exception:
     logger.warning("Document conversion libraries not available. DOC/XLS conversion will be skipped.")
 
 
+def _render_pdf_page_range(file_path: str, page_indexes: List[int], dpi: int) -> List[tuple]:
+    """Render a set of PDF pages to PNG bytes (runs in a render pool process).
+
+    Returns a list of (page_index, png_bytes, render_ms) tuples.
+    """
+    import fitz  # PyMuPDF; imported here so pool processes do not depend on module state
+    rendered = []
+    doc = fitz.open(file_path)
+    try:
+        zoom = dpi / 72.0
+        mat = fitz.Matrix(zoom, zoom)
+        for page_index in page_indexes:
+            started = time.perf_counter()
+            pix = doc.load_page(page_index).get_pixmap(matrix=mat, alpha=False)
+            rendered.append((page_index, pix.tobytes("png"), (time.perf_counter() - started) * 1000))
+    finally:
+        doc.close()
+    return rendered
+
+
+# Lowest DPI used when fitting a PDF page to the image policy
+MIN_RENDER_DPI = 72
+# Margin (points) kept around the detected content area of a page
+CONTENT_MARGIN_PT = 12
+
+
+def _page_content_rect(page):
+    """Bounding box of everything drawn on a PDF page, or the full page if it is blank"""
+    import fitz
+    content = fitz.Rect()
+    for _, bbox in page.get_bboxlog():
+        rect = fitz.Rect(bbox)
+        if not rect.is_empty and not rect.is_infinite:
+            content |= rect
+    content &= page.rect
+    if content.is_empty:
+        return page.rect
+    return (content + (-CONTENT_MARGIN_PT, -CONTENT_MARGIN_PT, CONTENT_MARGIN_PT, CONTENT_MARGIN_PT)) & page.rect
+
+
+def _render_pdf_page_fitted(file_path: str, page_index: int, policy: ImagePolicy | None, max_dpi: int) -> tuple:
+    """Render one PDF page in process at the DPI its content needs.
+
+    The page is clipped to its content area and the DPI is chosen so that area lands
+    at the image policy's target size (capped at ``max_dpi``), so the rendered image
+    rarely needs resizing afterwards. Without a policy the page renders at ``max_dpi``.
+
+    Returns (PIL image, dpi).
+    """
+    import fitz
+    doc = fitz.open(file_path)
+    try:
+        page = doc.load_page(page_index)
+        clip = _page_content_rect(page)
+        if policy is not None:
+            dpi = min(max_dpi, max(MIN_RENDER_DPI, 72.0 * policy.fit_scale(clip.width, clip.height)))
+        else:
+            dpi = max_dpi
+        zoom = dpi / 72.0
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    finally:
+        doc.close()
+    return img, round(dpi, 1)
+
+
 class DocumentParser:
     """Handle parsing of different document types"""
     
@@ -70,27 +141,12 @@ class DocumentParser:
             chunk_overlap=200,
             length_function=len,
         )
-        # Initialize Bedrock client (boto3). If AWS creds are provided in env, boto3 will use them.
         self.settings = get_settings()
-        self.bedrock_runtime = None
-        try:
-            # If explicit AWS credentials provided in settings, pass them; otherwise rely on default chain
-            if self.settings.AWS_ACCESS_KEY_ID and self.settings.AWS_SECRET_ACCESS_KEY:
-                self.bedrock_runtime = boto3.client(
-                    service_name='bedrock-runtime',
-                    region_name=self.settings.AWS_REGION,
-                    aws_access_key_id=self.settings.AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=self.settings.AWS_SECRET_ACCESS_KEY,
-                )
-            else:
-                self.bedrock_runtime = boto3.client(
-                    service_name='bedrock-runtime',
-                    region_name=self.settings.AWS_REGION,
-                )
-            logger.info("Initialized Bedrock runtime client for IDP")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Bedrock client: {e}")
-            self.bedrock_runtime = None
+        self.invoker = get_bedrock_invoker()
+        self.image_policy = ImagePolicy.from_settings(self.settings)
+        self.table_serializer = TableSerializer(self.settings.TABLE_SERIALIZATION_FORMAT)
+        # Shared, pooled client (see services.bedrock_client)
+        self.bedrock_runtime = get_bedrock_client()
     
     async def parse_document(self, file_path: str, file_extension: str) -> str:
         """
@@ -109,7 +165,7 @@ class DocumentParser:
             # Preprocess files based on type
             processed_file_path = await self._preprocess_document(file_path, file_extension)
             
-            # Analyze the processed document (now always an upscaled PNG)
+            # Analyze the processed document (now always an image)
             text = await self.analyze_document(processed_file_path)
             
             # Clean up temporary processed file if different from original
@@ -129,44 +185,56 @@ class DocumentParser:
     
     async def _preprocess_document(self, file_path: str, file_extension: str) -> str:
         """
-        Preprocess document based on type, converting to upscaled PNG for optimal OCR
+        Preprocess document based on type: structured documents become compact text,
+        everything else an image sized for the model
         
         Args:
             file_path: Path to the document
             file_extension: File extension
             
         Returns:
-            Path to processed PNG file
+            Path to processed text or image file
         """
         try:
+            # Spreadsheets, CSV, HTML and DOCX tables are sent as text, not rasterised
+            if self.settings.TABLE_SERIALIZATION_ENABLED and self.table_serializer.supports(file_extension):
+                if file_extension in ['txt', 'md']:
+                    return file_path
+                try:
+                    return await self._serialize_tables(file_path, file_extension)
+                except Exception as e:
+                    logger.warning(f"Table serialization failed, falling back to image conversion: {e}")
+            
             # Document formats that need conversion to PDF first
             if file_extension in ['doc', 'docx']:
                 logger.info("Converting Word document to PDF...")
                 pdf_path = await self._convert_word_to_pdf(file_path)
-                png_path = await self._convert_pdf_to_png(pdf_path, upscale=self.settings.ENABLE_IMAGE_UPSCALING, dpi=self.settings.PDF_TO_PNG_DPI)
+                png_path = await self._convert_pdf_to_png(pdf_path, apply_policy=self.settings.IMAGE_POLICY_ENABLED, dpi=self.settings.PDF_TO_PNG_DPI)
                 os.remove(pdf_path)  # Clean up intermediate PDF
                 return png_path
                 
             elif file_extension in ['xls', 'xlsx']:
                 logger.info("Converting Excel spreadsheet to PDF...")
                 pdf_path = await self._convert_excel_to_pdf(file_path)
-                png_path = await self._convert_pdf_to_png(pdf_path, upscale=self.settings.ENABLE_IMAGE_UPSCALING, dpi=self.settings.PDF_TO_PNG_DPI)
+                png_path = await self._convert_pdf_to_png(pdf_path, apply_policy=self.settings.IMAGE_POLICY_ENABLED, dpi=self.settings.PDF_TO_PNG_DPI)
                 os.remove(pdf_path)  # Clean up intermediate PDF
                 return png_path
                 
             elif file_extension == 'pdf':
-                logger.info("Converting PDF to upscaled PNG...")
-                return await self._convert_pdf_to_png(file_path, upscale=self.settings.ENABLE_IMAGE_UPSCALING, dpi=self.settings.PDF_TO_PNG_DPI)
+                logger.info("Converting PDF to PNG...")
+                return await self._convert_pdf_to_png(file_path, apply_policy=self.settings.IMAGE_POLICY_ENABLED, dpi=self.settings.PDF_TO_PNG_DPI)
                 
             elif file_extension in ['png', 'jpg', 'jpeg', 'gif', 'webp']:
-                logger.info("Upscaling image...")
-                return await self._upscale_image(file_path, method=self.settings.UPSCALING_METHOD, scale_factor=self.settings.UPSCALING_SCALE_FACTOR)
+                if not self.settings.IMAGE_POLICY_ENABLED:
+                    return file_path
+                logger.info("Applying image policy...")
+                return await self._apply_image_policy(file_path)
                 
             else:
                 # For text-based formats, convert to PDF then PNG
                 logger.info(f"Converting {file_extension} document to PDF...")
                 pdf_path = await self._convert_text_to_pdf(file_path, file_extension)
-                png_path = await self._convert_pdf_to_png(pdf_path, upscale=self.settings.ENABLE_IMAGE_UPSCALING, dpi=self.settings.PDF_TO_PNG_DPI)
+                png_path = await self._convert_pdf_to_png(pdf_path, apply_policy=self.settings.IMAGE_POLICY_ENABLED, dpi=self.settings.PDF_TO_PNG_DPI)
                 os.remove(pdf_path)  # Clean up intermediate PDF
                 return png_path
                 
@@ -176,6 +244,16 @@ class DocumentParser:
             logger.warning("Preprocessing failed, using original file")
             return file_path
     
+    async def _serialize_tables(self, file_path: str, file_extension: str) -> str:
+        """Write the document's tables and text as a TSV/markdown text file"""
+        content = await asyncio.to_thread(Path(file_path).read_bytes)
+        text = await asyncio.to_thread(self.table_serializer.serialize, content, file_extension)
+        suffix = 'md' if self.table_serializer.style == 'markdown' else 'txt'
+        text_path = file_path.rsplit('.', 1)[0] + f'_serialized.{suffix}'
+        await asyncio.to_thread(Path(text_path).write_text, text, encoding='utf-8')
+        logger.info(f"Serialized {file_extension} to text: {text_path} ({len(content):,} -> {len(text.encode('utf-8')):,} bytes)")
+        return text_path
+    
     async def _convert_word_to_pdf(self, file_path: str) -> str:
         """Convert Word document to PDF"""
         try:
@@ -310,113 +388,69 @@ class DocumentParser:
             logger.error(f"Error converting {file_extension} to PDF: {e}")
             raise
     
-    async def _convert_pdf_to_png(self, pdf_path: str, upscale: bool = True, dpi: int = 300) -> str:
-        """Convert PDF to high-resolution PNG"""
+    async def _convert_pdf_to_png(self, pdf_path: str, apply_policy: bool = True, dpi: int = 300, page_index: int = 0) -> str:
+        """Render one PDF page (the first by default) to an image, sized by the image policy.
+        
+        Rendering happens in process with PyMuPDF and touches only the requested page;
+        ``dpi`` is the upper bound, the actual DPI follows the page's content size.
+        """
+        if not fitz:
+            raise RuntimeError("PyMuPDF (fitz) not installed; cannot render PDF to PNG.")
         try:
-            from pdf2image import convert_from_path
-            
-            # Create temporary PNG path
-            png_path = pdf_path.rsplit('.', 1)[0] + '_highres.png'
-            
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, dpi=dpi, fmt='png')
+            policy = self.image_policy if apply_policy else None
+            with span("render_pdf", page=page_index + 1, max_dpi=dpi):
+                img, render_dpi = await asyncio.to_thread(_render_pdf_page_fitted, pdf_path, page_index, policy, dpi)
             
-            if not images:
-                raise ValueError("No images extracted from PDF")
-            
-            # Use first page (or combine multiple pages if needed)
-            img = images[0]
-            
-            # Upscale if requested
-            if upscale:
-                img = await self._upscale_image_from_pil(img)
+            if policy is not None:
+                content, image_format, report = await asyncio.to_thread(policy.apply_to_image, img)
+                self._log_image_report(report)
+            else:
+                buffer = io.BytesIO()
+                img.save(buffer, 'PNG')
+                content, image_format = buffer.getvalue(), 'png'
             
             # Save the image
-            img.save(png_path, 'PNG')
-            logger.info(f"Converted PDF to PNG: {png_path} (DPI: {dpi})")
-            return png_path
+            image_path = pdf_path.rsplit('.', 1)[0] + '_highres.' + ('jpg' if image_format == 'jpeg' else image_format)
+            await asyncio.to_thread(Path(image_path).write_bytes, content)
+            logger.info(f"Converted PDF page {page_index + 1} to {image_format.upper()}: {image_path} (DPI: {render_dpi})")
+            return image_path
             
         except Exception as e:
             logger.error(f"Error converting PDF to PNG: {e}")
             raise
     
-    async def _upscale_image(self, image_path: str, method: str = 'lanczos', scale_factor: float = 2.0) -> str:
-        """Upscale an image using various methods"""
+    async def _apply_image_policy(self, image_path: str) -> str:
+        """Resize/re-encode an image file with the adaptive image policy.
+        
+        Returns the path of the prepared image, or ``image_path`` itself when the image
+        already satisfies the policy or cannot be processed.
+        """
         try:
-            # Read image
-            img = cv2.imread(image_path)
-            if img is None:
-                # Fallback to PIL
-                pil_img = Image.open(image_path)
-                return await self._upscale_image_from_pil(pil_img, method, scale_factor, save_path=image_path)
-            
-            height, width = img.shape[:2]
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            
-            # Choose interpolation method
-            if method == 'lanczos':
-                interpolation = cv2.INTER_LANCZOS4
-            elif method == 'cubic':
-                interpolation = cv2.INTER_CUBIC
-            elif method == 'linear':
-                interpolation = cv2.INTER_LINEAR
-            else:
-                interpolation = cv2.INTER_LANCZOS4
-            
-            # Upscale
-            upscaled = cv2.resize(img, (new_width, new_height), interpolation=interpolation)
-            
-            # Create output path
-            output_path = image_path.rsplit('.', 1)[0] + '_upscaled.png'
-            
-            # Save
-            cv2.imwrite(output_path, upscaled)
-            logger.info(f"Upscaled image: {image_path} -> {output_path} ({width}x{height} -> {new_width}x{new_height})")
+            content = await asyncio.to_thread(Path(image_path).read_bytes)
+            source_format = Path(image_path).suffix.lower().lstrip('.').replace('jpg', 'jpeg')
+            output, image_format, report = await asyncio.to_thread(self.image_policy.apply, content, source_format)
+            self._log_image_report(report)
+            if output is content:
+                return image_path
+            
+            output_path = image_path.rsplit('.', 1)[0] + '_prepared.' + ('jpg' if image_format == 'jpeg' else image_format)
+            await asyncio.to_thread(Path(output_path).write_bytes, output)
             return output_path
             
         except Exception as e:
-            logger.error(f"Error upscaling image: {e}")
-            # Return original if upscaling fails
+            logger.error(f"Error applying image policy: {e}")
+            # Return original if preprocessing fails
             return image_path
     
-    async def _upscale_image_from_pil(self, pil_img: Image.Image, method: str = 'lanczos', 
-                                    scale_factor: float = 2.0, save_path: str = None) -> str:
-        """Upscale image using PIL"""
-        try:
-            width, height = pil_img.size
-            new_width = int(width * scale_factor)
-            new_height = int(height * scale_factor)
-            
-            # Choose resampling filter
-            if method == 'lanczos':
-                resample = Image.Resampling.LANCZOS
-            elif method == 'bicubic':
-                resample = Image.Resampling.BICUBIC
-            elif method == 'bilinear':
-                resample = Image.Resampling.BILINEAR
-            else:
-                resample = Image.Resampling.LANCZOS
-            
-            # Upscale
-            upscaled = pil_img.resize((new_width, new_height), resample)
-            
-            # Create output path
-            if save_path:
-                output_path = save_path.rsplit('.', 1)[0] + '_upscaled.png'
-            else:
-                # Create temporary file
-                temp_fd, output_path = tempfile.mkstemp(suffix='_upscaled.png')
-                os.close(temp_fd)
-            
-            # Save
-            upscaled.save(output_path, 'PNG')
-            logger.info(f"Upscaled image with PIL: {width}x{height} -> {new_width}x{new_height}")
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"Error upscaling image with PIL: {e}")
-            raise
+    @staticmethod
+    def _log_image_report(report: Dict) -> None:
+        width, height = report["original_size"]
+        out_width, out_height = report["output_size"]
+        logger.info(
+            f"Image policy: {width}x{height} -> {out_width}x{out_height} {report['output_format']}, "
+            f"{report['output_bytes']:,} bytes, ~{report['output_image_tokens']} image tokens "
+            f"({report['preprocess_ms']} ms)"
+        )
 
     async def _parse_image(self, file_path: str) -> str:
         """Deprecated: image parsing should use `analyze_document`. Kept for compatibility."""
@@ -467,7 +501,8 @@ class DocumentParser:
                 raise RuntimeError("No model id configured (CLAUDE_MODEL_ID, BEDROCK_CLAUDE_MODEL or LLM_MODEL_ID)")
 
             logger.info(f"Sending document to Bedrock model {model_id}")
-            response = self.bedrock_runtime.converse(
+            response = await self.invoker.converse(
+                self.bedrock_runtime,
                 modelId=model_id,
                 messages=[message],
                 inferenceConfig={
@@ -573,7 +608,8 @@ class DocumentParser:
             model_id = self.settings.CLAUDE_MODEL_ID or self.settings.BEDROCK_CLAUDE_MODEL or self.settings.LLM_MODEL_ID
             if not model_id:
                 raise RuntimeError("No model id configured (CLAUDE_MODEL_ID, BEDROCK_CLAUDE_MODEL or LLM_MODEL_ID)")
-            response = self.bedrock_runtime.converse(
+            response = await self.invoker.converse(
+                self.bedrock_runtime,
                 modelId=model_id,
                 messages=[message],
                 inferenceConfig={
@@ -592,38 +628,79 @@ class DocumentParser:
             logger.error(f"Error analyzing image bytes: {e}")
             raise
 
-    def _pdf_to_png_pages(self, file_path: str, dpi: int = 180) -> List[bytes]:
+    async def _pdf_to_png_pages(self, file_path: str, dpi: int = 180) -> List[Dict]:
+        """Render every PDF page to PNG, spreading the pages over the render pool processes.
+
+        Returns one ``{"page", "image", "render_ms"}`` dict per page, in page order.
+        """
         if not fitz:
             raise RuntimeError("PyMuPDF (fitz) not installed; cannot render PDF to PNG.")
         try:
             doc = fitz.open(file_path)
-            images: List[bytes] = []
-            for page_index in range(len(doc)):
-                page = doc.load_page(page_index)
-                zoom = dpi / 72.0
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                img_bytes = pix.tobytes("png")
-                images.append(img_bytes)
+            page_count = len(doc)
             doc.close()
-            logger.info(f"Rendered {len(images)} PNG page(s) from PDF")
-            return images
+            if page_count == 0:
+                return []
+
+            loop = asyncio.get_running_loop()
+            if page_count == 1:
+                # Not worth a process hop
+                chunks = [await asyncio.to_thread(_render_pdf_page_range, file_path, [0], dpi)]
+            else:
+                pool = get_render_pool()
+                workers = min(page_count, render_pool_size())
+                # Interleave pages so expensive pages are not all in one process
+                ranges = [list(range(page_count))[i::workers] for i in range(workers)]
+                chunks = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _render_pdf_page_range, file_path, pages, dpi)
+                    for pages in ranges
+                ))
+
+            pages = sorted(
+                ({"page": index + 1, "image": image, "render_ms": round(ms, 1)} for chunk in chunks for index, image, ms in chunk),
+                key=lambda p: p["page"]
+            )
+            logger.info(f"Rendered {len(pages)} PNG page(s) from PDF")
+            return pages
         except Exception as e:
             logger.error(f"Failed to render PDF to PNG: {e}")
             raise
 
+    async def analyze_document_pages(self, file_path: str, user_prompt: str | None = None) -> List[Dict]:
+        """Render a PDF and analyze its pages concurrently (up to ``PAGE_ANALYSIS_CONCURRENCY``).
+
+        Returns one dict per page in page order with ``page``, ``text``, ``render_ms``,
+        ``analysis_ms`` and ``error`` (None on success).
+        """
+        pages = await self._pdf_to_png_pages(file_path)
+        slots = asyncio.Semaphore(max(1, self.settings.PAGE_ANALYSIS_CONCURRENCY))
+
+        async def analyze(page: Dict) -> Dict:
+            async with slots:
+                started = time.perf_counter()
+                text, error = "", None
+                try:
+                    text = await self.analyze_image_bytes(page["image"], "png", user_prompt)
+                except Exception as e:
+                    logger.warning(f"Skipping page {page['page']} due to error: {e}")
+                    error = str(e)
+                return {
+                    "page": page["page"],
+                    "text": text,
+                    "render_ms": page["render_ms"],
+                    "analysis_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "error": error,
+                }
+
+        # gather() keeps page order
+        results = await asyncio.gather(*(analyze(page) for page in pages))
+        for result in results:
+            logger.info(f"Page {result['page']}: render {result['render_ms']} ms, analysis {result['analysis_ms']} ms")
+        return list(results)
+
     async def analyze_document_pages_as_png(self, file_path: str, user_prompt: str | None = None) -> str:
         ext = Path(file_path).suffix.lower().lstrip('.')
         if ext != 'pdf':
             return await self.analyze_document(file_path, user_prompt)
-        pages = self._pdf_to_png_pages(file_path)
-        if not pages:
-            return ""
-        aggregated = []
-        for idx, img in enumerate(pages, start=1):
-            try:
-                text = await self.analyze_image_bytes(img, "png", user_prompt)
-                aggregated.append(text)
-            except Exception as e:
-                logger.warning(f"Skipping page {idx} due to error: {e}")
-        return "\n\n".join(aggregated).strip()
+        results = await self.analyze_document_pages(file_path, user_prompt)
+        return "\n\n".join(r["text"] for r in results if r["text"]).strip()
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+from loguru import logger
+from config import get_settings
+
+
+class ExtractionCache:
+    """Two-tier cache for extraction results, keyed by document content.
+
+    Tier 1 is a size-bounded in-memory LRU. Tier 2 is an optional SQLite database that
+    survives restarts and is shared by all workers on the host. Both tiers honour the
+    same TTL; the disk tier evicts least-recently-used rows once it exceeds its size.
+
+    Entries are stored as plain employee dicts so every hit builds fresh model objects.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, db_path: str = "", max_db_entries: int = 10000):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = int(ttl_seconds)
+        self.max_db_entries = max(1, int(max_db_entries))
+        self._memory: "OrderedDict[str, tuple[float, str, List[Dict]]]" = OrderedDict()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    """CREATE TABLE IF NOT EXISTS extraction_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        content_hash TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )"""
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_hash ON extraction_cache (content_hash)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_access ON extraction_cache (last_access)")
+                self._db.commit()
+                logger.info(f"Extraction cache disk tier at {db_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ Extraction cache disk tier unavailable, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def hash_content(content: bytes) -> str:
+        """SHA-256 hex digest of the document bytes"""
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, model_id: str, prompt_version: str) -> str:
+        """Cache key: the same bytes only hit when model and prompt are unchanged too"""
+        return f"{content_hash}:{model_id}:{prompt_version}"
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        """Look up a key in memory, then on disk. Disk hits are promoted to memory."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, content_hash, employees = entry
+            if not self._expired(created_at, now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return employees
+            del self._memory[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key, now)
+            if row is not None:
+                created_at, content_hash, employees = row
+                self._remember(key, created_at, content_hash, employees)
+                self.hits += 1
+                return employees
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, content_hash: str, employees: List[Dict]) -> None:
+        """Store an extraction result in both tiers"""
+        now = time.time()
+        self._remember(key, now, content_hash, employees)
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._db_set, key, content_hash, json.dumps(employees), now)
+            except Exception as e:
+                logger.warning(f"Could not persist cache entry: {e}")
+
+    async def invalidate(self, content_hash: Optional[str] = None) -> int:
+        """Drop entries for one document (all models/prompt versions), or everything"""
+        if content_hash is None:
+            removed = len(self._memory)
+            self._memory.clear()
+        else:
+            keys = [k for k, (_, h, _) in self._memory.items() if h == content_hash]
+            for k in keys:
+                del self._memory[k]
+            removed = len(keys)
+        if self._db is not None:
+            removed = max(removed, await asyncio.to_thread(self._db_invalidate, content_hash))
+        logger.info(f"Invalidated {removed} extraction cache entr{'y' if removed == 1 else 'ies'}")
+        return removed
+
+    async def stats(self) -> Dict:
+        """Cache counters for the admin API"""
+        disk_entries = None
+        if self._db is not None:
+            disk_entries = await asyncio.to_thread(self._db_count)
+        return {
+            "memory_entries": len(self._memory),
+            "memory_max_entries": self.max_entries,
+            "disk_entries": disk_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _remember(self, key: str, created_at: float, content_hash: str, employees: List[Dict]) -> None:
+        self._memory[key] = (created_at, content_hash, employees)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str, now: float):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT content_hash, payload, created_at FROM extraction_cache WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            content_hash, payload, created_at = row
+            if self._expired(created_at, now):
+                self._db.execute("DELETE FROM extraction_cache WHERE cache_key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE extraction_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            self._db.commit()
+        return created_at, content_hash, json.loads(payload)
+
+    def _db_set(self, key: str, content_hash: str, payload: str, now: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extraction_cache (cache_key, content_hash, payload, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, content_hash, payload, now, now),
+            )
+            if self.ttl_seconds > 0:
+                self._db.execute("DELETE FROM extraction_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            # Evict least recently used rows beyond the size bound
+            self._db.execute(
+                "DELETE FROM extraction_cache WHERE cache_key IN ("
+                "SELECT cache_key FROM extraction_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_db_entries,),
+            )
+            self._db.commit()
+
+    def _db_count(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+
+    def _db_invalidate(self, content_hash: Optional[str]) -> int:
+        with self._db_lock:
+            if content_hash is None:
+                cursor = self._db.execute("DELETE FROM extraction_cache")
+            else:
+                cursor = self._db.execute("DELETE FROM extraction_cache WHERE content_hash = ?", (content_hash,))
+            self._db.commit()
+            return cursor.rowcount
+
+
+@lru_cache()
+def get_extraction_cache() -> ExtractionCache:
+    """Get the process-wide extraction cache"""
+    settings = get_settings()
+    return ExtractionCache(
+        max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.EXTRACTION_CACHE_TTL_SECONDS,
+        db_path=settings.EXTRACTION_CACHE_DB_PATH,
+        max_db_entries=settings.EXTRACTION_CACHE_DB_MAX_ENTRIES,
+    )
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+
+# Job lifecycle states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+FileProcessor = Callable[[Dict], Awaitable[Dict]]
+
+
+def _failure_result(filename: str, detail: str) -> Dict:
+    """Stored result for a file that could not be extracted, in the TimesheetResponse JSON shape"""
+    return {
+        "success": False,
+        "message": f"Error: {detail}",
+        "data": [],
+        "metadata": {"filename": filename, "error": detail},
+        "processed_at": datetime.utcnow().isoformat(),
+    }
+
+
+class ExtractionJobManager:
+    """In-process extraction job queue drained by a fixed pool of worker tasks.
+
+    A job holds one or more saved uploads. Each file is queued separately so the files
+    of a large job are spread over all workers, and results are stored by file index
+    so they keep upload order. Throughput is set by ``worker_count``, independent of
+    how many clients are polling.
+
+    With ``db_path`` set, jobs are persisted to SQLite and unfinished files are queued
+    again on startup, as long as their saved upload still exists.
+    """
+
+    def __init__(self, processor: FileProcessor, worker_count: int, db_path: str = "", retention_seconds: int = 86400):
+        self.processor = processor
+        self.worker_count = max(1, int(worker_count))
+        self.retention_seconds = int(retention_seconds)
+        self._jobs: Dict[str, Dict] = {}
+        self._queue: "asyncio.Queue[tuple[str, int]]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    """CREATE TABLE IF NOT EXISTS extraction_jobs (
+                        job_id TEXT PRIMARY KEY,
+                        status TEXT NOT NULL,
+                        updated_at REAL NOT NULL,
+                        payload TEXT NOT NULL
+                    )"""
+                )
+                self._db.commit()
+                logger.info(f"Extraction jobs persisted to {db_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ Job persistence unavailable, keeping jobs in memory only: {e}")
+                self._db = None
+
+    async def start(self) -> None:
+        """Restore persisted jobs and start the worker pool"""
+        if self._db is not None:
+            await asyncio.to_thread(self._restore)
+        for index in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker(index), name=f"extraction-worker-{index}"))
+        logger.info(f"🧵 Started {self.worker_count} extraction worker(s)")
+
+    async def stop(self) -> None:
+        """Cancel workers; unfinished jobs stay persisted (if enabled) for the next start"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def submit(self, files: List[Dict]) -> Dict:
+        """
+        Create a job for already-saved uploads and queue its files
+
+        Args:
+            files: One dict per upload with at least ``path``, ``filename`` and ``extension``
+
+        Returns:
+            The new job record
+        """
+        await self._purge_expired()
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": JOB_QUEUED,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "files": files,
+            "results": [None] * len(files),
+        }
+        self._jobs[job["job_id"]] = job
+        await self._persist(job)
+        for index in range(len(files)):
+            self._queue.put_nowait((job["job_id"], index))
+        logger.info(f"📬 Queued job {job['job_id']} with {len(files)} file(s) (queue depth: {self._queue.qsize()})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Look up a job by id"""
+        return self._jobs.get(job_id)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, file_index = await self._queue.get()
+            try:
+                await self._run_file(job_id, file_index)
+            except Exception as e:
+                logger.error(f"Extraction worker {index} failed on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_file(self, job_id: str, file_index: int) -> None:
+        job = self._jobs.get(job_id)
+        if job is None or job["results"][file_index] is not None:
+            return
+        job_file = job["files"][file_index]
+        if job["status"] == JOB_QUEUED:
+            job["status"] = JOB_RUNNING
+            job["started_at"] = time.time()
+
+        try:
+            result = await self.processor(job_file)
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            logger.error(f"Error processing job file {job_file['filename']}: {detail}")
+            result = _failure_result(job_file["filename"], detail)
+
+        # Not in a finally block: a cancelled (shutdown) file keeps its upload for re-queueing
+        self._remove_upload(job_file)
+        job["results"][file_index] = result
+        if all(r is not None for r in job["results"]):
+            job["status"] = JOB_COMPLETED if any(r.get("success") for r in job["results"]) else JOB_FAILED
+            job["finished_at"] = time.time()
+            logger.info(f"🏁 Job {job_id} {job['status']}")
+        await self._persist(job)
+
+    @staticmethod
+    def _remove_upload(job_file: Dict) -> None:
+        path = job_file.get("path")
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except Exception as e:
+                logger.warning(f"Could not remove job upload {path}: {e}")
+
+    async def _purge_expired(self) -> None:
+        if self.retention_seconds <= 0:
+            return
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if expired and self._db is not None:
+            try:
+                await asyncio.to_thread(self._db_delete, expired)
+            except Exception as e:
+                logger.warning(f"Could not delete expired jobs: {e}")
+
+    async def _persist(self, job: Dict) -> None:
+        if self._db is None:
+            return
+        try:
+            await asyncio.to_thread(self._db_save, job["job_id"], job["status"], json.dumps(job, default=str))
+        except Exception as e:
+            logger.warning(f"Could not persist job {job['job_id']}: {e}")
+
+    def _db_save(self, job_id: str, status: str, payload: str) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extraction_jobs (job_id, status, updated_at, payload) VALUES (?, ?, ?, ?)",
+                (job_id, status, time.time(), payload),
+            )
+            self._db.commit()
+
+    def _db_delete(self, job_ids: List[str]) -> None:
+        with self._db_lock:
+            self._db.executemany("DELETE FROM extraction_jobs WHERE job_id = ?", [(j,) for j in job_ids])
+            self._db.commit()
+
+    def _restore(self) -> None:
+        with self._db_lock:
+            rows = self._db.execute("SELECT payload FROM extraction_jobs").fetchall()
+        requeued = 0
+        for (payload,) in rows:
+            job = json.loads(payload)
+            self._jobs[job["job_id"]] = job
+            if job["status"] in (JOB_COMPLETED, JOB_FAILED):
+                continue
+            for index, job_file in enumerate(job["files"]):
+                if job["results"][index] is not None:
+                    continue
+                if os.path.exists(job_file["path"]):
+                    self._queue.put_nowait((job["job_id"], index))
+                    requeued += 1
+                else:
+                    job["results"][index] = _failure_result(job_file["filename"], "upload was lost before processing")
+            if all(r is not None for r in job["results"]):
+                job["status"] = JOB_COMPLETED if any(r.get("success") for r in job["results"]) else JOB_FAILED
+                job["finished_at"] = time.time()
+                self._db_save(job["job_id"], job["status"], json.dumps(job, default=str))
+        logger.info(f"Restored {len(rows)} job(s), re-queued {requeued} file(s)")
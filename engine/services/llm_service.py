@@ -1,45 +1,35 @@
+import asyncio
+import hashlib
 import json
-import boto3
 from botocore.exceptions import ClientError
 from loguru import logger
-from typing import List
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 from config import get_settings
-from models import EmployeeTimesheet
+from models import EmployeeTimesheet, get_employee_list_adapter
+from services.bedrock_client import get_bedrock_client
+from services.bedrock_invoker import get_bedrock_invoker
+from services.document_chunker import DocumentChunker, hours_signature, merge_timesheets, timesheet_key
+from services.extraction_cache import ExtractionCache, get_extraction_cache
+from services.spreadsheet_extractor import SpreadsheetExtractor
+from services.table_serializer import TableSerializer
+from utils.image_policy import ImagePolicy
+from utils.log_config import log_payload
+from utils.json_stream import CONTAINER_KEYS, EmployeeStreamParser, locate_json
+from utils.output_schema import COMPACT_MARKERS, OUTPUT_SCHEMAS, expand_employee
+from utils.metrics import EXTRACTIONS, PAYLOAD_BYTES, observe_stage, record_bedrock_usage
+from utils.single_flight import SingleFlight
+from utils.tracing import span
 
 
-class LLMService:
-    """Unified service using ONLY Bedrock Claude for direct document analysis and JSON extraction.
-    
-    This replaces the multi-step pipeline with a single model call for faster processing.
-    """
+# Fields that mark a dict as an employee entry rather than a nested day/week record
+EMPLOYEE_KEYS = ("client_name", "employee_name", "client_id", "total_hours", "weeks") + COMPACT_MARKERS
 
-    def __init__(self):
-        self.settings = get_settings()
-        
-        # Initialize Bedrock client
-        self.bedrock_runtime = None
-        try:
-            if self.settings.AWS_ACCESS_KEY_ID and self.settings.AWS_SECRET_ACCESS_KEY:
-                self.bedrock_runtime = boto3.client(
-                    service_name='bedrock-runtime',
-                    region_name=self.settings.AWS_REGION,
-                    aws_access_key_id=self.settings.AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=self.settings.AWS_SECRET_ACCESS_KEY,
-                )
-            else:
-                self.bedrock_runtime = boto3.client(
-                    service_name='bedrock-runtime',
-                    region_name=self.settings.AWS_REGION,
-                )
-            logger.info("✅ Initialized Bedrock runtime client for unified document processing")
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to initialize Bedrock client: {e}")
-            self.bedrock_runtime = None
 
-    def _create_direct_analysis_prompt(self) -> str:
-        """Prompt for direct document analysis - extracts AND structures in one go."""
-        return """Analyze this timesheet document and extract ALL employee/client timesheet data.
+# Static extraction instructions, sent as the system prompt. Keep the text free of
+# per-request values: Bedrock prompt caching reuses the prefix up to the cache point
+# only when it is byte-for-byte identical.
+_PROMPT_TASK = """Analyze the timesheet document in the user's message and extract ALL employee/client timesheet data.
 
 YOUR TASK:
 1. Read and understand the document (image/PDF/text)
@@ -53,7 +43,9 @@ WHAT TO EXTRACT:
 - Any IDs or period information
 - Handle multiple employees if present
 
-OUTPUT FORMAT (JSON ONLY):
+"""
+
+EXTRACTION_SYSTEM_PROMPT = _PROMPT_TASK + """OUTPUT FORMAT (JSON ONLY):
 {
   "employees": [
     {
@@ -84,125 +76,681 @@ RULES:
 - Return empty array if NO timesheet data found: {"employees": []}
 - ONLY return valid JSON, nothing else"""
 
-    async def extract_timesheet_from_document(self, file_path: str, file_extension: str) -> List[EmployeeTimesheet]:
+# Compact wire schema (see utils.output_schema): positional hours and no nulls cut the
+# generated tokens per employee by roughly two thirds
+COMPACT_EXTRACTION_SYSTEM_PROMPT = _PROMPT_TASK + """OUTPUT FORMAT (compact JSON ONLY, no indentation):
+{"employees":[{"name":"Name Here","h":[8,7.5,8,8,6,0,0],"total":37.5}]}
+
+FIELDS:
+- name: employee/client name
+- h: hours for Mon, Tue, Wed, Thu, Fri, Sat, Sun, in that order (always 7 numbers)
+- total: total hours for the period
+- Only when present in the document: id (employee/client ID), employee (employee name if different from name), period (period label), start and end (week start/end dates, YYYY-MM-DD)
+- Never output null values: leave the key out instead
+
+RULES:
+- If day has no hours, use 0
+- Convert all time formats to decimal (8h30m = 8.5)
+- One entry per employee and week
+- Return {"employees":[]} if NO timesheet data found
+- ONLY return valid JSON, nothing else"""
+
+SYSTEM_PROMPTS = {"verbose": EXTRACTION_SYSTEM_PROMPT, "compact": COMPACT_EXTRACTION_SYSTEM_PROMPT}
+
+# Sent with the document itself; Bedrock requires a text block next to a document block
+EXTRACTION_USER_PROMPT = "Extract the timesheet data from this document as JSON."
+
+# Bedrock cache point marking everything before it (the system prompt) as cacheable
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+# Model id fragments of the Bedrock families that accept a cachePoint; other models
+# reject the request with a ValidationException
+PROMPT_CACHING_MODEL_FAMILIES = (
+    "claude-3-5-haiku", "claude-3-7-sonnet", "claude-sonnet-4", "claude-opus-4", "claude-haiku-4", "amazon.nova-",
+)
+
+
+class LLMService:
+    """Unified service using ONLY Bedrock Claude for direct document analysis and JSON extraction.
+    
+    This replaces the multi-step pipeline with a single model call for faster processing.
+    """
+
+    # Part of the extraction cache key, per output schema: prompt edits change the hash
+    # on their own; bump the prefix whenever response parsing changes
+    PROMPT_VERSIONS = {
+        schema: "v2-" + hashlib.sha256((prompt + EXTRACTION_USER_PROMPT).encode("utf-8")).hexdigest()[:12]
+        for schema, prompt in SYSTEM_PROMPTS.items()
+    }
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.invoker = get_bedrock_invoker()
+        self.cache = get_extraction_cache() if self.settings.EXTRACTION_CACHE_ENABLED else None
+        self.in_flight = SingleFlight() if self.settings.ENABLE_REQUEST_COALESCING else None
+        self.spreadsheet_extractor = SpreadsheetExtractor()
+        self.image_policy = ImagePolicy.from_settings(self.settings) if self.settings.IMAGE_POLICY_ENABLED else None
+        self.table_serializer = (
+            TableSerializer(self.settings.TABLE_SERIALIZATION_FORMAT) if self.settings.TABLE_SERIALIZATION_ENABLED else None
+        )
+        chunking = self.settings.ENABLE_CHUNKED_EXTRACTION
+        self.chunker = DocumentChunker(
+            self.table_serializer,
+            max_rows=self.settings.CHUNK_MAX_ROWS if chunking else 0,
+            max_pages=self.settings.CHUNK_MAX_PAGES if chunking else 0,
+        )
+        
+        # Shared, pooled client (see services.bedrock_client)
+        self.bedrock_runtime = get_bedrock_client()
+        # Models that rejected a cachePoint at runtime; they are called without one from then on
+        self.models_without_prompt_cache = set()
+
+    def _resolve_model_id(self) -> str:
+        """Determine the Bedrock model id from settings"""
+        model_id = (
+            self.settings.CLAUDE_MODEL_ID or 
+            self.settings.BEDROCK_CLAUDE_MODEL or 
+            self.settings.LLM_MODEL_ID
+        )
+        if not model_id:
+            raise RuntimeError("No model ID configured")
+        return model_id
+
+    def _resolve_output_schema(self, output_schema: Optional[str]) -> str:
+        """The requested output schema, defaulting to ``EXTRACTION_OUTPUT_SCHEMA``"""
+        schema = (output_schema or self.settings.EXTRACTION_OUTPUT_SCHEMA).lower()
+        if schema not in OUTPUT_SCHEMAS:
+            raise ValueError(f"Unknown output schema '{schema}', expected one of: {', '.join(OUTPUT_SCHEMAS)}")
+        return schema
+
+    async def extract_timesheet_from_document(
+        self,
+        file_path: str,
+        file_extension: str,
+        metadata: Optional[Dict] = None,
+        content_hash: Optional[str] = None,
+        output_schema: Optional[str] = None
+    ) -> List[EmployeeTimesheet]:
         """
         UNIFIED PIPELINE: Analyze document and extract structured timesheet data in ONE call.
         
         This replaces the old two-step process (IDP + LLM) with a single model call.
         Much faster and simpler!
+        
+        Reads the file and delegates to :meth:`extract_timesheet_from_bytes`.
         """
-        if not self.bedrock_runtime:
-            raise RuntimeError("❌ Bedrock runtime not initialized. Check AWS credentials.")
+        logger.debug("🚀 Starting UNIFIED document analysis: {}", file_path)
+        
+        try:
+            file_content = await asyncio.to_thread(Path(file_path).read_bytes)
+        except Exception as e:
+            logger.error(f"❌ Could not read document {file_path}: {e}")
+            raise
         
-        logger.info(f"🚀 Starting UNIFIED document analysis: {file_path}")
+        return await self.extract_timesheet_from_bytes(
+            file_content, file_extension, metadata=metadata, content_hash=content_hash, output_schema=output_schema
+        )
+
+    async def extract_timesheet_from_bytes(
+        self,
+        file_content: bytes,
+        file_extension: str,
+        metadata: Optional[Dict] = None,
+        content_hash: Optional[str] = None,
+        output_schema: Optional[str] = None
+    ) -> List[EmployeeTimesheet]:
+        """
+        Extract structured timesheet data from document bytes already in memory.
         
+        Results are cached by content hash, model id and prompt version, so re-uploads of
+        the same document skip the model call. ``content_hash`` may be passed when the
+        caller already hashed the bytes (e.g. while streaming the upload). Structured
+        CSV/XLSX/XLS exports with a recognised layout are converted without the model.
+        Oversized documents are split by page range, sheet or row range; the chunks are
+        extracted in parallel and merged, deduplicated on employee name and week.
+        Concurrent requests for the same bytes share one in-flight extraction.
+        ``output_schema`` selects the wire schema the model answers in (``verbose`` or
+        ``compact``, default ``EXTRACTION_OUTPUT_SCHEMA``); the result is the same models.
+        If ``metadata`` is given it is populated with extraction details
+        (``extraction_method``, ``cache_hit``, ``content_hash``, ``coalesced``, ``output_schema``).
+        """
         try:
-            # Read and encode the file
-            file_content, doc_format, is_image = self._encode_file(file_path, file_extension)
+            doc_format, is_image = self._resolve_format(file_extension)
+            output_schema = self._resolve_output_schema(output_schema)
             
-            logger.info(f"📄 File encoded: format={doc_format}, is_image={is_image}, size={len(file_content):,} bytes")
+            logger.info("📄 Document ready: format={}, is_image={}, size={:,} bytes", doc_format, is_image, len(file_content))
             
             # Validate file content
-            if not file_content or len(file_content) == 0:
-                raise ValueError(f"File is empty: {file_path}")
-            
-            # Build the message with document/image
-            if is_image:
-                content_block = {
-                    "image": {
-                        "format": doc_format,
-                        "source": {"bytes": file_content}
-                    }
-                }
-            else:
-                content_block = {
-                    "document": {
-                        "format": doc_format,
-                        "name": "timesheet-doc",
-                        "source": {"bytes": file_content}
-                    }
-                }
-            
-            # Get the analysis prompt
-            prompt = self._create_direct_analysis_prompt()
+            if not file_content:
+                raise ValueError("Document is empty")
             
-            message = {
-                "role": "user",
-                "content": [
-                    content_block,
-                    {"text": prompt}
-                ]
-            }
-            
-            # Determine model ID
-            model_id = (
-                self.settings.CLAUDE_MODEL_ID or 
-                self.settings.BEDROCK_CLAUDE_MODEL or 
-                self.settings.LLM_MODEL_ID
-            )
-            if not model_id:
-                raise RuntimeError("No model ID configured")
+            # Deterministic fast path for structured spreadsheet exports
+            if self.settings.ENABLE_SPREADSHEET_FAST_PATH and self.spreadsheet_extractor.supports(file_extension):
+                timesheets = await asyncio.to_thread(self.spreadsheet_extractor.extract, file_content, file_extension)
+                if timesheets:
+                    if metadata is not None:
+                        metadata["extraction_method"] = "deterministic"
+                    EXTRACTIONS.labels(doc_format, "deterministic", "success").inc()
+                    return timesheets
             
-            logger.info(f"📡 Sending to Bedrock model: {model_id}")
+            if metadata is not None:
+                metadata["extraction_method"] = "model"
+                metadata["output_schema"] = output_schema
             
-            # Single API call does EVERYTHING
-            response = self.bedrock_runtime.converse(
-                modelId=model_id,
-                messages=[message],
-                inferenceConfig={
-                    "maxTokens": 4096,
-                    "temperature": 0.1,
-                    "topP": 0.9
-                }
-            )
+            model_id = self._resolve_model_id()
+            content_hash = content_hash or ExtractionCache.hash_content(file_content)
+            cache_key = ExtractionCache.make_key(content_hash, model_id, self.PROMPT_VERSIONS[output_schema])
             
-            # Extract response text
-            response_text = self._extract_response_text(response)
+            # Serve repeated uploads of the same document from the cache
+            if self.cache is not None:
+                cached = await self.cache.get(cache_key)
+                if metadata is not None:
+                    metadata["cache_hit"] = cached is not None
+                    metadata["content_hash"] = content_hash
+                if cached is not None:
+                    logger.info("♻️ Cache hit for {}: {} employee timesheet(s)", content_hash[:12], len(cached))
+                    EXTRACTIONS.labels(doc_format, "cache", "success").inc()
+                    return get_employee_list_adapter().validate_python(cached)
             
-            logger.info(f"📥 Received response: {len(response_text)} characters")
-            logger.info(f"\n{'='*80}\n🔍 FULL MODEL RESPONSE:\n{'='*80}\n{response_text}\n{'='*80}\n")
+            if not self.bedrock_runtime:
+                raise RuntimeError("❌ Bedrock runtime not initialized. Check AWS credentials.")
             
-            # Parse the JSON response
-            timesheets = self._parse_response(response_text)
+            async def extract() -> Tuple[List[EmployeeTimesheet], Dict]:
+                details: Dict = {}
+                timesheets = await self._extract_with_model(
+                    file_content, doc_format, is_image, model_id, output_schema, content_hash, cache_key, details
+                )
+                return timesheets, details
             
-            logger.info(f"✅ Extracted {len(timesheets)} employee timesheet(s)")
-            return timesheets
+            # Identical uploads in flight at the same time share one model call
+            if self.in_flight is not None:
+                (timesheets, details), shared = await self.in_flight.do(cache_key, extract)
+                if shared:
+                    logger.info("🔗 Joined in-flight extraction of {}", content_hash[:12])
+            else:
+                (timesheets, details), shared = await extract(), False
+            if metadata is not None:
+                metadata.update(details)
+                metadata["coalesced"] = shared
+            EXTRACTIONS.labels(doc_format, "model", "success" if timesheets else "empty").inc()
+            return list(timesheets)
             
         except Exception as e:
             logger.error(f"❌ Unified document analysis failed: {e}")
+            EXTRACTIONS.labels(file_extension.lower().lstrip('.'), "model", "error").inc()
             raise
     
-    def _encode_file(self, file_path: str, file_extension: str):
-        """Read and encode file for Bedrock."""
-        file_ext = file_extension if file_extension.startswith('.') else f'.{file_extension}'
+    async def _extract_with_model(
+        self,
+        file_content: bytes,
+        doc_format: str,
+        is_image: bool,
+        model_id: str,
+        output_schema: str,
+        content_hash: str,
+        cache_key: str,
+        metadata: Dict
+    ) -> List[EmployeeTimesheet]:
+        """Prepare the payloads, run the model call(s) and cache a complete result"""
+        payloads = await self._prepare_payloads(file_content, doc_format, is_image, output_schema, metadata)
+        
+        if len(payloads) == 1:
+            logger.debug("📡 Sending to Bedrock model: {}", model_id)
+            # Single API call does EVERYTHING (runs on the invoker pool, off the event loop)
+            timesheets, stop_reason = await self._extract_payload(payloads[0], model_id)
+            # A reply cut off at maxTokens only holds the employees that were salvaged
+            complete = stop_reason != "max_tokens"
+            if not complete:
+                metadata["truncated"] = True
+        else:
+            timesheets, complete = await self._extract_chunks(payloads, model_id, metadata)
+        
+        # Only cache complete, successful extractions; empty results are often transient
+        if self.cache is not None and timesheets and complete:
+            await self.cache.set(cache_key, content_hash, [t.model_dump() for t in timesheets])
+        
+        logger.info("✅ Extracted {} employee timesheet(s)", len(timesheets))
+        return timesheets
+    
+    async def stream_timesheet_from_bytes(
+        self,
+        file_content: bytes,
+        file_extension: str,
+        metadata: Optional[Dict] = None,
+        content_hash: Optional[str] = None,
+        output_schema: Optional[str] = None
+    ) -> AsyncIterator[EmployeeTimesheet]:
+        """
+        Streaming variant of :meth:`extract_timesheet_from_bytes`.
+        
+        Uses Bedrock's ``converse_stream`` and yields each employee timesheet as soon as
+        its JSON object is complete, instead of waiting for the whole reply. Fast-path
+        and cached results are yielded immediately; a completed model stream is cached.
+        """
+        doc_format, is_image = self._resolve_format(file_extension)
+        output_schema = self._resolve_output_schema(output_schema)
+        if not file_content:
+            raise ValueError("Document is empty")
+        
+        if self.settings.ENABLE_SPREADSHEET_FAST_PATH and self.spreadsheet_extractor.supports(file_extension):
+            timesheets = await asyncio.to_thread(self.spreadsheet_extractor.extract, file_content, file_extension)
+            if timesheets:
+                if metadata is not None:
+                    metadata["extraction_method"] = "deterministic"
+                EXTRACTIONS.labels(doc_format, "deterministic", "success").inc()
+                for timesheet in timesheets:
+                    yield timesheet
+                return
+        
+        if metadata is not None:
+            metadata["extraction_method"] = "model"
+            metadata["output_schema"] = output_schema
+        
+        model_id = self._resolve_model_id()
+        cache_key = None
+        if self.cache is not None:
+            content_hash = content_hash or self.cache.hash_content(file_content)
+            cache_key = self.cache.make_key(content_hash, model_id, self.PROMPT_VERSIONS[output_schema])
+            cached = await self.cache.get(cache_key)
+            if metadata is not None:
+                metadata["cache_hit"] = cached is not None
+                metadata["content_hash"] = content_hash
+            if cached is not None:
+                EXTRACTIONS.labels(doc_format, "cache", "success").inc()
+                for timesheet in get_employee_list_adapter().validate_python(cached):
+                    yield timesheet
+                return
+        
+        if not self.bedrock_runtime:
+            raise RuntimeError("❌ Bedrock runtime not initialized. Check AWS credentials.")
+        
+        payloads = await self._prepare_payloads(file_content, doc_format, is_image, output_schema, metadata)
+        if len(payloads) > 1:
+            async for timesheet in self._stream_chunks(payloads, model_id, metadata, cache_key, content_hash):
+                yield timesheet
+            return
+        payload = payloads[0]
+        
+        logger.debug("📡 Streaming from Bedrock model: {}", model_id)
+        parser = EmployeeStreamParser()
+        timesheets: List[EmployeeTimesheet] = []
+        stop_reason = None
+        with observe_stage("bedrock_converse_stream", doc_format, model_id) as call_span:
+            async for event in self._converse_stream(payload, model_id):
+                if "contentBlockDelta" in event:
+                    text = event["contentBlockDelta"].get("delta", {}).get("text", "")
+                    for emp_data in parser.feed(text):
+                        for timesheet in self._build_timesheets(emp_data):
+                            timesheets.append(timesheet)
+                            yield timesheet
+                elif "messageStop" in event:
+                    stop_reason = event["messageStop"].get("stopReason")
+                elif "metadata" in event:
+                    usage, latency_ms = event["metadata"].get("usage"), event["metadata"].get("metrics", {}).get("latencyMs")
+                    record_bedrock_usage(usage, latency_ms, model_id, doc_format)
+                    self._annotate_call_span(call_span, payload, usage, latency_ms)
+        
+        logger.info("✅ Streamed {} employee timesheet(s) (stop reason: {})", len(timesheets), stop_reason)
+        EXTRACTIONS.labels(doc_format, "model", "success" if timesheets else "empty").inc()
+        # A truncated reply (max_tokens) may have dropped employees; do not cache it
+        if stop_reason == "max_tokens" and metadata is not None:
+            metadata["truncated"] = True
+        if cache_key and timesheets and stop_reason != "max_tokens":
+            await self.cache.set(cache_key, content_hash, [t.model_dump() for t in timesheets])
+
+    async def _prepare_image(self, file_content: bytes, doc_format: str, metadata: Optional[Dict]) -> Tuple[bytes, str]:
+        """Apply the image policy (resize/re-encode) off the event loop; the report goes to metadata"""
+        if self.image_policy is None:
+            return file_content, doc_format
+        try:
+            with span("image_policy", input_bytes=len(file_content)):
+                content, image_format, report = await asyncio.to_thread(self.image_policy.apply, file_content, doc_format)
+        except Exception as e:
+            logger.warning(f"⚠️ Image preprocessing failed, sending original image: {e}")
+            return file_content, doc_format
+        
+        logger.info(
+            "🖼️ Image {0[0]}x{0[1]} -> {1[0]}x{1[1]} {2}, {3:,} -> {4:,} bytes ({5} ms)",
+            report["original_size"], report["output_size"], image_format,
+            len(file_content), len(content), report["preprocess_ms"]
+        )
+        if metadata is not None:
+            metadata["image_preprocessing"] = report
+        return content, image_format
+
+    async def _prepare_payloads(
+        self,
+        file_content: bytes,
+        doc_format: str,
+        is_image: bool,
+        output_schema: str,
+        metadata: Optional[Dict]
+    ) -> List[Dict]:
+        """
+        Turn a document into the payload(s) sent to the model
+        
+        Images go through the image policy. Other documents go through the chunker,
+        which serializes table formats to text and splits oversized documents.
+        
+        Returns:
+            List of ``{"content", "format", "is_image", "label", "file_type", "output_schema"}``
+            dicts, one per model call (``file_type`` is the source document's format)
+        """
+        with observe_stage("preprocessing", doc_format):
+            if is_image:
+                content, image_format = await self._prepare_image(file_content, doc_format, metadata)
+                payloads = [{"content": content, "format": image_format, "is_image": True, "label": "image"}]
+            else:
+                payloads = await self._prepare_document(file_content, doc_format, metadata)
+        for payload in payloads:
+            payload["file_type"] = doc_format
+            payload["output_schema"] = output_schema
+            PAYLOAD_BYTES.labels(doc_format, payload["format"]).observe(len(payload["content"]))
+        return payloads
+    
+    async def _prepare_document(self, file_content: bytes, doc_format: str, metadata: Optional[Dict]) -> List[Dict]:
+        """Serialize and/or split a non-image document with the chunker"""
+        try:
+            with span("serialize_and_split", input_bytes=len(file_content)) as chunk_span:
+                payloads = await asyncio.to_thread(self.chunker.chunk, file_content, doc_format)
+                if chunk_span is not None:
+                    chunk_span.set(chunks=len(payloads))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not serialize/split {doc_format}, sending original document: {e}")
+            payloads = [{"content": file_content, "format": doc_format, "label": "document"}]
+        
+        for payload in payloads:
+            payload["is_image"] = False
+        if payloads[0]["format"] != doc_format:
+            serialized_bytes = sum(len(p["content"]) for p in payloads)
+            logger.debug(
+                "📝 Sending {} as {} text: {:,} -> {:,} bytes",
+                doc_format, self.table_serializer.style, len(file_content), serialized_bytes
+            )
+            if metadata is not None:
+                metadata["serialized_as"] = self.table_serializer.style
+                metadata["serialized_bytes"] = serialized_bytes
+        if metadata is not None and len(payloads) > 1:
+            metadata["chunks"] = len(payloads)
+        return payloads
+
+    async def _extract_payload(self, payload: Dict, model_id: str) -> Tuple[List[EmployeeTimesheet], Optional[str]]:
+        """Run one model call for a payload and parse the employees from the reply, with the call's stop reason"""
+        file_type = payload.get("file_type", payload["format"])
+        with observe_stage("bedrock_converse", file_type, model_id) as call_span:
+            request = self._build_converse_request(payload, model_id)
+            try:
+                response = await self.invoker.converse(self.bedrock_runtime, **request)
+            except ClientError as e:
+                if not self._cache_point_rejected(e, request):
+                    raise
+                response = await self.invoker.converse(self.bedrock_runtime, **self._build_converse_request(payload, model_id))
+        usage, latency_ms = response.get("usage"), response.get("metrics", {}).get("latencyMs")
+        record_bedrock_usage(usage, latency_ms, model_id, file_type)
+        self._annotate_call_span(call_span, payload, usage, latency_ms)
+        
+        # Extract response text
+        response_text = self._extract_response_text(response)
+        stop_reason = response.get("stopReason")
+        if stop_reason == "max_tokens":
+            logger.warning("⚠️ Response for {} hit maxTokens; keeping only the complete employees", payload["label"])
+        
+        logger.info("📥 Received response for {}: {} characters", payload["label"], len(response_text))
+        log_payload(f"Model response for {payload['label']}", lambda: response_text)
+        
+        # Parse the JSON response
+        with observe_stage("parse_response", file_type, model_id):
+            return self._parse_response(response_text), stop_reason
+
+    @staticmethod
+    def _annotate_call_span(call_span, payload: Dict, usage: Optional[Dict], latency_ms: Optional[float]) -> None:
+        """Attach payload details, token usage and the server-reported latency to a model-call span"""
+        if call_span is None:
+            return
+        usage = usage or {}
+        call_span.set(**{
+            "payload.label": payload.get("label"),
+            "payload.format": payload["format"],
+            "payload.bytes": len(payload["content"]),
+            "bedrock.input_tokens": usage.get("inputTokens"),
+            "bedrock.output_tokens": usage.get("outputTokens"),
+            "bedrock.cache_read_tokens": usage.get("cacheReadInputTokens"),
+            "bedrock.cache_write_tokens": usage.get("cacheWriteInputTokens"),
+            "bedrock.latency_ms": latency_ms,
+        })
+
+    async def _extract_chunk_results(self, payloads: List[Dict], model_id: str) -> AsyncIterator[Tuple[Dict, object]]:
+        """Extract chunks in parallel (bounded by CHUNK_CONCURRENCY), yielding (payload, result) as each finishes
+
+        ``result`` is the ``(timesheets, stop_reason)`` pair from :meth:`_extract_payload`,
+        or the exception the chunk failed with.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.settings.CHUNK_CONCURRENCY))
+        
+        async def run(payload: Dict):
+            async with semaphore:
+                try:
+                    return payload, await self._extract_payload(payload, model_id)
+                except Exception as e:
+                    logger.error(f"❌ Chunk {payload['label']} failed: {e}")
+                    return payload, e
+        
+        logger.info("📡 Extracting {} chunks with Bedrock model {}", len(payloads), model_id)
+        tasks = [asyncio.create_task(run(payload)) for payload in payloads]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _extract_chunks(self, payloads: List[Dict], model_id: str, metadata: Optional[Dict]) -> Tuple[List[EmployeeTimesheet], bool]:
+        """
+        Extract every chunk and merge the results in chunk order, deduplicated
+        
+        Returns:
+            Tuple of (timesheets, complete). ``complete`` is False when some chunks
+            failed or were cut off at maxTokens; if all of them failed the first error
+            is raised.
+        """
+        results: Dict[int, List[EmployeeTimesheet]] = {}
+        errors: Dict[int, Exception] = {}
+        truncated: List[int] = []
+        order = {id(payload): index for index, payload in enumerate(payloads)}
+        async for payload, result in self._extract_chunk_results(payloads, model_id):
+            if isinstance(result, Exception):
+                errors[order[id(payload)]] = result
+            else:
+                results[order[id(payload)]], stop_reason = result
+                if stop_reason == "max_tokens":
+                    truncated.append(order[id(payload)])
+        
+        if not results:
+            raise errors[min(errors)]
+        merged = merge_timesheets(results[index] for index in sorted(results))
+        self._record_failed_chunks(payloads, errors, metadata)
+        self._record_truncated_chunks(payloads, truncated, metadata)
+        logger.info(
+            "🧩 Merged {} timesheet(s) from {}/{} chunk(s) into {}",
+            sum(len(r) for r in results.values()), len(results), len(payloads), len(merged)
+        )
+        return merged, not errors and not truncated
+
+    async def _stream_chunks(
+        self,
+        payloads: List[Dict],
+        model_id: str,
+        metadata: Optional[Dict],
+        cache_key: Optional[str],
+        content_hash: Optional[str]
+    ) -> AsyncIterator[EmployeeTimesheet]:
+        """
+        Streaming counterpart of :meth:`_extract_chunks`: yield each chunk's employees as it finishes
+
+        Entries already yielded cannot be summed afterwards, so the part of an employee
+        split across chunks is yielded as its own entry; only exact repeats of an earlier
+        chunk's entry are dropped. The cache stores the merged result, as
+        :meth:`_extract_chunks` would return it.
+        """
+        seen = set()
+        timesheets: List[EmployeeTimesheet] = []
+        results: Dict[int, List[EmployeeTimesheet]] = {}
+        errors: Dict[int, Exception] = {}
+        truncated: List[int] = []
+        order = {id(payload): index for index, payload in enumerate(payloads)}
+        async for payload, result in self._extract_chunk_results(payloads, model_id):
+            if isinstance(result, Exception):
+                errors[order[id(payload)]] = result
+                continue
+            result, stop_reason = result
+            results[order[id(payload)]] = result
+            if stop_reason == "max_tokens":
+                truncated.append(order[id(payload)])
+            keys = [timesheet_key(timesheet) for timesheet in result]
+            for timesheet, key in zip(result, keys):
+                # Same rule as merge_timesheets: a repeat of what an earlier chunk returned is dropped
+                if key is not None and (key, hours_signature(timesheet)) in seen:
+                    continue
+                timesheets.append(timesheet)
+                yield timesheet
+            seen.update((key, hours_signature(timesheet)) for timesheet, key in zip(result, keys) if key is not None)
+        
+        if len(errors) == len(payloads):
+            raise errors[min(errors)]
+        self._record_failed_chunks(payloads, errors, metadata)
+        self._record_truncated_chunks(payloads, truncated, metadata)
+        logger.info("✅ Streamed {} employee timesheet(s) from {} chunk(s)", len(timesheets), len(payloads))
+        if cache_key and timesheets and not errors and not truncated:
+            merged = merge_timesheets(results[index] for index in sorted(results))
+            await self.cache.set(cache_key, content_hash, [t.model_dump() for t in merged])
+
+    @staticmethod
+    def _record_failed_chunks(payloads: List[Dict], errors: Dict[int, Exception], metadata: Optional[Dict]) -> None:
+        if errors and metadata is not None:
+            metadata["failed_chunks"] = [payloads[index]["label"] for index in sorted(errors)]
+
+    @staticmethod
+    def _record_truncated_chunks(payloads: List[Dict], truncated: List[int], metadata: Optional[Dict]) -> None:
+        if truncated and metadata is not None:
+            metadata["truncated"] = True
+            metadata["truncated_chunks"] = [payloads[index]["label"] for index in sorted(truncated)]
+
+    def _uses_prompt_cache(self, model_id: str) -> bool:
+        """True when the system prompt should carry a cachePoint for this model"""
+        return (
+            self.settings.BEDROCK_PROMPT_CACHING
+            and model_id not in self.models_without_prompt_cache
+            and any(family in model_id for family in PROMPT_CACHING_MODEL_FAMILIES)
+        )
+
+    def _cache_point_rejected(self, error: ClientError, request: Dict) -> bool:
+        """
+        True when ``request`` carried a cachePoint and Bedrock rejected it as invalid
+
+        The model is then called without a cache point from now on, so the caller
+        can retry once with a rebuilt request.
+        """
+        if CACHE_POINT not in request.get("system", []):
+            return False
+        if error.response.get("Error", {}).get("Code") != "ValidationException":
+            return False
+        logger.warning(
+            "⚠️ {} rejected the prompt cachePoint ({}); retrying without prompt caching",
+            request["modelId"], error.response.get("Error", {}).get("Message")
+        )
+        self.models_without_prompt_cache.add(request["modelId"])
+        return True
+
+    async def _converse_stream(self, payload: Dict, model_id: str) -> AsyncIterator[Dict]:
+        """Stream the converse events for a payload, retrying once without a rejected cachePoint"""
+        request = self._build_converse_request(payload, model_id)
+        started = False
+        try:
+            async for event in self.invoker.converse_stream(self.bedrock_runtime, **request):
+                started = True
+                yield event
+        except ClientError as e:
+            if started or not self._cache_point_rejected(e, request):
+                raise
+        else:
+            return
+        async for event in self.invoker.converse_stream(self.bedrock_runtime, **self._build_converse_request(payload, model_id)):
+            yield event
+
+    def _build_converse_request(self, payload: Dict, model_id: str) -> Dict:
+        """Build the converse/converse_stream keyword arguments for a payload"""
+        # Build the message with document/image
+        if payload["is_image"]:
+            content_block = {
+                "image": {
+                    "format": payload["format"],
+                    "source": {"bytes": payload["content"]}
+                }
+            }
+        else:
+            content_block = {
+                "document": {
+                    "format": payload["format"],
+                    "name": "timesheet-doc",
+                    "source": {"bytes": payload["content"]}
+                }
+            }
         
-        format_mapping = {
-            '.pdf': 'pdf',
-            '.csv': 'csv',
-            '.doc': 'doc',
-            '.docx': 'docx',
-            '.xls': 'xls',
-            '.xlsx': 'xlsx',
-            '.html': 'html',
-            '.htm': 'html',
-            '.txt': 'txt',
-            '.md': 'md',
-            '.png': 'png',
-            '.jpg': 'jpeg',
-            '.jpeg': 'jpeg',
-            '.gif': 'gif',
-            '.webp': 'webp'
+        message = {
+            "role": "user",
+            "content": [
+                content_block,
+                {"text": EXTRACTION_USER_PROMPT}
+            ]
+        }
+        system = [{"text": SYSTEM_PROMPTS[payload.get("output_schema", "verbose")]}]
+        if self._uses_prompt_cache(model_id):
+            system.append(CACHE_POINT)
+        return {
+            "modelId": model_id,
+            "system": system,
+            "messages": [message],
+            "inferenceConfig": {
+                "maxTokens": self.settings.EXTRACTION_MAX_TOKENS,
+                "temperature": 0.1,
+                "topP": 0.9
+            }
         }
+
+    # Formats Bedrock converse accepts as-is, by file extension
+    FORMAT_MAPPING = {
+        '.pdf': 'pdf',
+        '.csv': 'csv',
+        '.doc': 'doc',
+        '.docx': 'docx',
+        '.xls': 'xls',
+        '.xlsx': 'xlsx',
+        '.html': 'html',
+        '.htm': 'html',
+        '.txt': 'txt',
+        '.md': 'md',
+        '.png': 'png',
+        '.jpg': 'jpeg',
+        '.jpeg': 'jpeg',
+        '.gif': 'gif',
+        '.webp': 'webp'
+    }
+    IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.gif', '.webp']
+
+    def can_extract_from_bytes(self, file_extension: str) -> bool:
+        """True if the format can be sent to Bedrock without any file-based conversion"""
+        file_ext = file_extension if file_extension.startswith('.') else f'.{file_extension}'
+        return file_ext.lower() in self.FORMAT_MAPPING
+
+    def _resolve_format(self, file_extension: str) -> tuple[str, bool]:
+        """Map a file extension to the Bedrock document/image format."""
+        file_ext = (file_extension if file_extension.startswith('.') else f'.{file_extension}').lower()
         
-        doc_format = format_mapping.get(file_ext.lower())
+        doc_format = self.FORMAT_MAPPING.get(file_ext)
         if not doc_format:
             raise ValueError(f"Unsupported file type: {file_ext}")
         
-        with open(file_path, 'rb') as f:
-            content = f.read()
-        
-        is_image = file_ext.lower() in ['.png', '.jpg', '.jpeg', '.gif', '.webp']
-        return content, doc_format, is_image
+        return doc_format, file_ext in self.IMAGE_EXTENSIONS
     
     def _extract_response_text(self, response: dict) -> str:
         """Extract text from Bedrock response."""
@@ -210,34 +758,31 @@ RULES:
             return response['output']['message']['content'][0]['text'].strip()
         except Exception as e:
             logger.error(f"Failed to extract response text: {e}")
-            logger.error(f"Response structure: {json.dumps(response, indent=2)[:500]}")
+            logger.opt(lazy=True).error("Response structure: {}", lambda: json.dumps(response, default=str)[:500])
             raise ValueError("Could not extract text from model response")
     
     def _parse_response(self, response_text: str) -> List[EmployeeTimesheet]:
-        """Parse JSON response into EmployeeTimesheet objects."""
-        # Log the FULL raw response first
-        logger.info(f"\n{'='*80}\n🔍 PARSING RESPONSE\n{'='*80}")
+        """Parse JSON response into EmployeeTimesheet objects.
         
-        # Helper to try parse a candidate json string
-        def try_parse(s: str):
-            try:
-                return json.loads(s)
-            except Exception:
-                return None
-
+        Every stage is linear in the response length: whole-text parse, fenced code
+        blocks, a single-pass bracket scan for the first embedded JSON value, and finally
+        salvaging the complete employee objects from truncated output.
+        """
         text = response_text.strip()
-        logger.info(f"Response text length: {len(text)} characters")
+        logger.debug("Parsing model response ({} characters)", len(text))
 
         # 1) Try to parse entire text directly
-        data = try_parse(text)
-        if data is not None:
-            logger.info("✅ Successfully parsed entire response as JSON")
+        data = None
+        try:
+            data = json.loads(text)
+            logger.debug("✅ Parsed entire response as JSON")
+        except (ValueError, RecursionError):
+            pass
 
         # 2) Try any fenced code blocks anywhere
         if data is None:
-            parts = []
             idx = 0
-            while True:
+            while data is None:
                 start = text.find("```", idx)
                 if start == -1:
                     break
@@ -250,75 +795,33 @@ RULES:
                     first_line, rest = inner.split("\n", 1)
                     if first_line.strip().lower() in ("json", "javascript", "js", "python"):
                         inner = rest
-                parts.append(inner.strip())
-                idx = end + 3
-            for p in parts:
-                data = try_parse(p)
-                if data is not None:
-                    logger.info(f"✅ Successfully parsed JSON from code fence block")
-                    break
+                try:
+                    data = json.loads(inner)
+                    logger.debug("✅ Parsed JSON from code fence block")
+                except (ValueError, RecursionError):
+                    idx = end + 3
 
-        # 3) Scan for first balanced JSON object/array and parse it
+        # 3) Locate the first embedded JSON value, preferring an employee list or container
         if data is None:
-            def scan_balanced(src: str):
-                results = []
-                n = len(src)
-                i = 0
-                while i < n:
-                    if src[i] in '{[':
-                        stack = [src[i]]
-                        in_str = False
-                        esc = False
-                        j = i + 1
-                        while j < n:
-                            ch = src[j]
-                            if in_str:
-                                if esc:
-                                    esc = False
-                                elif ch == '\\':
-                                    esc = True
-                                elif ch == '"':
-                                    in_str = False
-                            else:
-                                if ch == '"':
-                                    in_str = True
-                                elif ch in '{[':
-                                    stack.append(ch)
-                                elif ch in '}]':
-                                    if not stack:
-                                        break
-                                    top = stack[-1]
-                                    if (top == '{' and ch == '}') or (top == '[' and ch == ']'):
-                                        stack.pop()
-                                        if not stack:
-                                            # candidate from i..j
-                                            results.append(src[i:j+1])
-                                            break
-                                    else:
-                                        # mismatched, abort this start
-                                        break
-                            j += 1
-                        i = j
-                    i += 1
-                return results
-
-            candidates = scan_balanced(text)
-            logger.info(f"Found {len(candidates)} balanced JSON candidates")
-            for idx, c in enumerate(candidates):
-                logger.info(f"Trying candidate {idx+1}: {c[:100]}...")
-                data = try_parse(c)
-                if data is not None:
-                    logger.info(f"✅ Successfully parsed JSON from candidate {idx+1}")
-                    break
+            data = locate_json(text, accept=self._is_employee_container)
+            if data is not None:
+                logger.debug("✅ Located embedded JSON value")
+
+        # 4) Truncated output (e.g. maxTokens reached): keep every employee that closed.
+        # A truncated container only yields its inner objects in step 3, so retry here.
+        if data is None or not self._is_employee_container(data):
+            salvaged = EmployeeStreamParser().feed(text)
+            if salvaged:
+                logger.warning("⚠️ Response JSON incomplete; salvaged {} complete employee object(s)", len(salvaged))
+                data = {"employees": salvaged}
 
         if data is None:
             logger.error("❌ Failed to parse LLM response: could not locate valid JSON")
-            logger.error(f"Tried to parse this text:\n{text}")
+            logger.opt(lazy=True).debug("Unparseable response (first 500 chars): {}", lambda: text[:500])
             return []
         
-        logger.info(f"✅ Parsed JSON structure: {json.dumps(data, indent=2)[:500]}...")
+        logger.opt(lazy=True).debug("Parsed JSON structure: {}", lambda: json.dumps(data)[:500])
 
-        timesheets = []
         employees = None
         # Accept top-level array
         if isinstance(data, list):
@@ -336,27 +839,57 @@ RULES:
                 # If still None and dict itself looks like a single entry, wrap it
                 if employees is None:
                     candidate = data
-                    if any(k in candidate for k in ["total_hours", "week_hours", "period", "employee_name", "client_name"]):
+                    if any(k in candidate for k in EMPLOYEE_KEYS + ("week_hours", "period")):
                         employees = [candidate]
         if not isinstance(employees, list):
-            logger.warning("LLM response missing or invalid 'employees' list: " + (json.dumps(data) if isinstance(data, dict) else str(type(data))))
+            logger.opt(lazy=True).warning(
+                "LLM response missing or invalid 'employees' list: {}",
+                lambda: json.dumps(data)[:500] if isinstance(data, dict) else str(type(data))
+            )
             return []
 
+        try:
+            # One validator call for the whole list instead of a model constructor per entry
+            entries = [entry for emp_data in employees for entry in self._flatten_employee(emp_data)]
+            return get_employee_list_adapter().validate_python(entries)
+        except Exception:
+            # Redo it entry by entry so one malformed employee only drops itself
+            pass
+
+        timesheets = []
         for emp_data in employees:
-            try:
-                # Expand nested weeks array if present (normalize to one entry per period)
-                if isinstance(emp_data, dict) and isinstance(emp_data.get("weeks"), list):
-                    base = {k: v for k, v in emp_data.items() if k != "weeks"}
-                    for wk in emp_data["weeks"]:
-                        merged = {**base, **wk}
-                        timesheet = EmployeeTimesheet(**merged)
-                        timesheets.append(timesheet)
-                else:
-                    timesheet = EmployeeTimesheet(**emp_data)
-                    timesheets.append(timesheet)
-            except Exception as e:
-                logger.warning("Skipping invalid employee data: " + json.dumps(emp_data) + " Error: " + str(e))
+            timesheets.extend(self._build_timesheets(emp_data))
 
         return timesheets
 
+    @staticmethod
+    def _is_employee_container(value) -> bool:
+        """True for a decoded JSON value holding a list of employee entries"""
+        if isinstance(value, list):
+            # Nested lists such as week_hours are lists of dicts too; require employee fields
+            return any(isinstance(item, dict) and any(k in item for k in EMPLOYEE_KEYS) for item in value)
+        return isinstance(value, dict) and any(isinstance(value.get(k), list) for k in CONTAINER_KEYS)
+
+    @staticmethod
+    def _flatten_employee(emp_data) -> Iterator:
+        """Expand one employee entry (either output schema) into verbose entries, one per nested ``weeks`` item"""
+        emp_data = expand_employee(emp_data)
+        # Expand nested weeks array if present (normalize to one entry per period)
+        if isinstance(emp_data, dict) and isinstance(emp_data.get("weeks"), list):
+            base = {k: v for k, v in emp_data.items() if k != "weeks"}
+            for wk in emp_data["weeks"]:
+                yield {**base, **wk}
+        else:
+            yield emp_data
 
+    def _build_timesheets(self, emp_data) -> List[EmployeeTimesheet]:
+        """Validate one employee entry (either output schema); a nested ``weeks`` array yields one timesheet per week."""
+        timesheets = []
+        try:
+            for entry in self._flatten_employee(emp_data):
+                timesheets.append(EmployeeTimesheet(**entry))
+        except Exception as e:
+            logger.opt(lazy=True).warning(
+                "Skipping invalid employee data: {} Error: {}", lambda: json.dumps(emp_data, default=str)[:500], lambda: str(e)
+            )
+        return timesheets
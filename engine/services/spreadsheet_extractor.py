@@ -0,0 +1,190 @@
+import csv
+import io
+import re
+from typing import Dict, List, Optional
+from loguru import logger
+import pandas as pd
+from models import EmployeeTimesheet, DailyHours
+
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Header cell -> day, e.g. "Mon", "Monday", "Tues.", "Mon 10/20", "Tuesday (Oct 21)";
+# only day names and their usual abbreviations, so "Month" or "Sunk cost" are not days
+DAY_HEADER_PATTERN = re.compile(
+    r"^(mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:r|rs|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)"
+    r"\.?(?:\s|\(|$)"
+)
+NAME_HEADERS = ("employee name", "employee", "name", "full name", "resource", "resource name", "worker", "staff name")
+CLIENT_HEADERS = ("client name", "client", "customer", "project")
+ID_HEADERS = ("employee id", "emp id", "employee #", "emp #", "emp no", "employee no", "id", "client id")
+PERIOD_HEADERS = ("period", "pay period", "week")
+WEEK_START_HEADERS = ("week start", "week starting", "start date", "week begin", "period start", "from")
+WEEK_END_HEADERS = ("week end", "week ending", "end date", "period end", "to")
+# Rows with these labels in the name column are summaries, not employees
+SUMMARY_LABELS = {"total", "totals", "grand total", "sum", "subtotal"}
+BLANK_VALUES = {"", "nan", "none", "nat", "-"}
+TIME_PATTERN = r"^(\d{1,2}):(\d{2})(?::\d{2})?$"
+
+
+class SpreadsheetExtractor:
+    """Deterministic timesheet extraction for structured CSV/XLSX/XLS exports.
+
+    Timekeeping systems usually export one row per employee with obvious headers
+    (Name, Mon..Sun, Total). When such a layout is recognised the rows are converted
+    directly with vectorised pandas operations, without a model call. Anything
+    ambiguous (unknown layout, non-numeric hour cells) returns ``None`` so the caller
+    can fall back to the model.
+    """
+
+    SUPPORTED_EXTENSIONS = ("csv", "xlsx", "xls")
+    HEADER_SCAN_ROWS = 10
+
+    def supports(self, file_extension: str) -> bool:
+        return file_extension.lower().lstrip('.') in self.SUPPORTED_EXTENSIONS
+
+    def extract(self, content: bytes, file_extension: str) -> Optional[List[EmployeeTimesheet]]:
+        """
+        Extract timesheets from a spreadsheet with a recognised column layout
+
+        Returns:
+            List of timesheets, or None if no sheet matches a supported layout
+        """
+        try:
+            sheets = self._read_sheets(content, file_extension.lower().lstrip('.'))
+        except Exception as e:
+            logger.info(f"Spreadsheet fast path could not read file: {e}")
+            return None
+
+        timesheets: List[EmployeeTimesheet] = []
+        recognised = False
+        for sheet_name, frame in sheets.items():
+            layout = self._detect_layout(frame)
+            if layout is None:
+                continue
+            rows = self._extract_rows(frame, layout)
+            if rows is None:
+                logger.info("Sheet '{}' has unparseable hour cells; falling back to the model", sheet_name)
+                return None
+            recognised = True
+            timesheets.extend(rows)
+
+        if not recognised:
+            return None
+        logger.info("⚡ Spreadsheet fast path extracted {} employee timesheet(s)", len(timesheets))
+        return timesheets
+
+    def _read_sheets(self, content: bytes, file_extension: str) -> Dict[str, pd.DataFrame]:
+        if file_extension == "csv":
+            # csv.reader tolerates ragged rows (title lines above the header), unlike read_csv
+            rows = [row for row in csv.reader(io.StringIO(content.decode("utf-8-sig", errors="replace"))) if row]
+            return {"csv": pd.DataFrame(rows)}
+        return pd.read_excel(io.BytesIO(content), sheet_name=None, header=None)
+
+    def _detect_layout(self, frame: pd.DataFrame) -> Optional[Dict]:
+        """Find a header row with a name column and at least Mon..Fri day columns"""
+        for row_index in range(min(self.HEADER_SCAN_ROWS, len(frame))):
+            headers = [self._normalize_header(v) for v in frame.iloc[row_index].tolist()]
+            day_columns: Dict[str, int] = {}
+            for col, header in enumerate(headers):
+                match = DAY_HEADER_PATTERN.match(header)
+                if match:
+                    day = match.group(1)[:3].capitalize()
+                    day_columns.setdefault(day, col)
+            if not all(day in day_columns for day in DAYS[:5]):
+                continue
+            name_col = self._find_column(headers, NAME_HEADERS)
+            client_col = self._find_column(headers, CLIENT_HEADERS)
+            if name_col is None and client_col is None:
+                continue
+            return {
+                "header_row": row_index,
+                "days": day_columns,
+                "name": name_col,
+                "client": client_col,
+                "id": self._find_column(headers, ID_HEADERS),
+                "period": self._find_column(headers, PERIOD_HEADERS),
+                "week_start": self._find_column(headers, WEEK_START_HEADERS),
+                "week_end": self._find_column(headers, WEEK_END_HEADERS),
+            }
+        return None
+
+    @staticmethod
+    def _normalize_header(value) -> str:
+        return re.sub(r"\s+", " ", str(value).strip().lower().replace("_", " ")) if value is not None else ""
+
+    @staticmethod
+    def _find_column(headers: List[str], candidates) -> Optional[int]:
+        for candidate in candidates:
+            if candidate in headers:
+                return headers.index(candidate)
+        return None
+
+    @staticmethod
+    def _text_column(body: pd.DataFrame, col: Optional[int]) -> Optional[pd.Series]:
+        if col is None:
+            return None
+        values = body.iloc[:, col].astype(str).str.strip()
+        return values.where(~values.str.lower().isin(BLANK_VALUES), None)
+
+    @staticmethod
+    def _date_column(body: pd.DataFrame, col: Optional[int]) -> Optional[pd.Series]:
+        if col is None:
+            return None
+        raw = body.iloc[:, col]
+        parsed = pd.to_datetime(raw, errors="coerce")
+        text = raw.astype(str).str.strip()
+        formatted = parsed.dt.strftime("%Y-%m-%d")
+        result = formatted.where(parsed.notna(), text)
+        return result.where(~result.str.lower().isin(BLANK_VALUES), None)
+
+    def _extract_rows(self, frame: pd.DataFrame, layout: Dict) -> Optional[List[EmployeeTimesheet]]:
+        body = frame.iloc[layout["header_row"] + 1:]
+        names = self._text_column(body, layout["name"])
+        clients = self._text_column(body, layout["client"])
+        primary = names if names is not None else clients
+
+        # Parse every day column at once: plain numbers or h:mm durations
+        hours = pd.DataFrame(index=body.index)
+        unparsed = pd.Series(False, index=body.index)
+        for day, col in layout["days"].items():
+            text = body.iloc[:, col].astype(str).str.strip()
+            blank = text.str.lower().isin(BLANK_VALUES)
+            numeric = pd.to_numeric(text, errors="coerce")
+            hm = text.str.extract(TIME_PATTERN).astype(float)
+            from_time = hm[0] + hm[1] / 60.0
+            value = numeric.fillna(from_time)
+            unparsed |= ~blank & value.isna()
+            hours[day] = value
+
+        keep = (
+            primary.notna()
+            & ~primary.fillna("").str.lower().isin(SUMMARY_LABELS)
+            & hours.notna().any(axis=1)
+        )
+        if (unparsed & keep).any():
+            return None
+
+        hours = hours[keep].fillna(0.0).clip(lower=0).round(2)
+        totals = hours.sum(axis=1).round(2)
+        extra = {
+            key: self._text_column(body, layout[key])
+            for key in ("id", "period")
+        }
+        extra["week_start"] = self._date_column(body, layout["week_start"])
+        extra["week_end"] = self._date_column(body, layout["week_end"])
+
+        timesheets = []
+        for index, day_values in zip(hours.index, hours.itertuples(index=False)):
+            by_day = dict(zip(hours.columns, day_values))
+            timesheets.append(EmployeeTimesheet(
+                client_id=extra["id"][index] if extra["id"] is not None else None,
+                client_name=(clients[index] if clients is not None and names is not None else primary[index]),
+                employee_name=names[index] if names is not None and clients is not None else None,
+                period=extra["period"][index] if extra["period"] is not None else None,
+                week_start=extra["week_start"][index] if extra["week_start"] is not None else None,
+                week_end=extra["week_end"][index] if extra["week_end"] is not None else None,
+                week_hours=[DailyHours(day=day, hours=float(by_day.get(day, 0.0))) for day in DAYS],
+                total_hours=float(totals[index]),
+            ))
+        return timesheets
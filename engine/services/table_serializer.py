@@ -0,0 +1,276 @@
+import csv
+import datetime
+import io
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple
+from loguru import logger
+
+
+TableRows = List[List[str]]
+
+
+class _HTMLTableExtractor(HTMLParser):
+    """Collect text and tables from HTML in document order"""
+
+    BLOCK_TAGS = {"p", "div", "br", "h1", "h2", "h3", "h4", "h5", "h6", "li", "title"}
+    SKIP_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: List = []  # str paragraphs and TableRows, in order
+        self._text: List[str] = []
+        self._tables: List[TableRows] = []  # Stack for nested tables
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+        # Row and cell buffers of the enclosing tables, restored when a nested table ends
+        self._outer: List[Tuple[Optional[List[str]], Optional[List[str]]]] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        elif tag == "table":
+            self._flush_text()
+            self._tables.append([])
+            self._outer.append((self._row, self._cell))
+            self._row, self._cell = None, None
+        elif tag == "tr" and self._tables:
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+        elif tag in self.BLOCK_TAGS and self._cell is None:
+            self._flush_text()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in ("td", "th") and self._cell is not None and self._row is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None and self._tables:
+            if any(self._row):
+                self._tables[-1].append(self._row)
+            self._row = None
+        elif tag == "table" and self._tables:
+            table = self._tables.pop()
+            self._row, self._cell = self._outer.pop()
+            if table:
+                self.blocks.append(table)
+        elif tag in self.BLOCK_TAGS and self._cell is None:
+            self._flush_text()
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        elif not self._tables:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+    def _flush_text(self):
+        text = " ".join("".join(self._text).split())
+        if text:
+            self.blocks.append(text)
+        self._text = []
+
+
+class TableSerializer:
+    """Serialize spreadsheets, CSV, HTML and DOCX into compact text for the model.
+
+    Rasterising structured documents to images makes the model OCR back data we
+    already have. Instead, every table becomes a TSV or markdown block (one line per
+    row, trailing empty cells and blank rows dropped) and free text is kept as plain
+    paragraphs. Workbooks are streamed with openpyxl's read-only mode, so large
+    sheets are never loaded as a whole.
+    """
+
+    SUPPORTED_EXTENSIONS = ("xlsx", "xls", "csv", "html", "htm", "docx", "txt", "md")
+    STYLES = ("tsv", "markdown")
+
+    def __init__(self, style: str = "tsv"):
+        self.style = style if style in self.STYLES else "tsv"
+
+    def supports(self, file_extension: str) -> bool:
+        return file_extension.lower().lstrip('.') in self.SUPPORTED_EXTENSIONS
+
+    def serialize(self, content: bytes, file_extension: str) -> str:
+        """
+        Convert a document to text with one block per table
+
+        Args:
+            content: Raw file bytes
+            file_extension: File extension (xlsx, xls, csv, html, htm, docx, txt, md)
+
+        Returns:
+            Text with tables rendered as TSV or markdown
+        """
+        ext = file_extension.lower().lstrip('.')
+        if ext in ("txt", "md"):
+            return self._decode(content)
+        text = "\n\n".join(part for part in (self.render_block(block) for block in self.blocks(content, ext)) if part)
+        logger.info("Serialized {} to {:,} characters of {} text ({:,} bytes in)", ext, len(text), self.style, len(content))
+        return text
+
+    def blocks(self, content: bytes, file_extension: str) -> List:
+        """
+        Read a document into blocks, in document order
+
+        Returns:
+            List of blocks: ``str`` for text (sheet headings start with ``## Sheet:``)
+            and a list of rows (lists of cell strings) for each table
+        """
+        ext = file_extension.lower().lstrip('.')
+        if ext == "xlsx":
+            return self._xlsx_blocks(content)
+        if ext == "xls":
+            return self._xls_blocks(content)
+        if ext == "csv":
+            return [list(csv.reader(io.StringIO(self._decode(content))))]
+        if ext in ("html", "htm"):
+            return self._html_blocks(content)
+        if ext == "docx":
+            return self._docx_blocks(content)
+        if ext in ("txt", "md"):
+            return [self._decode(content)]
+        raise ValueError(f"Unsupported file type for table serialization: {ext}")
+
+    @staticmethod
+    def _decode(content: bytes) -> str:
+        return content.decode("utf-8-sig", errors="replace")
+
+    def _xlsx_blocks(self, content: bytes) -> List:
+        import openpyxl
+        workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            blocks = []
+            for sheet in workbook.worksheets:
+                rows = [[self._cell(value) for value in row] for row in sheet.iter_rows(values_only=True)]
+                if self._clean(rows):
+                    blocks.append(f"## Sheet: {sheet.title}")
+                    blocks.append(rows)
+            return blocks
+        finally:
+            workbook.close()
+
+    def _xls_blocks(self, content: bytes) -> List:
+        try:
+            import xlrd
+        except ImportError:
+            import pandas as pd
+            sheets = pd.read_excel(io.BytesIO(content), sheet_name=None, header=None)
+            blocks = []
+            for name, frame in sheets.items():
+                blocks.append(f"## Sheet: {name}")
+                blocks.append([[self._cell(v) for v in row] for row in frame.itertuples(index=False)])
+            return blocks
+
+        book = xlrd.open_workbook(file_contents=content, on_demand=True)
+        try:
+            blocks = []
+            for index in range(book.nsheets):
+                sheet = book.sheet_by_index(index)
+                rows = []
+                for r in range(sheet.nrows):
+                    row = []
+                    for cell in sheet.row(r):
+                        value = cell.value
+                        if cell.ctype == xlrd.XL_CELL_DATE:
+                            value = xlrd.xldate.xldate_as_datetime(value, book.datemode)
+                        row.append(self._cell(value))
+                    rows.append(row)
+                if self._clean(rows):
+                    blocks.append(f"## Sheet: {sheet.name}")
+                    blocks.append(rows)
+                book.unload_sheet(index)
+            return blocks
+        finally:
+            book.release_resources()
+
+    def _html_blocks(self, content: bytes) -> List:
+        extractor = _HTMLTableExtractor()
+        extractor.feed(self._decode(content))
+        extractor.close()
+        return extractor.blocks
+
+    def _docx_blocks(self, content: bytes) -> List:
+        from docx import Document as DocxDocument
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+
+        document = DocxDocument(io.BytesIO(content))
+        blocks = []
+        # Walk the body in order so tables stay next to the paragraphs that describe them
+        for element in document.element.body.iterchildren():
+            tag = element.tag.rsplit('}', 1)[-1]
+            if tag == "p":
+                text = Paragraph(element, document).text.strip()
+                if text:
+                    blocks.append(text)
+            elif tag == "tbl":
+                rows = []
+                for row in Table(element, document).rows:
+                    cells, seen = [], set()
+                    for cell in row.cells:
+                        # Merged cells are returned once per grid column; keep one copy
+                        if id(cell._tc) in seen:
+                            continue
+                        seen.add(id(cell._tc))
+                        cells.append(self._cell(cell.text))
+                    rows.append(cells)
+                blocks.append(rows)
+        return blocks
+
+    @staticmethod
+    def _cell(value) -> str:
+        if value is None or (isinstance(value, float) and value != value):
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        if isinstance(value, datetime.datetime):
+            return value.date().isoformat() if value.time() == datetime.time() else value.isoformat(sep=" ")
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return " ".join(str(value).split())
+
+    @staticmethod
+    def _clean(rows: TableRows) -> TableRows:
+        """Drop trailing empty cells and blank rows in place"""
+        cleaned = []
+        for row in rows:
+            while row and not row[-1]:
+                row.pop()
+            if row:
+                cleaned.append(row)
+        rows[:] = cleaned
+        return rows
+
+    def render_block(self, block) -> str:
+        """Render a text block as-is and a table block as TSV or markdown"""
+        if isinstance(block, str):
+            return block
+        rows = self.clean_rows(block)
+        if not rows:
+            return ""
+        if self.style == "markdown":
+            return self._markdown(rows)
+        return "\n".join("\t".join(row) for row in rows)
+
+    def clean_rows(self, rows) -> TableRows:
+        """Normalize cells to strings and drop trailing empty cells and blank rows"""
+        return self._clean([[self._cell(value) for value in row] for row in rows])
+
+    @staticmethod
+    def _markdown(rows: Iterable[List[str]]) -> str:
+        rows = list(rows)
+        width = max(len(row) for row in rows)
+        lines = []
+        for index, row in enumerate(rows):
+            cells = [c.replace("|", "\\|") for c in row] + [""] * (width - len(row))
+            lines.append("| " + " | ".join(cells) + " |")
+            if index == 0:
+                lines.append("|" + "---|" * width)
+        return "\n".join(lines)
@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Keep unit tests off disk and away from the on-disk cache and log file
+os.environ.setdefault("LOG_FILE", "")
+os.environ.setdefault("EXTRACTION_CACHE_ENABLED", "false")
+os.environ.setdefault("ENABLE_SPREADSHEET_FAST_PATH", "false")
+
+
+@pytest.fixture
+def fake_bedrock():
+    """A local bedrock-runtime stand-in returned by get_bedrock_client()"""
+    from benchmarks.fake_bedrock import FakeBedrockRuntime, install
+    return install(FakeBedrockRuntime(latency=0.0, jitter=0.0))
+
+
+@pytest.fixture
+def llm_service(fake_bedrock, monkeypatch):
+    """An LLMService on the stand-in with its own invoker; settings changes are undone after the test"""
+    from config import get_settings
+    from services.bedrock_invoker import BedrockInvoker
+    from services.llm_service import LLMService
+
+    settings = get_settings()
+    for name in ("BEDROCK_PROMPT_CACHING", "CLAUDE_MODEL_ID"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    service = LLMService()
+    service.invoker = BedrockInvoker(max_concurrency=4)
+    yield service
+    service.invoker.shutdown()
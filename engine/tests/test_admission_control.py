@@ -0,0 +1,160 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from config import get_settings
+from benchmarks.samples import build_document
+from services.admission_control import AdmissionController, AdmissionMiddleware
+
+
+def build_app(controller: AdmissionController) -> FastAPI:
+    app = FastAPI()
+    app.post("/api/v1/timesheet/extract")(lambda: {"ok": True})
+    app.get("/health")(lambda: {"status": "healthy"})
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app
+
+
+async def post_many(app: FastAPI, count: int, path: str = "/api/v1/timesheet/extract"):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return [await client.post(path) for _ in range(count)]
+
+
+def test_token_bucket_allows_the_burst_then_rejects():
+    controller = AdmissionController(rate_per_minute=60, burst=2)
+
+    assert controller.take_token("a") is None
+    assert controller.take_token("a") is None
+    retry_after = controller.take_token("a")
+    assert retry_after is not None and 0.0 < retry_after <= 1.0
+    # Other clients have their own bucket
+    assert controller.take_token("b") is None
+    assert controller.stats()["rejected_rate_limited"] == 1
+
+
+def test_refund_gives_the_token_back():
+    controller = AdmissionController(rate_per_minute=60, burst=1)
+
+    assert controller.take_token("a") is None
+    controller.refund_token("a")
+    assert controller.take_token("a") is None
+
+
+def test_rate_limited_request_gets_429_with_retry_after():
+    controller = AdmissionController(rate_per_minute=6, burst=2)
+
+    replies = asyncio.run(post_many(build_app(controller), 3))
+
+    assert [reply.status_code for reply in replies] == [200, 200, 429]
+    assert replies[2].headers["Retry-After"] == "10"
+    assert replies[2].json()["error"] == "Rate limit exceeded"
+
+
+def test_clients_are_told_apart_by_the_configured_header(monkeypatch):
+    monkeypatch.setattr(get_settings(), "RATE_LIMIT_CLIENT_HEADER", "X-Client-Id")
+    app = build_app(AdmissionController(rate_per_minute=60, burst=1))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return [
+                (await client.post("/api/v1/timesheet/extract", headers={"X-Client-Id": tenant})).status_code
+                for tenant in ("one", "two", "one")
+            ]
+
+    assert asyncio.run(scenario()) == [200, 200, 429]
+
+
+def test_requests_outside_the_prefix_are_not_limited():
+    controller = AdmissionController(rate_per_minute=60, burst=1)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=build_app(controller))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.get("/health")).status_code for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [200, 200, 200]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_size=1, queue_timeout=5.0)
+        assert await controller.acquire() is None
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        rejected = await controller.acquire()
+        controller.release(0.5)
+        admitted = await queued
+        return rejected, admitted, controller.stats()
+
+    rejected, admitted, stats = asyncio.run(scenario())
+
+    assert rejected is not None and rejected > 0
+    assert admitted is None
+    assert stats["rejected_overloaded"] == 1
+    assert stats["in_flight"] == 1
+
+
+def test_queue_timeout_returns_retry_after_and_frees_the_place():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_size=1, queue_timeout=0.01)
+        await controller.acquire()
+        retry_after = await controller.acquire()
+        return retry_after, controller.waiting, controller.in_flight
+
+    retry_after, waiting, in_flight = asyncio.run(scenario())
+
+    assert retry_after is not None
+    assert (waiting, in_flight) == (0, 1)
+
+
+def test_request_larger_than_the_burst_is_admitted_once_and_leaves_debt():
+    controller = AdmissionController(rate_per_minute=60, burst=4)
+
+    assert controller.take_token("a", 10) is None
+    retry_after = controller.take_token("a")
+    # Six tokens of debt plus one for this request at one token per second
+    assert 6.5 < retry_after <= 7.0
+
+
+def test_blocking_acquire_waits_past_the_queue_bound():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_size=0, queue_timeout=0.01)
+        await controller.acquire()
+        assert await controller.acquire() is not None
+        blocked = asyncio.create_task(controller.acquire(block=True))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        controller.release(0.1)
+        return await blocked
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_batch_uses_up_the_per_client_budget(llm_service, fake_bedrock, monkeypatch):
+    from routers import timesheet
+
+    monkeypatch.setattr(timesheet, "llm_service", llm_service)
+    controller = AdmissionController(rate_per_minute=60, burst=4)
+    app = FastAPI()
+    app.include_router(timesheet.router)
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    documents = [build_document("csv", 2, f"#{index}") for index in range(3)]
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def post(path, count):
+                files = [("files" if path.endswith("batch") else "file", (f"t{i}.csv", documents[i], "text/csv")) for i in range(count)]
+                return await client.post(f"/api/v1/timesheet/{path}", files=files)
+
+            return [await post("extract-batch", 3), await post("extract-batch", 3), await post("extract", 1), await post("extract", 1)]
+
+    batch, second_batch, single, over = asyncio.run(scenario())
+
+    assert batch.status_code == 200 and all(result["success"] for result in batch.json())
+    assert second_batch.status_code == 429
+    assert int(second_batch.headers["Retry-After"]) >= 2
+    # The batch took three of the four tokens; one single request is left
+    assert (single.status_code, over.status_code) == (200, 429)
+    assert len(fake_bedrock.requests) == 4
+    assert controller.in_flight == 0
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+from services.bedrock_invoker import BedrockInvoker
+from services.concurrency_limiter import AIMDLimiter
+
+
+class BlockingClient:
+    """converse/converse_stream stand-ins that block their pool thread until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def converse(self, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return {"output": {"message": {"content": [{"text": "ok"}]}}}
+
+    def converse_stream(self, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return {"stream": iter([{"messageStart": {}}, {"messageStop": {}}])}
+
+
+async def wait_until(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_call_finishes():
+    async def scenario():
+        client = BlockingClient()
+        limiter = AIMDLimiter(max_limit=1)
+        invoker = BedrockInvoker(max_concurrency=4, limiter=limiter)
+        try:
+            caller = asyncio.create_task(invoker.converse(client))
+            await wait_until(lambda: client.calls == 1)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+
+            # The model call is still running on its thread, so the slot stays taken
+            assert (limiter.in_use, invoker.in_flight) == (1, 1)
+            follower = asyncio.create_task(invoker.converse(client))
+            await asyncio.sleep(0.05)
+            assert client.calls == 1
+
+            client.release.set()
+            response = await asyncio.wait_for(follower, 2)
+            return response, limiter.in_use, invoker.in_flight, client.calls
+        finally:
+            client.release.set()
+            invoker.shutdown()
+
+    response, in_use, in_flight, calls = asyncio.run(scenario())
+
+    assert response["output"]["message"]["content"][0]["text"] == "ok"
+    assert (in_use, in_flight, calls) == (0, 0, 2)
+
+
+def test_abandoned_stream_keeps_the_slot_until_the_thread_returns():
+    async def scenario():
+        client = BlockingClient()
+        limiter = AIMDLimiter(max_limit=1)
+        invoker = BedrockInvoker(max_concurrency=4, limiter=limiter)
+        try:
+            async def consume():
+                return [event async for event in invoker.converse_stream(client)]
+
+            caller = asyncio.create_task(consume())
+            await wait_until(lambda: client.calls == 1)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            held = limiter.in_use
+
+            client.release.set()
+            await wait_until(lambda: limiter.in_use == 0)
+            return held, invoker.in_flight
+        finally:
+            client.release.set()
+            invoker.shutdown()
+
+    assert asyncio.run(scenario()) == (1, 0)
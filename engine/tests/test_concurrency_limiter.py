@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError, ConnectionClosedError
+
+from services.concurrency_limiter import AIMDLimiter, backoff_delay, is_retryable_error, is_throttling_error
+
+
+def client_error(code: str, status: int) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "Converse")
+
+
+def test_throttles_from_one_window_decrease_the_limit_once():
+    limiter = AIMDLimiter(max_limit=16)
+    window = [time.monotonic() for _ in range(5)]
+
+    for started in window:
+        limiter.on_throttle(started)
+
+    assert limiter.limit == 8
+    assert limiter.stats()["throttles"] == 5
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_a_throttle_after_the_decrease_decreases_again():
+    limiter = AIMDLimiter(max_limit=16)
+    limiter.on_throttle(time.monotonic())
+    limiter.on_throttle(time.monotonic())
+
+    assert limiter.limit == 4
+
+
+def test_decrease_stops_at_the_minimum():
+    limiter = AIMDLimiter(max_limit=4, min_limit=2)
+    for _ in range(5):
+        limiter.on_throttle(time.monotonic())
+
+    assert limiter.limit == 2
+
+
+def test_successes_recover_about_one_slot_per_window():
+    limiter = AIMDLimiter(max_limit=16, initial_limit=4)
+
+    for _ in range(4):
+        limiter.on_success()
+    assert 4.9 < limiter.limit < 5.0
+
+    for _ in range(1000):
+        limiter.on_success()
+    assert limiter.limit == 16
+
+
+def test_waiters_are_admitted_in_fifo_order():
+    async def scenario():
+        limiter = AIMDLimiter(max_limit=4, initial_limit=1)
+        await limiter.acquire()
+        order = []
+
+        async def call(name):
+            await limiter.acquire()
+            order.append(name)
+            limiter.release()
+
+        tasks = [asyncio.create_task(call(name)) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        assert limiter.waiting == 2
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+
+def test_a_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        limiter = AIMDLimiter(max_limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        return limiter.in_use, limiter.waiting
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+@pytest.mark.parametrize("attempt", range(6))
+def test_backoff_delay_is_jittered_below_the_exponential_cap(attempt):
+    delays = [backoff_delay(attempt, base=0.5, cap=4.0) for _ in range(200)]
+
+    assert all(0.0 <= delay <= min(4.0, 0.5 * 2 ** attempt) for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (client_error("ThrottlingException", 400), True),
+    (client_error("serviceUnavailableException", 400), True),
+    (client_error("SomethingElse", 429), True),
+    (client_error("InternalFailure", 503), True),
+    (ConnectionClosedError(endpoint_url="https://bedrock"), True),
+    (client_error("ValidationException", 400), False),
+    (client_error("AccessDeniedException", 403), False),
+    (ValueError("not a Bedrock error"), False),
+])
+def test_is_retryable_error(error, retryable):
+    assert is_retryable_error(error) is retryable
+
+
+def test_dropped_connections_are_retryable_but_not_throttling():
+    error = ConnectionClosedError(endpoint_url="https://bedrock")
+
+    assert not is_throttling_error(error)
+    assert is_retryable_error(error)
@@ -0,0 +1,104 @@
+import pytest
+
+from models import DailyHours, EmployeeTimesheet
+from services.document_chunker import DocumentChunker, merge_timesheets
+from services.table_serializer import TableSerializer
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def timesheet(name: str, hours, **fields) -> EmployeeTimesheet:
+    return EmployeeTimesheet(
+        client_name=name,
+        week_hours=[DailyHours(day=day, hours=h) for day, h in zip(DAYS, hours)],
+        total_hours=sum(hours),
+        **fields,
+    )
+
+
+def days(entry: EmployeeTimesheet):
+    return [day.hours for day in entry.week_hours]
+
+
+def roster(employees: int) -> bytes:
+    lines = ["Acme Corp weekly hours", "Name,Mon,Tue,Wed,Thu,Fri"]
+    lines += [f"Employee {index},8,8,8,8,8" for index in range(employees)]
+    return "\n".join(lines).encode("utf-8")
+
+
+def test_table_split_respects_the_row_budget_and_repeats_the_header():
+    chunks = DocumentChunker(TableSerializer(), max_rows=4).chunk(roster(10), "csv")
+
+    assert [chunk["label"] for chunk in chunks] == ["rows 1-4", "rows 5-8", "rows 9-10"]
+    bodies = []
+    for chunk in chunks:
+        lines = chunk["content"].decode("utf-8").splitlines()
+        assert chunk["format"] == "txt"
+        assert lines[:2] == ["Acme Corp weekly hours", "Name\tMon\tTue\tWed\tThu\tFri"]
+        assert len(lines) - 2 <= 4
+        bodies += lines[2:]
+    # Every row is sent exactly once
+    assert bodies == [f"Employee {index}\t8\t8\t8\t8\t8" for index in range(10)]
+
+
+def test_small_table_is_sent_whole():
+    content = roster(3)
+
+    assert DocumentChunker(TableSerializer(), max_rows=4).chunk(content, "csv") == [
+        {"content": content, "format": "csv", "label": "document"}
+    ]
+
+
+def test_pdf_split_respects_the_page_budget():
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for index in range(5):
+        doc.new_page().insert_text((72, 72), f"Page {index + 1}")
+    content = doc.tobytes()
+
+    chunks = DocumentChunker(max_pages=2).chunk(content, "pdf")
+
+    assert [chunk["label"] for chunk in chunks] == ["pages 1-2", "pages 3-4", "pages 5-5"]
+    assert [len(fitz.open(stream=chunk["content"], filetype="pdf")) for chunk in chunks] == [2, 2, 1]
+
+
+def test_employee_split_across_chunks_is_merged_with_summed_days():
+    merged = merge_timesheets([
+        [timesheet("Ann Lee", [8, 8, 0, 0, 0, 0, 0], period="Week 41"), timesheet("Bob", [8, 8, 8, 8, 8, 0, 0])],
+        [timesheet("ann  lee", [0, 0, 8, 8, 6, 0, 0], period="week 41", client_id="E1")],
+    ])
+
+    assert [entry.client_name for entry in merged] == ["Ann Lee", "Bob"]
+    assert days(merged[0]) == [8, 8, 8, 8, 6, 0, 0]
+    assert merged[0].total_hours == 38
+    # Fields the first part left empty are filled from the second
+    assert (merged[0].client_id, merged[0].period) == ("E1", "Week 41")
+
+
+def test_identical_duplicates_are_not_double_counted():
+    ann = [8, 8, 8, 8, 8, 0, 0]
+
+    merged = merge_timesheets([
+        [timesheet("Ann", ann)],
+        [timesheet("Ann", ann), timesheet("Cy", [4, 0, 0, 0, 0, 0, 0])],
+        [timesheet("Ann", ann)],
+    ])
+
+    assert [(entry.client_name, entry.total_hours) for entry in merged] == [("Ann", 40), ("Cy", 4)]
+
+
+def test_different_weeks_and_same_chunk_entries_are_kept_apart():
+    merged = merge_timesheets([
+        [timesheet("Ann", [8] * 5 + [0, 0], week_start="2025-10-06"), timesheet("Ann", [8] * 5 + [0, 0], week_start="2025-10-13")],
+        [timesheet("Ann", [1, 0, 0, 0, 0, 0, 0], week_start="2025-10-20")],
+    ])
+
+    assert [(entry.week_start, entry.total_hours) for entry in merged] == [
+        ("2025-10-06", 40), ("2025-10-13", 40), ("2025-10-20", 1)
+    ]
+
+
+def test_entries_without_a_name_are_always_kept():
+    nameless = EmployeeTimesheet(total_hours=8)
+
+    assert len(merge_timesheets([[nameless], [nameless]])) == 2
@@ -0,0 +1,39 @@
+import asyncio
+
+from services.extraction_cache import ExtractionCache
+
+EMPLOYEES = [{"client_name": "Ann", "total_hours": 40.0}]
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+
+    async def scenario():
+        await ExtractionCache(10, 3600, db_path).set("key", "hash", EMPLOYEES)
+        cache = ExtractionCache(10, 3600, db_path)
+        return await cache.get("key"), await cache.get("other"), await cache.stats()
+
+    hit, miss, stats = asyncio.run(scenario())
+
+    assert hit == EMPLOYEES
+    assert miss is None
+    assert stats["disk_entries"] == 1
+    assert stats["memory_entries"] == 1
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_stats_without_a_disk_tier():
+    stats = asyncio.run(ExtractionCache(10, 3600).stats())
+
+    assert stats["disk_entries"] is None
+
+
+def test_invalidate_by_content_hash(tmp_path):
+    async def scenario():
+        cache = ExtractionCache(10, 3600, str(tmp_path / "cache.db"))
+        await cache.set("a:model:v1", "a", EMPLOYEES)
+        await cache.set("b:model:v1", "b", EMPLOYEES)
+        removed = await cache.invalidate("a")
+        return removed, await cache.get("a:model:v1"), (await cache.stats())["disk_entries"]
+
+    assert asyncio.run(scenario()) == (1, None, 1)
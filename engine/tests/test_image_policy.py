@@ -0,0 +1,43 @@
+import io
+import os
+
+from PIL import Image
+
+from utils.image_policy import BUDGET_MAX_SHRINKS, BUDGET_SHRINK_FACTOR, ImagePolicy
+
+
+def noise(width: int, height: int) -> Image.Image:
+    return Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+
+
+def decoded_size(content: bytes):
+    return Image.open(io.BytesIO(content)).size
+
+
+def test_small_image_stays_png():
+    content, image_format, img = ImagePolicy()._encode_within_budget(Image.new("RGB", (200, 100), "white"))
+
+    assert image_format == "png"
+    assert decoded_size(content) == img.size == (200, 100)
+
+
+def test_shrunk_image_matches_the_returned_bytes():
+    policy = ImagePolicy(max_bytes=60 * 1024)
+
+    content, image_format, img = policy._encode_within_budget(noise(800, 600))
+
+    assert image_format == "jpeg"
+    assert len(content) <= policy.max_bytes
+    assert img.width < 800
+    assert decoded_size(content) == img.size
+
+
+def test_best_effort_result_reports_the_size_that_was_encoded():
+    # Unreachable budget: every shrink is tried and the last encoding is returned
+    policy = ImagePolicy(max_bytes=1)
+
+    content, image_format, img = policy._encode_within_budget(noise(400, 300))
+
+    assert image_format == "jpeg"
+    assert decoded_size(content) == img.size
+    assert img.width == round(400 * BUDGET_SHRINK_FACTOR ** BUDGET_MAX_SHRINKS)
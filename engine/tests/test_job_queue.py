@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from services.job_queue import ExtractionJobManager
+
+
+async def processor(job_file):
+    return {"success": True, "data": []}
+
+
+def test_expired_jobs_are_purged_from_memory_and_disk(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        manager = ExtractionJobManager(processor, worker_count=1, db_path=db_path, retention_seconds=60)
+        old = await manager.submit([])
+        old["finished_at"] = time.time() - 120
+        new = await manager.submit([])
+        rows = manager._db.execute("SELECT job_id FROM extraction_jobs").fetchall()
+        return old["job_id"], new["job_id"], manager.get(old["job_id"]), rows
+
+    _, new_id, purged, rows = asyncio.run(scenario())
+
+    assert purged is None
+    assert rows == [(new_id,)]
+
+
+def test_unfinished_jobs_are_kept():
+    async def scenario():
+        manager = ExtractionJobManager(processor, worker_count=1, retention_seconds=60)
+        job = await manager.submit([{"path": "", "filename": "a.csv", "extension": ".csv"}])
+        job["created_at"] = time.time() - 120
+        await manager.submit([])
+        return manager.get(job["job_id"])
+
+    assert asyncio.run(scenario()) is not None
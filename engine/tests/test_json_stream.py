@@ -0,0 +1,72 @@
+import pytest
+
+from utils.json_stream import EmployeeStreamParser, locate_json
+
+PAYLOAD = '{"employees": [{"name": "Ann \\"A\\" Lee", "h": [8, 8, 8, 8, 8, 0, 0]}, {"name": "Bob {x} [y]", "total": 40}]}'
+EXPECTED = [{"name": 'Ann "A" Lee', "h": [8, 8, 8, 8, 8, 0, 0]}, {"name": "Bob {x} [y]", "total": 40}]
+
+
+def feed_in_chunks(text: str, size: int):
+    parser = EmployeeStreamParser()
+    employees = []
+    for start in range(0, len(text), size):
+        employees.extend(parser.feed(text[start:start + size]))
+    return employees, parser.done
+
+
+@pytest.mark.parametrize("prefix", [
+    "",
+    "```json\n",
+    "Here are the results [as requested]:\n",
+    'The "timesheet" below [see {notes}] has "two rows:\n',
+    "Example {} and [] first, then the answer: ",
+    'An example: {"note": "not it"}\n',
+])
+def test_leading_prose_is_skipped(prefix):
+    employees, done = feed_in_chunks(prefix + PAYLOAD + "\n```", len(prefix + PAYLOAD) + 3)
+
+    assert employees == EXPECTED
+    assert done
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_chunk_boundaries_inside_strings_and_escapes(size):
+    employees, done = feed_in_chunks('Sure [ok]: "' + PAYLOAD, size)
+
+    assert employees == EXPECTED
+    assert done
+
+
+def test_top_level_array():
+    employees, done = feed_in_chunks('Result [2 rows]: [{"name": "Ann"}, {"name": "Bob"}] done', 4)
+
+    assert employees == [{"name": "Ann"}, {"name": "Bob"}]
+    assert done
+
+
+def test_array_under_a_container_key_other_than_employees():
+    employees, _ = feed_in_chunks('{"count": 1, "tags": [{"x": 1}], "results": [{"name": "Ann"}]}', 5)
+
+    assert employees == [{"name": "Ann"}]
+
+
+def test_truncated_final_object_is_not_emitted():
+    truncated = 'Here [you go]: {"employees": [{"name": "Ann", "total": 40}, {"name": "Bob", "h": [8, 8'
+
+    employees, done = feed_in_chunks(truncated, 6)
+
+    assert employees == [{"name": "Ann", "total": 40}]
+    assert not done
+
+
+def test_nothing_is_emitted_after_the_array_closes():
+    parser = EmployeeStreamParser()
+
+    assert parser.feed(PAYLOAD) == EXPECTED
+    assert parser.feed('{"employees": [{"name": "Late"}]}') == []
+
+
+def test_locate_json_skips_prose_brackets():
+    text = 'Notes [draft] {not json} then ' + PAYLOAD
+
+    assert locate_json(text, accept=lambda value: isinstance(value, dict) and "employees" in value)["employees"] == EXPECTED
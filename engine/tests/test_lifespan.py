@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def app(fake_bedrock, monkeypatch):
+    from config import get_settings
+    monkeypatch.setattr(get_settings(), "BEDROCK_WARMUP_CONNECTIONS", 0)
+    import main
+    return main.app
+
+
+def test_restarted_lifespan_gets_a_live_invoker(app):
+    from routers import timesheet
+    from services.bedrock_invoker import get_bedrock_invoker
+
+    invokers = []
+    for _ in range(2):
+        with TestClient(app):
+            invokers.append(timesheet.llm_service.invoker)
+            assert invokers[-1] is get_bedrock_invoker()
+            assert not invokers[-1]._executor._shutdown
+
+    assert invokers[0] is not invokers[1]
+    assert all(invoker._executor._shutdown for invoker in invokers)
+
+
+def test_metrics_scrape_after_shutdown_does_not_build_an_invoker(app):
+    prometheus_client = pytest.importorskip("prometheus_client")
+    from services.bedrock_invoker import get_bedrock_invoker
+    from utils import metrics
+
+    if not metrics.METRICS_ENABLED:
+        pytest.skip("METRICS_ENABLED is off")
+    with TestClient(app):
+        pass
+    prometheus_client.generate_latest()
+
+    assert get_bedrock_invoker.cache_info().currsize == 0
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent
+
+# utils.metrics reads METRICS_ENABLED at import, so each case runs in a fresh interpreter
+SCRIPT = """
+from prometheus_client import REGISTRY
+from utils import metrics
+with metrics.observe_stage("model_call", "csv", "model") as stage_span:
+    pass
+metrics.record_bedrock_usage({"inputTokens": 10, "outputTokens": 5}, 120.0, "model", "csv")
+metrics.EXTRACTIONS.labels("csv", "model", "success").inc()
+print(REGISTRY.get_sample_value("timesheet_bedrock_tokens_total", {"model_id": "model", "file_type": "csv", "direction": "input"}))
+print(REGISTRY.get_sample_value("timesheet_stage_duration_seconds_count", {"stage": "model_call", "file_type": "csv", "model_id": "model"}))
+print(any(name.startswith("timesheet_") for name in REGISTRY._names_to_collectors))
+"""
+
+
+def run_with_metrics(enabled: bool):
+    env = {**os.environ, "METRICS_ENABLED": str(enabled).lower(), "LOG_FILE": ""}
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ENGINE_DIR, env=env, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_helpers_record_when_enabled():
+    assert run_with_metrics(True) == ["10.0", "1.0", "True"]
+
+
+def test_helpers_are_noops_when_disabled():
+    assert run_with_metrics(False) == ["None", "None", "False"]
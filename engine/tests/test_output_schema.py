@@ -0,0 +1,70 @@
+import pytest
+
+from utils.output_schema import expand_employee, expand_hours
+
+VERBOSE = {
+    "client_id": "E1",
+    "client_name": "Ann",
+    "employee_name": None,
+    "week_hours": [{"day": "Mon", "hours": 8.0}],
+    "total_hours": 8.0,
+}
+
+
+def test_compact_entry_is_expanded():
+    entry = {"id": "E1", "name": "Ann", "period": "Oct 6 - Oct 12", "start": "2025-10-06", "end": "2025-10-12",
+             "h": [8, 8, 7.5, 8, None, 0, 0], "total": 31.5}
+
+    assert expand_employee(entry) == {
+        "client_id": "E1",
+        "client_name": "Ann",
+        "period": "Oct 6 - Oct 12",
+        "week_start": "2025-10-06",
+        "week_end": "2025-10-12",
+        "week_hours": [
+            {"day": "Mon", "hours": 8.0},
+            {"day": "Tue", "hours": 8.0},
+            {"day": "Wed", "hours": 7.5},
+            {"day": "Thu", "hours": 8.0},
+            {"day": "Fri", "hours": 0.0},
+            {"day": "Sat", "hours": 0.0},
+            {"day": "Sun", "hours": 0.0},
+        ],
+        "total_hours": 31.5,
+    }
+
+
+def test_missing_total_is_the_sum_of_the_days():
+    assert expand_employee({"name": "Ann", "h": [8, 8, 8, 8, 4, 0, 0]})["total_hours"] == 36.0
+
+
+def test_nested_weeks_are_expanded():
+    entry = {"name": "Ann", "weeks": [{"start": "2025-10-06", "h": [8, 8, 8, 8, 8, 0, 0]},
+                                      {"start": "2025-10-13", "h": [4, 0, 0, 0, 0, 0, 0], "total": 4}]}
+
+    expanded = expand_employee(entry)
+
+    assert expanded["client_name"] == "Ann"
+    assert [week["week_start"] for week in expanded["weeks"]] == ["2025-10-06", "2025-10-13"]
+    assert [week["total_hours"] for week in expanded["weeks"]] == [40.0, 4]
+    assert expanded["weeks"][0]["week_hours"][0] == {"day": "Mon", "hours": 8.0}
+
+
+def test_verbose_parent_with_compact_weeks_is_expanded():
+    entry = {"client_name": "Ann", "weeks": [{"h": [1, 2, 3, 4, 5, 6, 7]}]}
+
+    expanded = expand_employee(entry)
+
+    assert expanded["client_name"] == "Ann"
+    assert expanded["weeks"][0]["total_hours"] == 28.0
+
+
+@pytest.mark.parametrize("entry", [VERBOSE, {**VERBOSE, "weeks": [dict(VERBOSE)]}, "not a dict", None])
+def test_verbose_entries_pass_through_unchanged(entry):
+    assert expand_employee(entry) is entry
+
+
+def test_non_positional_hours_pass_through():
+    hours = [{"day": "Mon", "hours": 8.0}]
+
+    assert expand_hours(hours) is hours
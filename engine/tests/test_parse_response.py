@@ -0,0 +1,18 @@
+import json
+
+HOURS = [8, 8, 8, 8, 8, 0, 0]
+
+
+def test_bare_verbose_object_is_accepted(llm_service):
+    reply = json.dumps({"client_name": "Solo", "week_hours": [{"day": "Mon", "hours": 8}], "total_hours": 8})
+    [timesheet] = llm_service._parse_response(reply)
+    assert timesheet.client_name == "Solo"
+    assert timesheet.total_hours == 8
+
+
+def test_bare_compact_object_is_accepted(llm_service):
+    reply = json.dumps({"name": "Solo", "h": HOURS, "total": 40})
+    [timesheet] = llm_service._parse_response(reply)
+    assert timesheet.client_name == "Solo"
+    assert [day.hours for day in timesheet.week_hours] == HOURS
+    assert timesheet.total_hours == 40
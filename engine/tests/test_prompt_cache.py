@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_bedrock import validate_request
+from benchmarks.samples import build_document
+from config import Settings
+from services.llm_service import CACHE_POINT, EXTRACTION_USER_PROMPT, SYSTEM_PROMPTS
+
+CACHING_MODEL = "us.anthropic.claude-sonnet-4-20250514-v1:0"
+
+
+def extract(service, tag: str, output_schema: str = "verbose"):
+    document = build_document("csv", 3, tag)
+    return asyncio.run(service.extract_timesheet_from_bytes(document, "csv", output_schema=output_schema))
+
+
+def test_prompt_caching_is_off_by_default():
+    assert Settings.model_fields["BEDROCK_PROMPT_CACHING"].default is False
+
+
+@pytest.mark.parametrize("output_schema", ["verbose", "compact"])
+def test_cached_request_shape(llm_service, fake_bedrock, output_schema):
+    llm_service.settings.BEDROCK_PROMPT_CACHING = True
+    llm_service.settings.CLAUDE_MODEL_ID = CACHING_MODEL
+
+    for index in range(3):
+        assert extract(llm_service, f"#{index}", output_schema)
+
+    assert len(fake_bedrock.requests) == 3
+    for request in fake_bedrock.requests:
+        assert validate_request(request) == []
+        # Byte-identical static prefix followed by the cache point
+        assert request["system"] == [{"text": SYSTEM_PROMPTS[output_schema]}, CACHE_POINT]
+        texts = [block["text"] for block in request["messages"][0]["content"] if "text" in block]
+        assert texts == [EXTRACTION_USER_PROMPT]
+    assert fake_bedrock.cache_writes == 1
+    assert fake_bedrock.cache_reads == 2
+
+
+def test_no_cache_point_when_disabled(llm_service, fake_bedrock):
+    llm_service.settings.BEDROCK_PROMPT_CACHING = False
+    llm_service.settings.CLAUDE_MODEL_ID = CACHING_MODEL
+
+    assert extract(llm_service, "disabled")
+    assert fake_bedrock.requests[0]["system"] == [{"text": SYSTEM_PROMPTS["verbose"]}]
+
+
+@pytest.mark.parametrize("model_id", ["anthropic.claude-v1", "us.anthropic.claude-3-5-sonnet-20241022-v2:0", "meta.llama3-8b-instruct-v1:0"])
+def test_no_cache_point_for_models_without_prompt_caching(llm_service, fake_bedrock, model_id):
+    llm_service.settings.BEDROCK_PROMPT_CACHING = True
+    llm_service.settings.CLAUDE_MODEL_ID = model_id
+
+    assert extract(llm_service, model_id)
+    assert CACHE_POINT not in fake_bedrock.requests[0]["system"]
+
+
+def test_rejected_cache_point_is_retried_without_it(llm_service, fake_bedrock):
+    llm_service.settings.BEDROCK_PROMPT_CACHING = True
+    llm_service.settings.CLAUDE_MODEL_ID = CACHING_MODEL
+    fake_bedrock.prompt_caching = False
+
+    assert extract(llm_service, "buffered")
+    assert CACHING_MODEL in llm_service.models_without_prompt_cache
+    # Later calls skip the cache point instead of failing first
+    assert extract(llm_service, "again")
+    assert all(CACHE_POINT not in request["system"] for request in fake_bedrock.requests)
+
+
+def test_rejected_cache_point_is_retried_when_streaming(llm_service, fake_bedrock):
+    llm_service.settings.BEDROCK_PROMPT_CACHING = True
+    llm_service.settings.CLAUDE_MODEL_ID = CACHING_MODEL
+    fake_bedrock.prompt_caching = False
+
+    async def stream():
+        document = build_document("csv", 3, "streamed")
+        return [timesheet async for timesheet in llm_service.stream_timesheet_from_bytes(document, "csv")]
+
+    assert len(asyncio.run(stream())) == 3
+    assert CACHING_MODEL in llm_service.models_without_prompt_cache
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        return results, len(calls), len(flight)
+
+    results, calls, pending = asyncio.run(scenario())
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["result"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert pending == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        return await second
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_work_finishes_when_every_caller_is_cancelled():
+    async def scenario():
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            finished.set()
+
+        caller = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.wait_for(finished.wait(), timeout=1.0)
+        await asyncio.sleep(0)
+        return len(flight)
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_errors_reach_every_caller_and_the_key_is_released():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        async def succeeding():
+            return "ok"
+
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        retried = await flight.do("key", succeeding)
+        return results, retried
+
+    results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retried == ("ok", False)
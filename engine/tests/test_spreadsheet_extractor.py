@@ -0,0 +1,58 @@
+import pytest
+
+from services.spreadsheet_extractor import DAY_HEADER_PATTERN, SpreadsheetExtractor
+
+
+def extract(csv_text: str):
+    return SpreadsheetExtractor().extract(csv_text.encode("utf-8"), "csv")
+
+
+def hours_by_day(timesheet):
+    return {entry.day: entry.hours for entry in timesheet.week_hours}
+
+
+def test_clean_weekly_sheet():
+    timesheets = extract(
+        "Weekly timesheet export\n"
+        "Employee ID,Name,Mon,Tue,Wed,Thu,Fri,Sat,Sun,Total\n"
+        "E1,Ann Lee,8,8,7.5,8,8,0,0,39.5\n"
+        "E2,Bob Roy,8:30,8,8,8,4,,,36.5\n"
+        "Total,,,,,,,,,76\n"
+    )
+
+    assert [(t.client_id, t.client_name, t.total_hours) for t in timesheets] == [("E1", "Ann Lee", 39.5), ("E2", "Bob Roy", 36.5)]
+    assert hours_by_day(timesheets[1]) == {"Mon": 8.5, "Tue": 8.0, "Wed": 8.0, "Thu": 8.0, "Fri": 4.0, "Sat": 0.0, "Sun": 0.0}
+
+
+def test_full_day_names_are_recognised():
+    timesheets = extract("Name,Monday,Tues.,Wednesday (Oct 22),Thurs,Friday\nAnn,1,2,3,4,5\n")
+
+    assert hours_by_day(timesheets[0]) == {"Mon": 1.0, "Tue": 2.0, "Wed": 3.0, "Thu": 4.0, "Fri": 5.0, "Sat": 0.0, "Sun": 0.0}
+
+
+def test_month_columns_are_not_read_as_monday():
+    timesheets = extract(
+        "Name,Month,Monthly Total,Mon,Tue,Wed,Thu,Fri\n"
+        "Ann,October,160,8,8,8,8,8\n"
+    )
+
+    assert timesheets is not None
+    assert hours_by_day(timesheets[0])["Mon"] == 8.0
+    assert timesheets[0].total_hours == 40.0
+
+
+@pytest.mark.parametrize("header", ["month", "monthly total", "sunk", "saturation", "thumbnail", "friendly name"])
+def test_words_starting_with_a_day_prefix_are_not_days(header):
+    assert DAY_HEADER_PATTERN.match(header) is None
+
+
+@pytest.mark.parametrize("csv_text", [
+    # Free-text hours need the model
+    "Name,Mon,Tue,Wed,Thu,Fri\nAnn,8,8,sick,8,8\n",
+    # No name or client column
+    "Mon,Tue,Wed,Thu,Fri\n8,8,8,8,8\n",
+    # Days across rows instead of columns
+    "Name,Day,Hours\nAnn,Mon,8\nAnn,Tue,8\n",
+])
+def test_unrecognised_or_ambiguous_sheets_fall_back_to_the_model(csv_text):
+    assert extract(csv_text) is None
@@ -0,0 +1,26 @@
+from services.table_serializer import TableSerializer
+
+
+def html_blocks(html: str):
+    return TableSerializer().blocks(html.encode("utf-8"), ".html")
+
+
+def test_text_and_tables_keep_document_order():
+    blocks = html_blocks("<h1>Week 41</h1><table><tr><th>Name</th><th>Mon</th></tr><tr><td>Ann</td><td>8</td></tr></table><p>Signed</p>")
+
+    assert blocks == ["Week 41", [["Name", "Mon"], ["Ann", "8"]], "Signed"]
+
+
+def test_nested_table_does_not_clobber_the_outer_row():
+    blocks = html_blocks(
+        "<table>"
+        "<tr><td>Name</td><td>Mon</td><td>Notes</td></tr>"
+        "<tr><td>Ann</td><td>8</td><td>see <table><tr><td>x</td><td>y</td></tr></table> end</td></tr>"
+        "<tr><td>Bob</td><td>7</td><td>ok</td></tr>"
+        "</table>"
+    )
+
+    assert blocks == [
+        [["x", "y"]],
+        [["Name", "Mon", "Notes"], ["Ann", "8", "see end"], ["Bob", "7", "ok"]],
+    ]
@@ -1,76 +1,134 @@
 import os
+import hashlib
 import tempfile
 from pathlib import Path
-from fastapi import UploadFile
+from fastapi import UploadFile, HTTPException
 from loguru import logger
 from typing import Optional
+from config import get_settings
 
 
 class FileHandler:
     """Handle file operations"""
-    
+
     @staticmethod
-    async def save_temp_file(file: UploadFile) -> tuple[str, str]:
+    async def _stream_chunks(file: UploadFile):
+        """
+        Yield the upload in ``UPLOAD_CHUNK_SIZE_KB`` chunks, enforcing ``MAX_FILE_SIZE_MB``
+
+        Raises:
+            HTTPException: As soon as the size limit is crossed
         """
-        Save uploaded file to temporary location
-        
+        settings = get_settings()
+        chunk_size = settings.UPLOAD_CHUNK_SIZE_KB * 1024
+        max_bytes = settings.max_file_size_bytes
+        file_size = 0
+
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            file_size += len(chunk)
+            if file_size > max_bytes:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
+                )
+            yield chunk
+
+    @staticmethod
+    async def save_temp_file(file: UploadFile) -> tuple[str, str, str]:
+        """
+        Stream uploaded file to a temporary location
+
+        The upload is copied in ``UPLOAD_CHUNK_SIZE_KB`` chunks, so at most one chunk is
+        held in memory. The content hash is computed incrementally and the upload is
+        rejected as soon as it crosses ``MAX_FILE_SIZE_MB``.
+
         Args:
             file: Uploaded file
-        
+
         Returns:
-            Tuple of (temp_file_path, simple_filename)
+            Tuple of (temp_file_path, simple_filename, sha256_hex_digest)
+
+        Raises:
+            HTTPException: If the file is empty or too large
         """
+        temp_file_path = None
+
         try:
-            logger.info(f"Received file: {file.filename}")
-            
             # Get file extension
             file_extension = Path(file.filename).suffix.lower()
-            
+
             # Create a simple, Bedrock-compliant filename
             simple_filename = f"document{file_extension}"
-            logger.info(f"Using simplified filename for Bedrock: {simple_filename}")
-            
-            # Create temporary file
+
+            digest = hashlib.sha256()
+            file_size = 0
+
             with tempfile.NamedTemporaryFile(
                 delete=False,
                 suffix=file_extension
             ) as temp_file:
-                # Read and write file content
-                content = await file.read()
-                
-                # Validate content
-                if not content or len(content) == 0:
-                    raise ValueError(f"Uploaded file {file.filename} is empty")
-                
-                logger.info(f"Read {len(content)} bytes from uploaded file")
-                
-                temp_file.write(content)
-                temp_file.flush()  # Ensure content is written
                 temp_file_path = temp_file.name
-                
-            # Verify the file was written correctly
-            if os.path.exists(temp_file_path):
-                file_size = os.path.getsize(temp_file_path)
-                logger.info(f"Saved temporary file: {temp_file_path} (size: {file_size} bytes) | Bedrock name: {simple_filename}")
-                
-                if file_size == 0:
-                    raise ValueError(f"Temporary file was written but is empty")
-            else:
-                raise ValueError(f"Failed to create temporary file at {temp_file_path}")
-            
-            # Return both path and simple filename for downstream callers
-            return temp_file_path, simple_filename
-            
+
+                async for chunk in FileHandler._stream_chunks(file):
+                    file_size += len(chunk)
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            if file_size == 0:
+                raise HTTPException(status_code=400, detail="File is empty")
+
+            logger.debug("Saved temporary file: {} (size: {} bytes) | Bedrock name: {}", temp_file_path, file_size, simple_filename)
+
+            # Return path, simple filename and content hash for downstream callers
+            return temp_file_path, simple_filename, digest.hexdigest()
+
         except Exception as e:
-            logger.error(f"Error saving temporary file: {str(e)}")
+            logger.error(f"Error saving temporary file: {getattr(e, 'detail', str(e))}")
+            if temp_file_path:
+                FileHandler.cleanup_temp_file(temp_file_path)
             raise
-    
+
+    @staticmethod
+    async def read_upload(file: UploadFile) -> tuple[bytes, str, str]:
+        """
+        Read uploaded file into memory, with the same limits as :meth:`save_temp_file`
+
+        Intended for small and medium uploads that can go straight into a model payload
+        without a temp file round trip.
+
+        Args:
+            file: Uploaded file
+
+        Returns:
+            Tuple of (content, simple_filename, sha256_hex_digest)
+
+        Raises:
+            HTTPException: If the file is empty or too large
+        """
+        file_extension = Path(file.filename).suffix.lower()
+        simple_filename = f"document{file_extension}"
+
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        async for chunk in FileHandler._stream_chunks(file):
+            digest.update(chunk)
+            buffer += chunk
+
+        if not buffer:
+            raise HTTPException(status_code=400, detail="File is empty")
+
+        logger.debug("Read {} bytes into memory | Bedrock name: {}", len(buffer), simple_filename)
+        return bytes(buffer), simple_filename, digest.hexdigest()
+
     @staticmethod
     def cleanup_temp_file(file_path: str) -> None:
         """Remove temporary file"""
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-                logger.info(f"Removed temporary file: {file_path}")
+                logger.debug("Removed temporary file: {}", file_path)
         except Exception as e:
             logger.warning(f"Could not remove temp file {file_path}: {str(e)}")
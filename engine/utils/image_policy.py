@@ -0,0 +1,192 @@
+import io
+import time
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageOps
+from config import get_settings
+
+
+RESAMPLE_FILTERS = {
+    "lanczos": Image.Resampling.LANCZOS,
+    "cubic": Image.Resampling.BICUBIC,
+    "bicubic": Image.Resampling.BICUBIC,
+    "linear": Image.Resampling.BILINEAR,
+    "bilinear": Image.Resampling.BILINEAR,
+}
+# Claude vision input costs roughly width * height / 750 tokens
+PIXELS_PER_IMAGE_TOKEN = 750
+# Re-encode attempts when the image is over the byte budget
+JPEG_QUALITIES = (90, 80, 70, 60)
+BUDGET_SHRINK_FACTOR = 0.85
+BUDGET_MAX_SHRINKS = 6
+# Downscales smaller than this fraction are skipped; they save nothing worth a resample
+RESIZE_TOLERANCE = 0.02
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    return int(width * height / PIXELS_PER_IMAGE_TOKEN)
+
+
+class ImagePolicy:
+    """Resolution-aware preprocessing for images sent to the model.
+
+    The model resizes anything larger than its optimal input (about 1568 px on the
+    long edge, ~1.15 megapixels) before reading it, so larger uploads only cost bytes
+    and tokens. Small scans gain from upscaling. The policy picks one scale per image:
+    upscale images whose long edge is under ``min_long_edge`` (at most
+    ``max_upscale``), downscale images over ``target_long_edge`` / ``max_megapixels``,
+    and leave the rest alone. The result is optionally converted to grayscale and
+    re-encoded until it fits ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        target_long_edge: int = 1568,
+        max_megapixels: float = 1.15,
+        min_long_edge: int = 1000,
+        max_upscale: float = 2.0,
+        allow_upscale: bool = True,
+        grayscale: bool = False,
+        max_bytes: int = 1024 * 1024,
+        resample: str = "lanczos",
+    ):
+        self.target_long_edge = int(target_long_edge)
+        self.max_pixels = float(max_megapixels) * 1_000_000
+        self.min_long_edge = int(min_long_edge)
+        self.max_upscale = max(1.0, float(max_upscale)) if allow_upscale else 1.0
+        self.grayscale = grayscale
+        self.max_bytes = int(max_bytes)
+        self.resample = RESAMPLE_FILTERS.get(resample, Image.Resampling.LANCZOS)
+
+    @classmethod
+    def from_settings(cls, settings=None) -> "ImagePolicy":
+        settings = settings or get_settings()
+        return cls(
+            target_long_edge=settings.IMAGE_TARGET_LONG_EDGE,
+            max_megapixels=settings.IMAGE_MAX_MEGAPIXELS,
+            min_long_edge=settings.IMAGE_MIN_LONG_EDGE,
+            max_upscale=settings.UPSCALING_SCALE_FACTOR,
+            allow_upscale=settings.ENABLE_IMAGE_UPSCALING,
+            grayscale=settings.IMAGE_GRAYSCALE,
+            max_bytes=settings.IMAGE_MAX_KB * 1024,
+            resample=settings.UPSCALING_METHOD,
+        )
+
+    def fit_scale(self, width: float, height: float) -> float:
+        """Largest scale at which an image of this size respects both the long-edge and pixel limits"""
+        if width <= 0 or height <= 0:
+            return 1.0
+        return min(self.target_long_edge / max(width, height), (self.max_pixels / (width * height)) ** 0.5)
+
+    def plan_scale(self, width: int, height: int) -> float:
+        """Scale factor to apply to an image of the given size"""
+        long_edge = max(width, height)
+        if long_edge <= 0:
+            return 1.0
+        limit = self.fit_scale(width, height)
+        if limit < 1.0 - RESIZE_TOLERANCE:
+            return limit
+        limit = max(limit, 1.0)
+        if long_edge < self.min_long_edge:
+            return min(self.max_upscale, self.min_long_edge / long_edge, limit)
+        return 1.0
+
+    def apply_to_image(self, img: Image.Image) -> Tuple[bytes, str, Dict]:
+        """Resize/convert a decoded image and encode it within the byte budget"""
+        started = time.perf_counter()
+        width, height = img.size
+        img = ImageOps.exif_transpose(img)
+        img = self._normalize_mode(img)
+        scale = self.plan_scale(*img.size)
+        if scale != 1.0:
+            img = self._resize(img, scale)
+        content, image_format, img = self._encode_within_budget(img)
+        report = self._report(width, height, None, img, content, image_format, started)
+        return content, image_format, report
+
+    def apply(self, content: bytes, image_format: str) -> Tuple[bytes, str, Dict]:
+        """
+        Apply the policy to encoded image bytes
+
+        Args:
+            content: Original image bytes
+            image_format: Original format (png, jpeg, gif, webp)
+
+        Returns:
+            Tuple of (image bytes, format, report). The original bytes are returned
+            unchanged when they already satisfy the policy.
+        """
+        started = time.perf_counter()
+        with Image.open(io.BytesIO(content)) as source:
+            width, height = source.size
+            unchanged = (
+                self.plan_scale(width, height) == 1.0
+                and len(content) <= self.max_bytes
+                and not (self.grayscale and source.mode not in ("L", "LA"))
+            )
+            if unchanged:
+                return content, image_format, self._report(width, height, len(content), None, content, image_format, started)
+            source.load()
+            img = ImageOps.exif_transpose(source)
+            img = self._normalize_mode(img)
+        scale = self.plan_scale(*img.size)
+        if scale != 1.0:
+            img = self._resize(img, scale)
+        output, output_format, img = self._encode_within_budget(img)
+        return output, output_format, self._report(width, height, len(content), img, output, output_format, started)
+
+    def _normalize_mode(self, img: Image.Image) -> Image.Image:
+        if self.grayscale:
+            return img.convert("L")
+        if img.mode not in ("RGB", "L"):
+            # Flatten transparency onto white; palette/CMYK become RGB
+            if img.mode in ("RGBA", "LA", "P"):
+                rgba = img.convert("RGBA")
+                background = Image.new("RGB", rgba.size, (255, 255, 255))
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                return background
+            return img.convert("RGB")
+        return img
+
+    def _resize(self, img: Image.Image, scale: float) -> Image.Image:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        return img.resize(size, self.resample)
+
+    def _encode_within_budget(self, img: Image.Image) -> Tuple[bytes, str, Image.Image]:
+        """Lossless PNG if it fits, else JPEG at falling quality, else shrink and retry"""
+        content = self._encode(img, "png")
+        if len(content) <= self.max_bytes:
+            return content, "png", img
+        for attempt in range(BUDGET_MAX_SHRINKS + 1):
+            if attempt:
+                img = self._resize(img, BUDGET_SHRINK_FACTOR)
+            for quality in JPEG_QUALITIES:
+                content = self._encode(img, "jpeg", quality)
+                if len(content) <= self.max_bytes:
+                    return content, "jpeg", img
+        # Best effort: the smallest encoding tried
+        return content, "jpeg", img
+
+    @staticmethod
+    def _encode(img: Image.Image, image_format: str, quality: Optional[int] = None) -> bytes:
+        buffer = io.BytesIO()
+        if image_format == "png":
+            img.save(buffer, "PNG", compress_level=6)
+        else:
+            img.save(buffer, "JPEG", quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _report(width, height, original_bytes, img, content, image_format, started) -> Dict:
+        out_width, out_height = img.size if img is not None else (width, height)
+        return {
+            "original_size": [width, height],
+            "output_size": [out_width, out_height],
+            "original_bytes": original_bytes,
+            "output_bytes": len(content),
+            "bytes_saved": (original_bytes - len(content)) if original_bytes is not None else None,
+            "original_image_tokens": estimate_image_tokens(width, height),
+            "output_image_tokens": estimate_image_tokens(out_width, out_height),
+            "output_format": image_format,
+            "resized": img is not None and (out_width, out_height) != (width, height),
+            "preprocess_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
@@ -0,0 +1,209 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+# Keys of the top-level object whose array holds the employee entries
+CONTAINER_KEYS = ("employees", "results", "records", "data", "items")
+
+# Characters that matter when matching brackets; everything else is skipped by the regex
+_STRUCTURAL = re.compile(r'[\[\]{}"\\]')
+_CLOSING = {"}": "{", "]": "["}
+# First character after an opening bracket that starts JSON rather than prose ("[as requested]")
+# An empty top-level "[]" is not taken as the JSON: it holds no employees either way
+_JSON_AFTER_OPENER = {"{": '"}', "[": "{["}
+
+
+def _balanced_spans(text: str) -> List[tuple]:
+    """Outermost bracket-balanced spans of ``text`` found in a single pass.
+
+    Returns ``(start, end, children)`` tuples where ``children`` are the balanced
+    spans directly nested inside. When an opening bracket is never matched (stray
+    ``{`` in prose, or a mismatched close), the complete spans nested in it are
+    promoted in its place, so nothing is rescanned.
+    """
+    spans: List[tuple] = []
+    # Open brackets as parallel stacks of ints/strs rather than a list per frame: text
+    # with thousands of stray brackets would otherwise keep the cyclic GC busy
+    starts: List[int] = []
+    openers: List[str] = []
+    children: List[Optional[list]] = []  # Allocated on a frame's first nested span
+    in_string = False
+    skip_to = 0
+
+    def flush() -> None:
+        for kids in children:
+            if kids:
+                spans.extend(kids)
+        starts.clear()
+        openers.clear()
+        children.clear()
+
+    for match in _STRUCTURAL.finditer(text):
+        pos = match.start()
+        if pos < skip_to:
+            continue
+        ch = match.group()
+        if in_string:
+            if ch == '\\':
+                skip_to = pos + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            # Quotes only delimit strings inside a candidate; prose quotes are ignored
+            in_string = bool(starts)
+        elif ch in '{[':
+            starts.append(pos)
+            openers.append(ch)
+            children.append(None)
+        elif ch in '}]':
+            if not starts:
+                continue
+            if openers[-1] != _CLOSING[ch]:
+                flush()
+                continue
+            openers.pop()
+            span = (starts.pop(), pos + 1, children.pop() or ())
+            if not starts:
+                spans.append(span)
+            elif children[-1] is None:
+                children[-1] = [span]
+            else:
+                children[-1].append(span)
+    flush()
+    return spans
+
+
+def locate_json(text: str, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+    """Find the first JSON object/array embedded in free text, in linear time.
+
+    Bracket-balanced spans are found in one pass over the text, then decoded in
+    order. A span that is not valid JSON is retried through its nested spans, with
+    total decoding work capped at a small multiple of the text length.
+
+    Args:
+        text: Model output, possibly with prose or markdown around the JSON
+        accept: Optional predicate; the first decoded value it accepts wins. If none is
+            accepted, the first decoded value is returned.
+
+    Returns:
+        The decoded value, or None if the text contains no complete JSON value
+    """
+    first = None
+    budget = 4 * len(text)
+    pending = list(reversed(_balanced_spans(text)))
+    while pending and budget > 0:
+        start, end, children = pending.pop()
+        budget -= end - start
+        try:
+            value = json.loads(text[start:end])
+        except (ValueError, RecursionError):
+            pending.extend(reversed(children))
+            continue
+        if accept is None or accept(value):
+            return value
+        if first is None:
+            first = value
+    return first
+
+
+class EmployeeStreamParser:
+    """Incremental parser that emits employee objects as soon as they close.
+
+    Feed it model output as it arrives; every complete object inside the employee
+    array (``{"employees": [...]}`` or a top-level array) is returned by :meth:`feed`
+    as a dict. Each character is inspected exactly once, so total work is linear in
+    the response length regardless of how it is chunked.
+
+    Text before the JSON (prose, markdown fences) is skipped: a bracket only starts the
+    JSON when the next non-blank character could follow it in JSON (``{"``, ``{}``,
+    ``[{``, ``[[``), so brackets and quotes in prose are ignored. A value that
+    closes without containing the employee array is dropped and scanning resumes.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._opener = None  # Bracket seen before the JSON, waiting for the next character
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth = None  # Depth of the employee array once located
+        self._done = False
+        self._capture: List[str] = []
+        self._capturing = False
+        self._key_chars: List[str] = []
+        self._last_key = None
+
+    @property
+    def done(self) -> bool:
+        """True once the employee array has been closed"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a chunk of text and return the employee objects completed by it"""
+        completed: List[Dict] = []
+        if self._done:
+            return completed
+
+        for ch in chunk:
+            if not self._started:
+                if self._opener is not None:
+                    if ch in " \t\r\n":
+                        continue
+                    opener, self._opener = self._opener, None
+                    if ch in _JSON_AFTER_OPENER[opener]:
+                        self._started = True
+                        self._depth = 1
+                        if opener == "[":
+                            self._array_depth = 1
+                if not self._started:
+                    if ch in "{[":
+                        self._opener = ch
+                    continue
+
+            if self._capturing:
+                self._capture.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and not self._capturing:
+                        self._last_key = "".join(self._key_chars)
+                elif self._depth == 1 and not self._capturing:
+                    self._key_chars.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._key_chars = []
+            elif ch in '{[':
+                if self._array_depth is not None and self._depth == self._array_depth and ch == '{':
+                    self._capturing = True
+                    self._capture = [ch]
+                self._depth += 1
+                if self._array_depth is None and ch == '[' and self._depth == 2 and self._last_key in CONTAINER_KEYS:
+                    self._array_depth = self._depth
+            elif ch in '}]':
+                self._depth -= 1
+                if self._capturing and self._depth == self._array_depth:
+                    self._capturing = False
+                    text = "".join(self._capture)
+                    self._capture = []
+                    try:
+                        completed.append(json.loads(text))
+                    except ValueError as e:
+                        logger.warning(f"Skipping malformed streamed employee object: {e}")
+                elif self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._done = True
+                    break
+                elif self._depth <= 0:
+                    # A JSON value without the employee array (or mismatched brackets): look further
+                    self._started = False
+                    self._depth = 0
+                    self._last_key = None
+        return completed
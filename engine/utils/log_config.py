@@ -0,0 +1,63 @@
+import random
+import sys
+from typing import Callable
+from loguru import logger
+from config import get_settings
+
+
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>"
+)
+
+
+def configure_logging(settings=None) -> None:
+    """
+    Install the console and file sinks
+
+    ``LOG_FORMAT=json`` writes one JSON object per record (loguru's ``serialize``)
+    for log shippers; ``text`` keeps the human-readable format. With ``LOG_ENQUEUE``
+    records are handed to a background thread, so request handlers never wait on
+    formatting or disk writes.
+    """
+    settings = settings or get_settings()
+    serialize = settings.LOG_FORMAT.lower() == "json"
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        colorize=not serialize,
+        format="{message}" if serialize else TEXT_FORMAT,
+        serialize=serialize,
+        enqueue=settings.LOG_ENQUEUE,
+        level=settings.LOG_LEVEL,
+    )
+    if settings.LOG_FILE:
+        logger.add(
+            settings.LOG_FILE,
+            rotation="10 MB",
+            retention="7 days",
+            serialize=serialize,
+            enqueue=settings.LOG_ENQUEUE,
+            level=settings.LOG_LEVEL,
+        )
+
+
+def log_payload(label: str, payload: Callable[[], str]) -> None:
+    """
+    Log a large payload (e.g. a full model response) at bounded cost
+
+    The payload is logged at DEBUG, or at INFO for a ``LOG_PAYLOAD_SAMPLE_RATE``
+    fraction of calls, and truncated to ``LOG_PAYLOAD_MAX_CHARS``. ``payload`` is
+    only called when the record is actually emitted.
+    """
+    settings = get_settings()
+    level = "INFO" if settings.LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < settings.LOG_PAYLOAD_SAMPLE_RATE else "DEBUG"
+    limit = settings.LOG_PAYLOAD_MAX_CHARS
+
+    def render() -> str:
+        text = payload()
+        if limit and len(text) > limit:
+            return f"{text[:limit]}... [{len(text) - limit:,} more characters]"
+        return text
+
+    logger.opt(lazy=True, depth=1).log(level, "🔍 {}: {}", lambda: label, render)
@@ -0,0 +1,138 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from config import get_settings
+from utils.tracing import Span, span
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except Exception:
+    CONTENT_TYPE_LATEST = Counter = Gauge = Histogram = generate_latest = None
+
+
+# Stage latencies range from sub-millisecond parsing to multi-minute model calls
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+SIZE_BUCKETS = (1024, 10 * 1024, 50 * 1024, 100 * 1024, 250 * 1024, 512 * 1024, 1024 ** 2, 2 * 1024 ** 2, 5 * 1024 ** 2, 10 * 1024 ** 2, 25 * 1024 ** 2)
+
+
+class _NoopMetric:
+    """Stands in for every metric when prometheus_client is not installed or METRICS_ENABLED is off"""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+METRICS_AVAILABLE = generate_latest is not None
+# With metrics off nothing is registered and every helper below does no work
+METRICS_ENABLED = get_settings().METRICS_ENABLED
+
+
+def _metric(kind, *args, **kwargs):
+    return kind(*args, **kwargs) if kind is not None and METRICS_ENABLED else _NoopMetric()
+
+STAGE_SECONDS = _metric(
+    Histogram, "timesheet_stage_duration_seconds", "Time spent in each extraction pipeline stage",
+    ["stage", "file_type", "model_id"], buckets=STAGE_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = _metric(
+    Histogram, "timesheet_http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=STAGE_BUCKETS,
+)
+HTTP_IN_FLIGHT = _metric(Gauge, "timesheet_http_requests_in_flight", "HTTP requests being processed")
+REQUEST_BYTES = _metric(
+    Histogram, "timesheet_upload_bytes", "Size of uploaded documents", ["file_type"], buckets=SIZE_BUCKETS,
+)
+PAYLOAD_BYTES = _metric(
+    Histogram, "timesheet_model_payload_bytes", "Size of each document payload sent to the model",
+    ["file_type", "payload_format"], buckets=SIZE_BUCKETS,
+)
+BEDROCK_TOKENS = _metric(
+    Counter, "timesheet_bedrock_tokens_total", "Tokens reported in Bedrock converse usage",
+    ["model_id", "file_type", "direction"],
+)
+BEDROCK_LATENCY_SECONDS = _metric(
+    Histogram, "timesheet_bedrock_latency_seconds", "Model latency reported by Bedrock (metrics.latencyMs)",
+    ["model_id", "file_type"], buckets=STAGE_BUCKETS,
+)
+EXTRACTIONS = _metric(
+    Counter, "timesheet_extractions_total", "Extractions by method (model, deterministic, cache) and outcome",
+    ["file_type", "method", "outcome"],
+)
+BEDROCK_IN_FLIGHT = _metric(Gauge, "timesheet_bedrock_calls_in_flight", "Bedrock calls currently running")
+BEDROCK_CONCURRENCY_LIMIT = _metric(Gauge, "timesheet_bedrock_concurrency_limit", "Current adaptive Bedrock concurrency limit")
+ADMISSION_IN_FLIGHT = _metric(Gauge, "timesheet_admission_in_flight", "Extraction requests holding an admission slot")
+ADMISSION_WAITING = _metric(Gauge, "timesheet_admission_waiting", "Extraction requests queued for an admission slot")
+
+# ``direction`` label -> converse ``usage`` key
+USAGE_DIRECTIONS = (
+    ("input", "inputTokens"),
+    ("output", "outputTokens"),
+    ("cache_read", "cacheReadInputTokens"),
+    ("cache_write", "cacheWriteInputTokens"),
+)
+
+
+@contextmanager
+def observe_stage(stage: str, file_type: str = "", model_id: str = "") -> Iterator[Optional[Span]]:
+    """Time the enclosed block into ``timesheet_stage_duration_seconds``, errors included.
+
+    The block is also recorded as a span of the current request trace, if any; the
+    span (or None) is yielded so callers can attach attributes.
+    """
+    if not METRICS_ENABLED:
+        with span(stage, file_type=file_type or None, model_id=model_id or None) as stage_span:
+            yield stage_span
+        return
+    started = time.perf_counter()
+    try:
+        with span(stage, file_type=file_type or None, model_id=model_id or None) as stage_span:
+            yield stage_span
+    finally:
+        STAGE_SECONDS.labels(stage, file_type or "", model_id or "").observe(time.perf_counter() - started)
+
+
+def record_bedrock_usage(usage: Optional[Dict], latency_ms: Optional[float], model_id: str, file_type: str) -> None:
+    """Count tokens (prompt-cache reads and writes included) from a converse ``usage`` block and observe ``metrics.latencyMs``"""
+    if not METRICS_ENABLED:
+        return
+    if usage:
+        for direction, key in USAGE_DIRECTIONS:
+            if usage.get(key):
+                BEDROCK_TOKENS.labels(model_id, file_type, direction).inc(usage[key])
+    if latency_ms is not None:
+        BEDROCK_LATENCY_SECONDS.labels(model_id, file_type).observe(latency_ms / 1000)
+
+
+def render_metrics() -> bytes:
+    """The default registry in the Prometheus text format"""
+    return generate_latest()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by route template and requests in flight"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status["code"])).observe(time.perf_counter() - started)
@@ -0,0 +1,63 @@
+from typing import Any, Dict
+
+
+# Wire schemas the model can be asked to answer in
+OUTPUT_SCHEMAS = ("verbose", "compact")
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Compact key -> EmployeeTimesheet field
+COMPACT_FIELDS = {
+    "id": "client_id",
+    "name": "client_name",
+    "employee": "employee_name",
+    "period": "period",
+    "start": "week_start",
+    "end": "week_end",
+    "h": "week_hours",
+    "total": "total_hours",
+}
+
+# Keys that only occur in compact entries; used to tell the two schemas apart
+COMPACT_MARKERS = ("name", "h", "total", "start", "end", "employee")
+
+
+def expand_hours(hours: Any) -> Any:
+    """Turn a positional Mon..Sun hours array into ``DailyHours`` dicts (other shapes pass through)"""
+    if not isinstance(hours, list) or not all(h is None or isinstance(h, (int, float)) for h in hours):
+        return hours
+    return [{"day": day, "hours": float(h or 0)} for day, h in zip(DAYS, hours)]
+
+
+def _expand_fields(entry: Dict[str, Any]) -> Dict[str, Any]:
+    expanded = {COMPACT_FIELDS.get(key, key): value for key, value in entry.items()}
+    if "week_hours" in expanded:
+        expanded["week_hours"] = expand_hours(expanded["week_hours"])
+        # The total can be left out of compact entries: it is the sum of the days
+        if expanded.get("total_hours") is None and isinstance(expanded["week_hours"], list):
+            expanded["total_hours"] = sum(day.get("hours", 0) for day in expanded["week_hours"] if isinstance(day, dict))
+    return expanded
+
+
+def expand_employee(entry: Any) -> Any:
+    """
+    Expand a compact employee entry into the verbose ``EmployeeTimesheet`` shape
+
+    Compact entries use short keys (``name``, ``h``, ``total``, ...), a positional
+    ``h`` array of Mon..Sun hours and omit null fields. Nested ``weeks`` entries are
+    expanded too. Verbose entries are returned unchanged, so replies can be decoded
+    without knowing which schema was requested.
+    """
+    if not isinstance(entry, dict):
+        return entry
+    weeks = entry.get("weeks")
+    compact_weeks = isinstance(weeks, list) and any(
+        isinstance(week, dict) and any(key in week for key in COMPACT_MARKERS) for week in weeks
+    )
+    if not compact_weeks and not any(key in entry for key in COMPACT_MARKERS):
+        return entry
+    expanded = _expand_fields(entry)
+    if isinstance(weeks, list):
+        expanded["weeks"] = [_expand_fields(week) if isinstance(week, dict) else week for week in weeks]
+    return expanded
+
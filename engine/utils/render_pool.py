@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from loguru import logger
+from config import get_settings
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+def render_pool_size() -> int:
+    return get_settings().PDF_RENDER_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Lazily create the process pool used for PDF page rendering"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=render_pool_size())
+        logger.info("Started PDF render pool with {} process(es)", render_pool_size())
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the render pool's processes, if it was started; the next render starts a new one"""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=True, cancel_futures=True)
+        _render_pool = None
+        logger.debug("Stopped PDF render pool")
@@ -0,0 +1,28 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+ORJSON_AVAILABLE = orjson is not None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson, or by pydantic-core when orjson is not installed
+
+    Meant for content that is already validated and JSON-ready, such as stored job
+    results and error bodies: returning it from a route skips ``response_model``
+    validation entirely. Routes that return models should keep the default response
+    class instead, which FastAPI serializes straight to bytes with pydantic-core.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None or isinstance(content, BaseModel):
+            return to_json(content)
+        # UTC datetimes end in "Z", matching what pydantic emits for the same models
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving while it
+    runs await the same task and get the same result (or exception). Each caller
+    awaits through ``asyncio.shield``, so a caller that is cancelled (e.g. its client
+    disconnected) stops waiting without cancelling the shared work for the others.
+    The work also runs to completion when every caller has gone, so its result can
+    still be cached.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run ``work()`` once per key at a time
+
+        Returns:
+            Tuple of (result, shared): ``shared`` is True when this call joined work
+            started by another caller
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            task.exception()
@@ -0,0 +1,234 @@
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+from loguru import logger
+from config import get_settings
+
+
+class Span:
+    """One timed operation within a request trace"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class RequestTrace:
+    """Spans recorded for one request; the first span is the request itself"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span(name, None, attributes)
+        self.spans: List[Span] = [self.root]
+
+    def timings(self) -> Dict[str, Any]:
+        """
+        Per-stage durations for ``metadata.timings``
+
+        Returns:
+            ``{"total_ms", "stages": {name: ms}, "trace_id"}``. Stages that ran more
+            than once (e.g. one model call per chunk) are summed, so with parallel
+            chunks they can add up to more than ``total_ms``. The Bedrock-reported
+            latency appears as ``bedrock_server_latency``.
+        """
+        stages: Dict[str, float] = {}
+        for span in self.spans[1:]:
+            stages[span.name] = stages.get(span.name, 0.0) + span.duration_ms
+            latency = span.attributes.get("bedrock.latency_ms")
+            if latency is not None:
+                stages["bedrock_server_latency"] = stages.get("bedrock_server_latency", 0.0) + latency
+        return {
+            "total_ms": round(self.root.duration_ms, 2),
+            "stages": {name: round(ms, 2) for name, ms in stages.items()},
+            "trace_id": self.trace_id,
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Record the enclosed block as a child of the current span; a no-op outside a trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    child = Span(name, parent.span_id if parent else trace.root.span_id, attributes)
+    trace.spans.append(child)
+    _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        # Restore by value rather than token: async generators may resume in a copied context
+        _current_span.set(parent)
+
+
+def start_trace(name: str, enabled: bool = True, **attributes) -> Optional[RequestTrace]:
+    """Begin a request trace, or return None when timings were not requested and nothing exports traces"""
+    if not enabled and get_trace_exporter() is None:
+        return None
+    return RequestTrace(name, attributes)
+
+
+@contextmanager
+def activate(trace: Optional[RequestTrace]) -> Iterator[Optional[RequestTrace]]:
+    """Make ``trace`` the target of ``span()`` calls in the enclosed block (and tasks it starts)"""
+    if trace is None:
+        yield None
+        return
+    previous_trace, previous_span = _current_trace.get(), _current_span.get()
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        _current_trace.set(previous_trace)
+        _current_span.set(previous_span)
+
+
+def finish_trace(trace: Optional[RequestTrace], error: Optional[BaseException] = None) -> None:
+    """End the request span and hand the trace to the exporter, if one is configured"""
+    if trace is None or trace.root.end_ns is not None:
+        return
+    trace.root.end_ns = time.time_ns()
+    if error is not None:
+        trace.root.error = f"{type(error).__name__}: {error}"
+    exporter = get_trace_exporter()
+    if exporter is not None:
+        exporter.export(trace)
+
+
+@contextmanager
+def request_trace(name: str, enabled: bool = True, **attributes) -> Iterator[Optional[RequestTrace]]:
+    """
+    Trace one request: spans opened inside (including in tasks it starts) are collected
+
+    Yields None when disabled. When a trace exporter is configured, the finished trace
+    is exported in the background.
+    """
+    trace = start_trace(name, enabled, **attributes)
+    error = None
+    try:
+        with activate(trace):
+            yield trace
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        finish_trace(trace, error)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPJsonExporter:
+    """Export traces as OTLP/JSON (``ExportTraceServiceRequest``).
+
+    Traces go to a JSON-lines file (one request per line, the format read by the
+    OpenTelemetry Collector's ``otlpjsonfile`` receiver) and/or are POSTed to an OTLP
+    HTTP endpoint such as ``http://collector:4318/v1/traces``. Writes happen on a
+    single background thread so requests never wait for the exporter.
+    """
+
+    def __init__(self, file_path: str = "", endpoint: str = "", service_name: str = "timesheet-engine", timeout: float = 5.0):
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-export")
+
+    def export(self, trace: RequestTrace) -> None:
+        self._executor.submit(self._write, self.to_otlp(trace))
+
+    def to_otlp(self, trace: RequestTrace) -> Dict[str, Any]:
+        spans = []
+        for span in trace.spans:
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span is trace.root else 1,  # SERVER for the request, INTERNAL otherwise
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": _otlp_attributes(span.attributes),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "timesheet-engine.tracing"}, "spans": spans}],
+            }]
+        }
+
+    def _write(self, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, separators=(",", ":"))
+        if self.file_path:
+            try:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            except OSError as e:
+                logger.warning(f"⚠️ Could not write trace to {self.file_path}: {e}")
+        if self.endpoint:
+            request = urllib.request.Request(
+                self.endpoint, data=body.encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    pass
+            except Exception as e:
+                logger.warning(f"⚠️ Could not export trace to {self.endpoint}: {e}")
+
+
+@lru_cache()
+def get_trace_exporter() -> Optional[OTLPJsonExporter]:
+    """Get the process-wide trace exporter, or None when no destination is configured"""
+    settings = get_settings()
+    if not settings.TRACE_EXPORT_FILE and not settings.TRACE_EXPORT_ENDPOINT:
+        return None
+    return OTLPJsonExporter(
+        file_path=settings.TRACE_EXPORT_FILE,
+        endpoint=settings.TRACE_EXPORT_ENDPOINT,
+        service_name=settings.TRACE_SERVICE_NAME,
+    )
@@ -28,12 +28,12 @@ async def validate_file(file: UploadFile, settings: Settings) -> None:
             detail=f"File type '.{file_extension}' not allowed. Allowed types: {', '.join(settings.allowed_extensions_list)}"
         )
     
-    # Check file size
-    file.file.seek(0, 2)  # Move to end of file
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
+    # Reject early when the multipart parser already knows the size. The authoritative
+    # size and emptiness checks happen while the upload is streamed to disk
+    # (FileHandler.save_temp_file), so the spooled file is never scanned here.
+    file_size = getattr(file, "size", None)
     
-    if file_size > settings.max_file_size_bytes:
+    if file_size is not None and file_size > settings.max_file_size_bytes:
         raise HTTPException(
             status_code=400,
             detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
@@ -42,4 +42,4 @@ async def validate_file(file: UploadFile, settings: Settings) -> None:
     if file_size == 0:
         raise HTTPException(status_code=400, detail="File is empty")
     
-    logger.info(f"File validated: {file.filename} ({file_size} bytes)")
+    logger.info("File validated: {} ({} bytes)", file.filename, file_size if file_size is not None else "unknown")